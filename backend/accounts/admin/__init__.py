@@ -1,4 +1,9 @@
 from .phone_number import PhoneNumberAdmin
 from .provider_account import ProviderAccountAdmin
 from .request_charge import RequestChargeAdmin
-from .request_deposit import RequestDepositAdmin
\ No newline at end of file
+from .request_deposit import RequestDepositAdmin
+from .charge_job import ChargeJobAdmin
+from .charge_delivery import ChargeDeliveryAdmin
+from .wallet_hold import WalletHoldAdmin
+from .wallet_transfer import WalletTransferAdmin
+from .charge_schedule import ChargeScheduleAdmin, ChargeScheduleRunAdmin
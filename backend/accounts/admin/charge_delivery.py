@@ -0,0 +1,20 @@
+from django.contrib import admin
+
+from accounts.models import ChargeDelivery
+
+
+@admin.register(ChargeDelivery)
+class ChargeDeliveryAdmin(admin.ModelAdmin):
+    list_display = (
+        "charge",
+        "operator",
+        "status",
+        "attempts",
+        "next_attempt_at",
+        "delivered_at",
+    )
+    list_filter = ("status", "operator")
+    raw_id_fields = ("charge",)
+    date_hierarchy = "created"
+    ordering = ("-created",)
+    readonly_fields = ("operator_reference", "last_error", "attempts")
@@ -0,0 +1,29 @@
+from django.contrib import admin
+
+from accounts.models import ChargeJob
+
+
+@admin.register(ChargeJob)
+class ChargeJobAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "provider_account",
+        "status",
+        "total_rows",
+        "processed_rows",
+        "failed_rows",
+        "created",
+    )
+    list_filter = ("status",)
+    list_select_related = ("provider_account",)
+    raw_id_fields = ("provider_account", "requester")
+    date_hierarchy = "created"
+    ordering = ("-created",)
+    readonly_fields = (
+        "total_rows",
+        "processed_rows",
+        "succeeded_rows",
+        "failed_rows",
+        "charged_amount",
+        "error",
+    )
@@ -0,0 +1,46 @@
+from django.contrib import admin
+
+from accounts.models import ChargeSchedule, ChargeScheduleItem, ChargeScheduleRun
+
+
+class ChargeScheduleItemInline(admin.TabularInline):
+    model = ChargeScheduleItem
+    extra = 1
+    fields = ("phone_number", "amount")
+    raw_id_fields = ("phone_number",)
+
+
+@admin.register(ChargeSchedule)
+class ChargeScheduleAdmin(admin.ModelAdmin):
+    list_display = ("name", "provider_account", "interval", "next_run_at", "is_active")
+    list_filter = ("interval", "is_active")
+    list_select_related = ("provider_account",)
+    search_fields = ("name",)
+    raw_id_fields = ("provider_account", "requester")
+    exclude = ("user_id",)
+    inlines = [ChargeScheduleItemInline]
+    ordering = ("-created",)
+
+
+@admin.register(ChargeScheduleRun)
+class ChargeScheduleRunAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "schedule",
+        "due_at",
+        "status",
+        "succeeded_items",
+        "failed_items",
+        "charged_amount",
+    )
+    list_filter = ("status",)
+    list_select_related = ("schedule",)
+    raw_id_fields = ("schedule", "provider_account")
+    date_hierarchy = "due_at"
+    ordering = ("-due_at",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -1,6 +1,19 @@
-from django.contrib import admin
+import io
+
+from django import forms
+from django.contrib import admin, messages
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
 
 from accounts.models import PhoneNumber
+from core.utils import iter_csv_column
+
+
+class PhoneNumberImportForm(forms.Form):
+    csv_file = forms.FileField(label="CSV file")
+    column = forms.IntegerField(min_value=0, initial=0)
+
 
 @admin.register(PhoneNumber)
 class PhoneNumberAdmin(admin.ModelAdmin):
@@ -8,4 +21,44 @@ class PhoneNumberAdmin(admin.ModelAdmin):
     list_filter = ("is_active",)
     search_fields = ("number",)
     date_hierarchy = "created"
-    ordering = ("-created",)
\ No newline at end of file
+    ordering = ("-created",)
+    change_list_template = "admin/accounts/phonenumber/change_list.html"
+
+    def get_urls(self):
+        urls = [
+            path(
+                "import/",
+                self.admin_site.admin_view(self.import_view),
+                name="accounts_phonenumber_import",
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def import_view(self, request):
+        if not self.has_add_permission(request):
+            return redirect("admin:accounts_phonenumber_changelist")
+
+        form = PhoneNumberImportForm(request.POST or None, request.FILES or None)
+        if request.method == "POST" and form.is_valid():
+            upload = form.cleaned_data["csv_file"]
+            stream = io.TextIOWrapper(upload.file, encoding="utf-8", newline="")
+            stats = PhoneNumber.bulk_import(
+                iter_csv_column(stream, column=form.cleaned_data["column"])
+            )
+            self.message_user(
+                request,
+                "Imported %(created)s phone numbers (%(skipped)s skipped, "
+                "%(invalid)s invalid)." % stats,
+                level=messages.WARNING if stats["invalid"] else messages.SUCCESS,
+            )
+            return redirect("admin:accounts_phonenumber_changelist")
+
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "form": form,
+            "title": "Import phone numbers",
+        }
+        return TemplateResponse(
+            request, "admin/accounts/phonenumber/import.html", context
+        )
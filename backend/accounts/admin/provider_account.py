@@ -13,6 +13,8 @@ class ProviderAccountTeamMemberInline(admin.TabularInline):
     fields = (
         "user",
         "permission_level",
+        "daily_spend_limit",
+        "monthly_spend_limit",
     )
     raw_id_fields = ("user",)
 
@@ -21,8 +23,8 @@ class ProviderWalletInline(admin.StackedInline):
     model = ProviderWallet
     can_delete = False
     max_num = 1
-    fields = ("balance",)
-    readonly_fields = ("balance",)
+    fields = ("balance", "held_balance")
+    readonly_fields = ("balance", "held_balance")
 
 
 @admin.register(ProviderAccount)
@@ -45,9 +47,28 @@ class ProviderAccountAdmin(admin.ModelAdmin):
                 "fields": (
                     "name",
                     "is_active",
+                    "reseller",
                 )
             },
         ),
+        (
+            "Rate limits",
+            {
+                "fields": (
+                    "charge_rate_limit",
+                    "deposit_rate_limit",
+                ),
+            },
+        ),
+        (
+            "Spend limits",
+            {
+                "fields": (
+                    "daily_spend_limit",
+                    "monthly_spend_limit",
+                ),
+            },
+        ),
         (
             "Timestamps",
             {
@@ -63,6 +84,7 @@ class ProviderAccountAdmin(admin.ModelAdmin):
         "created",
         "updated",
     )
+    raw_id_fields = ("reseller",)
 
     def save_model(self, request, obj, form, change):
 
@@ -0,0 +1,13 @@
+from django.contrib import admin
+
+from accounts.models import WalletHold
+
+
+@admin.register(WalletHold)
+class WalletHoldAdmin(admin.ModelAdmin):
+    list_display = ("id", "provider_account", "amount", "status", "expires_at")
+    list_filter = ("status",)
+    list_select_related = ("provider_account",)
+    raw_id_fields = ("provider_account", "phone_number", "requester", "charge")
+    date_hierarchy = "created"
+    ordering = ("-created",)
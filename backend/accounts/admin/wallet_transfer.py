@@ -0,0 +1,19 @@
+from django.contrib import admin
+
+from accounts.models import WalletTransfer
+
+
+@admin.register(WalletTransfer)
+class WalletTransferAdmin(admin.ModelAdmin):
+    list_display = ("id", "source_account", "destination_account", "amount", "created")
+    list_select_related = ("source_account", "destination_account")
+    raw_id_fields = ("source_account", "destination_account")
+    date_hierarchy = "created"
+    ordering = ("-created",)
+
+    # Rows are written by ProviderWallet.transfer only, with the balances
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
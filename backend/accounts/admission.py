@@ -0,0 +1,61 @@
+"""
+Admission control for the wallet lock. Charges fail fast instead of piling
+up behind a hot wallet: once too many requests of this process are already
+waiting for the same wallet, or the transaction keeps failing on the lock.
+"""
+
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from core import metrics
+from core.transactions import transient_reason
+
+WAITERS = metrics.gauge(
+    "wallet_lock_waiters",
+    "Requests of this process waiting for or holding a wallet lock.",
+)
+REJECTED = metrics.counter(
+    "wallet_admission_rejected_total",
+    "Charges rejected because their wallet was too contended.",
+)
+
+_lock = threading.Lock()
+_waiters = defaultdict(int)
+
+
+class WalletBusyError(Exception):
+    def __init__(self, account_id, retry_after=None):
+        self.account_id = account_id
+        self.retry_after = (
+            settings.WALLET_BUSY_RETRY_AFTER if retry_after is None else retry_after
+        )
+        super().__init__("Provider wallet is busy, retry later.")
+
+
+@contextmanager
+def wallet_admission(account_id):
+    with _lock:
+        if _waiters[account_id] >= settings.WALLET_MAX_WAITERS:
+            REJECTED.inc(reason="queue_full")
+            raise WalletBusyError(account_id)
+        _waiters[account_id] += 1
+        WAITERS.set(_waiters[account_id], account_id=account_id)
+    try:
+        yield
+    except Exception as e:
+        reason = transient_reason(e)
+        if reason:
+            REJECTED.inc(reason=reason)
+            raise WalletBusyError(account_id) from e
+        raise
+    finally:
+        with _lock:
+            _waiters[account_id] -= 1
+            if _waiters[account_id]:
+                WAITERS.set(_waiters[account_id], account_id=account_id)
+            else:
+                del _waiters[account_id]
+                WAITERS.remove(account_id=account_id)
@@ -1,2 +1,6 @@
 from .request_charge import request_charge_api_view
-from .request_deposit import request_deposit_list_create, request_deposit_detail
\ No newline at end of file
+from .request_deposit import request_deposit_list_create, request_deposit_detail
+from .charge_job import charge_job_create, charge_job_detail, charge_job_result
+from .charge_batch import charge_batch_ingest
+from .wallet_summary import wallet_summary
+from .events import wallet_events
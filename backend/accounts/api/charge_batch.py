@@ -0,0 +1,115 @@
+import io
+import logging
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.decorators import (
+    api_view,
+    parser_classes,
+    permission_classes,
+    throttle_classes,
+)
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework import status
+
+from drf_spectacular.utils import OpenApiTypes, extend_schema
+
+from accounts.admission import WalletBusyError, wallet_admission
+from accounts.ingest import CODECS, IngestError, get_codec
+from accounts.models import ProviderAccountTeamMember, RequestCharge
+from accounts.throttling import ChargeRateThrottle
+from core import db_router
+from core.utils import chunked
+
+logger = logging.getLogger("accounts")
+
+CHARGE_FAILED = "Charge failed, retry with the same idempotency key."
+
+
+def _charge_results(codec, provider_account_id, user_id, items):
+    """
+    Charge ``items`` chunk by chunk while the response streams, after the
+    middlewares returned. A chunk that fails gets an error result for each of
+    its items, so the stream always holds one result per item.
+    """
+    start = 0
+    for chunk in chunked(items, settings.CHARGE_INGEST_BATCH_SIZE):
+        try:
+            with wallet_admission(provider_account_id):
+                outcomes = RequestCharge.create_charge_batch(
+                    provider_account_id, user_id, chunk
+                )
+        except (ValueError, PermissionError, WalletBusyError) as e:
+            outcomes = [str(e)] * len(chunk)
+        except Exception:
+            # The chunk was rolled back, the items can be sent again as they are
+            logger.exception(
+                f"Charge batch of provider account {provider_account_id} failed"
+            )
+            outcomes = [CHARGE_FAILED] * len(chunk)
+        yield b"".join(
+            (
+                codec.encode(index, None, outcome)
+                if isinstance(outcome, str)
+                else codec.encode(index, outcome.id, None)
+            )
+            for index, outcome in enumerate(outcomes, start)
+        )
+        start += len(chunk)
+
+
+@extend_schema(
+    summary="Charge a batch of numbers from a msgpack or binary frame stream",
+    description=(
+        "The body is a stream of (phone number, amount, idempotency key) items "
+        "and the response streams one (index, charge id, error) result per item "
+        "in the same format. See accounts.ingest for the wire formats."
+    ),
+    request={content_type: OpenApiTypes.BINARY for content_type in CODECS},
+    responses={(200, content_type): OpenApiTypes.BINARY for content_type in CODECS}
+    | {
+        400: {"description": "Bad Request"},
+        403: {"description": "user dont have permission"},
+        415: {"description": "Unsupported format"},
+        429: {"description": "Too many requests"},
+    },
+)
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+@parser_classes([])
+@throttle_classes([ChargeRateThrottle])
+def charge_batch_ingest(request, provider_account_id):
+    codec = get_codec(request.content_type)
+    if codec is None:
+        return Response(
+            {"error": "unsupported content type"},
+            status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        )
+    if not ProviderAccountTeamMember.objects.filter(
+        user=request.user,
+        account_id=provider_account_id,
+        permission_level__in=[
+            ProviderAccountTeamMember.PermissionLevel.ADMIN,
+            ProviderAccountTeamMember.PermissionLevel.STAFF,
+        ],
+    ).exists():
+        return Response(
+            {"error": "user dont have permission"}, status=status.HTTP_403_FORBIDDEN
+        )
+    try:
+        items = codec.decode(
+            request.stream or io.BytesIO(), settings.CHARGE_INGEST_MAX_ITEMS
+        )
+    except IngestError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    # The charges are written while streaming, once ReplicaRoutingMiddleware
+    # returned, so the client is pinned to the primary now
+    state = db_router.current_state()
+    if state is not None:
+        state.written = True
+    return StreamingHttpResponse(
+        _charge_results(codec, provider_account_id, request.user.id, items),
+        content_type=codec.content_type,
+    )
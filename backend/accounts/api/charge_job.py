@@ -0,0 +1,88 @@
+from django.http import FileResponse
+from rest_framework.decorators import api_view, parser_classes, permission_classes
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework import status
+
+from drf_spectacular.utils import extend_schema
+
+from accounts.models import ChargeJob
+from accounts.serializers import ChargeJobCreateSerializer, ChargeJobSerializer
+
+
+def _get_user_job(request, pk):
+    try:
+        return ChargeJob.objects.get(
+            id=pk, provider_account__team_members__user=request.user
+        )
+    except ChargeJob.DoesNotExist:
+        return None
+
+
+@extend_schema(
+    summary="Upload a csv file of charges to be processed in the background",
+    request={"multipart/form-data": ChargeJobCreateSerializer},
+    responses={
+        202: ChargeJobSerializer,
+        400: {"description": "Bad Request"},
+        403: {"description": "user dont have permission"},
+    },
+)
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+@parser_classes([MultiPartParser])
+def charge_job_create(request):
+    serializer = ChargeJobCreateSerializer(
+        data=request.data, context={"request": request}
+    )
+    serializer.is_valid(raise_exception=True)
+    instance = serializer.save()
+    return Response(
+        ChargeJobSerializer(instance, context={"request": request}).data,
+        status=status.HTTP_202_ACCEPTED,
+    )
+
+
+@extend_schema(
+    summary="Get progress of a charge job",
+    responses={
+        200: ChargeJobSerializer,
+        404: {"description": "Objects Not Found"},
+    },
+)
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def charge_job_detail(request, pk):
+    instance = _get_user_job(request, pk)
+    if instance is None:
+        return Response(
+            {"error": "object does not exist"}, status=status.HTTP_404_NOT_FOUND
+        )
+    return Response(
+        ChargeJobSerializer(instance, context={"request": request}).data,
+        status=status.HTTP_200_OK,
+    )
+
+
+@extend_schema(
+    summary="Download the per row failures of a charge job as csv",
+    responses={
+        (200, "text/csv"): bytes,
+        404: {"description": "Objects Not Found"},
+    },
+)
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def charge_job_result(request, pk):
+    instance = _get_user_job(request, pk)
+    if instance is None or not instance.result_file:
+        return Response(
+            {"error": "object does not exist"}, status=status.HTTP_404_NOT_FOUND
+        )
+    return FileResponse(
+        instance.result_file.open("rb"),
+        as_attachment=True,
+        filename=f"charge_job_{instance.id}_result.csv",
+        content_type="text/csv",
+    )
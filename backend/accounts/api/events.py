@@ -0,0 +1,129 @@
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+from accounts import wallet_cache
+from accounts.api.wallet_summary import build_summary
+from accounts.throttling import get_account_limits
+from core import events
+
+BALANCE_FIELDS = ("balance", "held_balance", "updated")
+
+
+def _sse(name, data):
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+
+@sync_to_async
+def _authenticate(request):
+    try:
+        result = TokenAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return None
+    return result[0] if result else None
+
+
+@sync_to_async
+def _account_of(user, requested):
+    if user.is_staff:
+        return requested
+    return get_account_limits(user.id)[0]
+
+
+@sync_to_async
+def _balance(account_id, invalidate):
+    if invalidate:
+        wallet_cache.invalidate(account_id)
+    etag, summary = wallet_cache.get_summary(account_id, build_summary)
+    if summary is None:
+        return None
+    return {"account": account_id, **{name: summary[name] for name in BALANCE_FIELDS}}
+
+
+async def _stream(account_id, subscription):
+    """
+    The balance first and whenever it changed, at most every
+    ``EVENTS_BALANCE_INTERVAL`` seconds, and every deposit status change.
+    """
+    interval = settings.EVENTS_BALANCE_INTERVAL
+    keepalive = settings.EVENTS_KEEPALIVE_SECONDS
+    try:
+        balance = await _balance(account_id, invalidate=False)
+        yield _sse("balance", balance)
+        sent_at = time.monotonic()
+        # When the balance is due to be read again, and whether this process
+        # may still have it cached from before the commit of another one
+        due = remote = None
+        while True:
+            now = time.monotonic()
+            if due is not None and now >= due:
+                current = await _balance(account_id, invalidate=remote)
+                if current != balance:
+                    balance = current
+                    yield _sse("balance", balance)
+                sent_at, due, remote = time.monotonic(), None, None
+                continue
+            event = await subscription.get(
+                keepalive if due is None else min(keepalive, due - now)
+            )
+            if event is None:
+                if due is None:
+                    yield ": keepalive\n\n"
+            elif event is events.LAGGED or event["type"] == "wallet":
+                if due is None:
+                    due = max(now, sent_at + interval)
+                remote = (
+                    remote or event is events.LAGGED or event["origin"] != events.ORIGIN
+                )
+            elif event["type"] == "deposit":
+                yield _sse(
+                    "deposit",
+                    {
+                        name: event[name]
+                        for name in ("id", "account", "amount", "status")
+                    },
+                )
+    finally:
+        subscription.close()
+
+
+async def wallet_events(request):
+    """
+    Server-sent events of the wallet of the caller's provider account:
+    ``balance`` with the balance when it changed and ``deposit`` with the
+    deposit requests that were created, approved or rejected. Staff pick the
+    account with ``?provider_account=``. Only served by the ASGI application,
+    one stream replaces polling the balance and the deposits.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {"error": "Events are only served by the ASGI application."}, status=501
+        )
+    user = await _authenticate(request)
+    if user is None:
+        return JsonResponse(
+            {"detail": "Authentication credentials were not provided."}, status=401
+        )
+    try:
+        requested = int(request.GET.get("provider_account", 0)) or None
+    except ValueError:
+        requested = None
+    account_id = await _account_of(user, requested)
+    if account_id is None or await _balance(account_id, invalidate=False) is None:
+        return JsonResponse({"error": "object does not exist"}, status=404)
+
+    events.get_backend().start()
+    subscription = events.broker.subscribe([wallet_cache.account_channel(account_id)])
+    response = StreamingHttpResponse(
+        _stream(account_id, subscription), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    # Keeps nginx from buffering the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -6,6 +6,7 @@ from rest_framework.decorators import (
     api_view,
     permission_classes,
     authentication_classes,
+    throttle_classes,
 )
 from rest_framework.response import Response
 from rest_framework import status
@@ -13,7 +14,12 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.authentication import TokenAuthentication
 
 from drf_spectacular.utils import extend_schema
-from accounts.serializers.request_charge import RequestChargeCreateSerializer,RequestChargeDetailSerializer
+from accounts.throttling import ChargeRateThrottle
+from accounts.serializers.request_charge import (
+    RequestChargeCreateSerializer,
+    RequestChargeDetailSerializer,
+    RequestChargeDetailValuesSerializer,
+)
 
 
 @extend_schema(
@@ -23,12 +29,14 @@ from accounts.serializers.request_charge import RequestChargeCreateSerializer,Re
         201: RequestChargeDetailSerializer,
         400: {"description": "Bad Request"},
         403: {"description": "user dont have permission"},
+        429: {"description": "Too many requests"},
     },
     methods=["POST"],
 )
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 @authentication_classes([TokenAuthentication])
+@throttle_classes([ChargeRateThrottle])
 def request_charge_api_view(request):
 
     serializer = RequestChargeCreateSerializer(
@@ -36,4 +44,7 @@ def request_charge_api_view(request):
     )
     serializer.is_valid(raise_exception=True)
     instance = serializer.save()
-    return Response(RequestChargeDetailSerializer(instance).data, status=status.HTTP_201_CREATED)
+    return Response(
+        RequestChargeDetailValuesSerializer(instance).data,
+        status=status.HTTP_201_CREATED,
+    )
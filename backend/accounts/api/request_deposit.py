@@ -1,4 +1,4 @@
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
@@ -6,15 +6,21 @@ from rest_framework.permissions import IsAuthenticated
 
 from drf_spectacular.utils import extend_schema
 
+from accounts.throttling import DepositRateThrottle
+from core import conditional
+from core.db_router import replica_safe
+
 
 from accounts.models import RequestDeposit,ProviderAccountTeamMember
 from accounts.serializers import (
     RequestDepositCreateSerializer,
     RequestDepositDetailSerializer,
     RequestDepositSerializer,
+    RequestDepositDetailValuesSerializer,
 )
 
 
+@replica_safe
 @extend_schema(
     summary="Create a Deposit Request for an account",
     request=RequestDepositCreateSerializer,
@@ -22,6 +28,7 @@ from accounts.serializers import (
         201: RequestDepositDetailSerializer,
         400: {"description": "Bad Request"},
         403: {"description": "user dont have permission"},
+        429: {"description": "Too many requests"},
     },
 )
 @extend_schema(
@@ -29,29 +36,45 @@ from accounts.serializers import (
     methods=["GET"],
     responses={
         200: RequestDepositSerializer(many=True),
+        304: {"description": "Not modified"},
         400: {"description": "Bad Request"},
         403: {"description": "user dont have permission"},
     },
 )
 @api_view(["GET", "POST"])
 @permission_classes([IsAuthenticated])
+@throttle_classes([DepositRateThrottle])
 def request_deposit_list_create(request):
     """
     API View for listing all deposit requests or creating a new one.
     """
     if request.method == "GET":
         queryset = RequestDeposit.objects.all()
-        if request.user.is_admin:
-            queryset=queryset
-        elif request.user.tame.permission_level == ProviderAccountTeamMember.PermissionLevel.ADMIN:
-            queryset = queryset.filter(account=request.user.team.account)
-        elif request.user.tame.permission_level == ProviderAccountTeamMember.PermissionLevel.STAFF:
+        team = getattr(request.user, "team", None)
+        if request.user.is_staff:
+            pass
+        elif team and team.permission_level == ProviderAccountTeamMember.PermissionLevel.ADMIN:
+            queryset = queryset.filter(account_id=team.account_id)
+        elif team and team.permission_level == ProviderAccountTeamMember.PermissionLevel.STAFF:
             queryset = queryset.filter(user_id=request.user.id)
         else:
-            queryset= queryset.none
+            queryset = queryset.none()
         deposit_requests = queryset.order_by("-created")
-        serializer = RequestDepositDetailSerializer(deposit_requests, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        # The query string tells apart the pages and filters of the list
+        key = f"{request.user.id}:{request.META.get('QUERY_STRING', '')}"
+        if conditional.is_conditional(request):
+            response = conditional.not_modified(
+                request,
+                *conditional.list_validators_of_queryset(deposit_requests, key),
+            )
+            if response is not None:
+                return response
+        rows = list(RequestDepositDetailValuesSerializer.values(deposit_requests))
+        serializer = RequestDepositDetailValuesSerializer(rows, many=True)
+        return conditional.set_validators(
+            Response(serializer.data, status=status.HTTP_200_OK),
+            *conditional.list_validators_of_rows(rows, key),
+        )
 
     elif request.method == "POST":
         serializer = RequestDepositCreateSerializer(
@@ -60,29 +83,43 @@ def request_deposit_list_create(request):
         serializer.is_valid(raise_exception=True)
         instance = serializer.save()
         return Response(
-            RequestDepositDetailSerializer(instance).data,
+            RequestDepositDetailValuesSerializer(instance).data,
             status=status.HTTP_201_CREATED,
         )
 
 
+@replica_safe
 @extend_schema(
     summary="Get Detail of existing Deposit Request",
     methods=["GET"],
     responses={
         200: RequestDepositDetailSerializer,
+        304: {"description": "Not modified"},
         404: {"description": "Objects Not Found"},
     },
 )
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def request_deposit_detail(request, pk):
+    deposit = RequestDeposit.objects.filter(id=pk)
+    if conditional.is_conditional(request):
+        # Answered without loading the row and its related objects
+        version = deposit.values("id", "updated").first()
+        if version is not None:
+            response = conditional.not_modified(
+                request, *conditional.row_validators(version["id"], version["updated"])
+            )
+            if response is not None:
+                return response
 
-    try:
-        instance = RequestDeposit.objects.get(id=pk)
-    except RequestDeposit.DoesNotExist:
+    row = RequestDepositDetailValuesSerializer.values(deposit).first()
+    if row is None:
         return Response(
             {"error": "object does not exist"}, status=status.HTTP_404_NOT_FOUND
         )
 
-    serializer = RequestDepositDetailSerializer(instance)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    serializer = RequestDepositDetailValuesSerializer(row)
+    return conditional.set_validators(
+        Response(serializer.data, status=status.HTTP_200_OK),
+        *conditional.row_validators(row["id"], row["updated"]),
+    )
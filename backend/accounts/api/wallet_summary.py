@@ -0,0 +1,90 @@
+from django.conf import settings
+from django.db.models import Count, Sum
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework import status
+
+from drf_spectacular.utils import extend_schema
+
+from accounts import wallet_cache
+from accounts.models import ProviderWallet, RequestCharge, RequestDeposit
+from accounts.serializers import (
+    WalletChargeValuesSerializer,
+    WalletDepositValuesSerializer,
+    WalletSummarySerializer,
+    WalletValuesSerializer,
+)
+from accounts.throttling import get_account_limits
+from core import conditional
+from core.db_router import replica_safe
+
+
+def build_summary(account_id):
+    wallet = WalletValuesSerializer.values(
+        ProviderWallet.objects.filter(account_id=account_id)
+    ).first()
+    if wallet is None:
+        return None
+    rows = settings.WALLET_SUMMARY_RECENT_ROWS
+    pending = RequestDeposit.objects.filter(
+        account_id=account_id, status=RequestDeposit.Status.OPEN
+    ).aggregate(count=Count("id"), amount=Sum("amount"))
+    charges = RequestCharge.objects.filter(provider_account_id=account_id)
+    deposits = RequestDeposit.objects.filter(account_id=account_id)
+    return {
+        "provider_account": account_id,
+        **WalletValuesSerializer(wallet).data,
+        "pending_deposits": {
+            "count": pending["count"],
+            "amount": pending["amount"] or 0,
+        },
+        "recent_charges": WalletChargeValuesSerializer(
+            charges.order_by("-id")[:rows], many=True
+        ).data,
+        "recent_deposits": WalletDepositValuesSerializer(
+            deposits.order_by("-id")[:rows], many=True
+        ).data,
+    }
+
+
+@replica_safe
+@extend_schema(
+    summary="Balance and recent activity of a provider wallet",
+    description=(
+        "Served from a cache of a few seconds. Send the ETag back as "
+        "If-None-Match to get 304 while nothing changed."
+    ),
+    responses={
+        200: WalletSummarySerializer,
+        304: {"description": "Not modified"},
+        404: {"description": "Objects Not Found"},
+    },
+)
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def wallet_summary(request, provider_account_id):
+    # Members of any level may read it, their account is cached per process
+    if not (
+        request.user.is_staff
+        or get_account_limits(request.user.id)[0] == provider_account_id
+    ):
+        return Response(
+            {"error": "object does not exist"}, status=status.HTTP_404_NOT_FOUND
+        )
+
+    # A fresh cached ETag answers If-None-Match without reading the wallet
+    etag = wallet_cache.get_etag(provider_account_id)
+    if etag is not None and (response := conditional.not_modified(request, etag, None)):
+        return response
+
+    etag, summary = wallet_cache.get_summary(provider_account_id, build_summary)
+    if summary is None:
+        return Response(
+            {"error": "object does not exist"}, status=status.HTTP_404_NOT_FOUND
+        )
+    if response := conditional.not_modified(request, etag, None):
+        return response
+    return conditional.set_validators(
+        Response(summary, status=status.HTTP_200_OK), etag, None
+    )
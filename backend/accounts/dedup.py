@@ -0,0 +1,100 @@
+"""
+Suppression of duplicate charges: the same phone number charged the same
+amount by the same account again within ``CHARGE_DEDUP_WINDOW_SECONDS``.
+
+Each process remembers the charges it accepted in a sliding window, so a
+client repeating itself to the same process is rejected without a query.
+Otherwise the ChargeFingerprint table decides, its unique key makes the
+first of concurrent duplicates win in every process. Both checks run before
+the charge queues for the wallet lock. A charge that fails gives its claim
+back, so that it can be retried at once.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from accounts.models import ChargeFingerprint
+from core import metrics
+
+SUPPRESSED = metrics.counter(
+    "charge_duplicates_suppressed_total",
+    "Charges rejected as duplicates, by the check that caught them.",
+)
+
+_lock = threading.Lock()
+_recent = {}  # key -> expires at, in insertion order
+
+
+class DuplicateChargeError(ValueError):
+    def __init__(self):
+        super().__init__("Duplicate charge, the same charge was requested moments ago.")
+
+
+def _seen(key, now):
+    with _lock:
+        # Entries share one window, so the oldest expire first
+        while _recent:
+            oldest = next(iter(_recent))
+            if _recent[oldest] > now and len(_recent) <= settings.CHARGE_DEDUP_MAX_KEYS:
+                break
+            del _recent[oldest]
+        return key in _recent
+
+
+def _remember(key, expires_at):
+    with _lock:
+        _recent[key] = expires_at
+
+
+def _forget(key):
+    with _lock:
+        _recent.pop(key, None)
+
+
+def claim_charge(provider_account_id, phone_number_id, amount):
+    """
+    Reject the charge if it duplicates a recent one, else claim it. Returns
+    the claim to give back with ``release_charge`` should the charge fail.
+    """
+    window = settings.CHARGE_DEDUP_WINDOW_SECONDS
+    if not window:
+        return None
+    key = f"{provider_account_id}:{phone_number_id}:{amount}"
+    if _seen(key, time.monotonic()):
+        SUPPRESSED.inc(check="memory")
+        raise DuplicateChargeError()
+    expires_at = timezone.now() + timedelta(seconds=window)
+    if not ChargeFingerprint.claim(key, expires_at):
+        SUPPRESSED.inc(check="database")
+        raise DuplicateChargeError()
+    _remember(key, time.monotonic() + window)
+    return key, expires_at
+
+
+def release_charge(claim):
+    if claim is None:
+        return
+    key, expires_at = claim
+    _forget(key)
+    ChargeFingerprint.release(key, expires_at)
+
+
+@contextmanager
+def charge_dedup(provider_account_id, phone_number_id, amount):
+    """Claim the charge for the block, giving the claim back if it raises."""
+    claim = claim_charge(provider_account_id, phone_number_id, amount)
+    try:
+        yield
+    except BaseException:
+        release_charge(claim)
+        raise
+
+
+def clear():
+    with _lock:
+        _recent.clear()
@@ -0,0 +1,306 @@
+"""
+Delivers recorded charges to the mobile operators.
+
+Rows are claimed from the ChargeDelivery outbox in a short transaction, sent
+with an asyncio HTTP client outside of any transaction, and the outcome is
+stored afterwards. Charges that can not be delivered are refunded.
+
+The claim leases the rows for as long as the batch can take. An outcome is
+only stored while the row is still held by the claim that sent it, so a
+worker that overran its lease can not undo or refund the delivery of the
+worker that took its rows over.
+"""
+
+import asyncio
+import logging
+import math
+import random
+from collections import Counter
+from dataclasses import dataclass
+from datetime import timedelta
+
+import httpx
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from accounts.models import (
+    ChargeDelivery,
+    ChargeRefund,
+    ProviderWallet,
+    RequestCharge,
+    SpendCounter,
+)
+from core import metrics
+
+logger = logging.getLogger("accounts")
+
+DELIVERIES = metrics.counter(
+    "charge_deliveries_total", "Delivery attempts by operator and outcome."
+)
+DELIVERY_SECONDS = metrics.histogram(
+    "charge_delivery_seconds", "Latency of top-up requests to the operators."
+)
+
+DELIVERED = "delivered"
+RETRY = "retry"
+REJECTED = "rejected"
+
+
+@dataclass
+class Delivery:
+    id: int
+    charge_id: int
+    provider_account_id: int
+    operator: str
+    number: str
+    amount: int
+    attempts: int
+
+
+@dataclass
+class DeliveryResult:
+    delivery: Delivery
+    outcome: str
+    detail: str = ""
+
+
+class ChargeDispatcher:
+    def __init__(self, batch_size=None, transport=None):
+        self.batch_size = batch_size or settings.TOPUP_DISPATCH_BATCH_SIZE
+        self.transport = transport
+
+    def claim_batch(self):
+        now = timezone.now()
+        with transaction.atomic():
+            rows = list(
+                ChargeDelivery.objects.select_for_update(skip_locked=True)
+                .filter(
+                    status__in=[
+                        ChargeDelivery.Status.PENDING,
+                        ChargeDelivery.Status.IN_FLIGHT,
+                    ],
+                    next_attempt_at__lte=now,
+                )
+                .order_by("next_attempt_at")
+                .values_list(
+                    "id",
+                    "charge_id",
+                    "charge__provider_account_id",
+                    "operator",
+                    "charge__phone_number__number",
+                    "charge__amount",
+                    "attempts",
+                )[: self.batch_size]
+            )
+            if not rows:
+                return []
+            # In flight rows whose worker died are picked up again after the lease
+            ChargeDelivery.objects.filter(id__in=[row[0] for row in rows]).update(
+                status=ChargeDelivery.Status.IN_FLIGHT,
+                attempts=F("attempts") + 1,
+                next_attempt_at=now
+                + timedelta(seconds=self.lease_seconds(row[3] for row in rows)),
+                updated=now,
+            )
+        return [Delivery(*row[:-1], attempts=row[-1] + 1) for row in rows]
+
+    @staticmethod
+    def lease_seconds(operators):
+        """
+        Longest time a batch of deliveries to ``operators`` can take, every
+        operator sending ``concurrency`` requests of at most
+        ``TOPUP_REQUEST_TIMEOUT`` at a time, plus the lease as margin.
+        """
+        rounds = max(
+            (
+                math.ceil(count / settings.TOPUP_OPERATORS[name]["concurrency"])
+                for name, count in Counter(operators).items()
+                if name in settings.TOPUP_OPERATORS
+            ),
+            default=0,
+        )
+        return (
+            settings.TOPUP_DELIVERY_LEASE_SECONDS
+            + rounds * settings.TOPUP_REQUEST_TIMEOUT
+        )
+
+    async def send_batch(self, deliveries):
+        semaphores = {
+            name: asyncio.Semaphore(operator["concurrency"])
+            for name, operator in settings.TOPUP_OPERATORS.items()
+        }
+        limits = httpx.Limits(
+            max_connections=sum(
+                operator["concurrency"]
+                for operator in settings.TOPUP_OPERATORS.values()
+            )
+        )
+        async with httpx.AsyncClient(
+            transport=self.transport,
+            limits=limits,
+            timeout=settings.TOPUP_REQUEST_TIMEOUT,
+        ) as client:
+            results = await asyncio.gather(
+                *(
+                    self._send(client, semaphores.get(delivery.operator), delivery)
+                    for delivery in deliveries
+                ),
+                return_exceptions=True,
+            )
+        # One broken delivery must not lose the outcome of the others, it is
+        # sent again with the same reference
+        return [
+            (
+                DeliveryResult(delivery, RETRY, f"{type(result).__name__}: {result}")
+                if isinstance(result, BaseException)
+                else result
+            )
+            for delivery, result in zip(deliveries, results)
+        ]
+
+    async def _send(self, client, semaphore, delivery):
+        operator = settings.TOPUP_OPERATORS.get(delivery.operator)
+        if operator is None:
+            # Removed from the settings after the charge was recorded
+            result = DeliveryResult(
+                delivery, REJECTED, f"Unknown operator {delivery.operator}"
+            )
+            DELIVERIES.inc(operator=delivery.operator, outcome=result.outcome)
+            return result
+        async with semaphore:
+            started = asyncio.get_running_loop().time()
+            try:
+                # Bounds the whole request, the client timeout bounds each phase
+                response = await asyncio.wait_for(
+                    client.post(
+                        operator["url"],
+                        json={
+                            "reference": f"charge-{delivery.charge_id}",
+                            "phone_number": delivery.number,
+                            "amount": delivery.amount,
+                        },
+                    ),
+                    settings.TOPUP_REQUEST_TIMEOUT,
+                )
+            except (httpx.HTTPError, TimeoutError) as e:
+                result = DeliveryResult(delivery, RETRY, f"{type(e).__name__}: {e}")
+            else:
+                if response.is_success:
+                    result = DeliveryResult(
+                        delivery, DELIVERED, self.operator_reference(response)
+                    )
+                elif response.status_code in (408, 429) or response.status_code >= 500:
+                    result = DeliveryResult(
+                        delivery, RETRY, f"HTTP {response.status_code}"
+                    )
+                else:
+                    result = DeliveryResult(
+                        delivery,
+                        REJECTED,
+                        f"HTTP {response.status_code}: {response.text}",
+                    )
+            DELIVERY_SECONDS.observe(
+                asyncio.get_running_loop().time() - started, operator=delivery.operator
+            )
+        DELIVERIES.inc(operator=delivery.operator, outcome=result.outcome)
+        return result
+
+    @staticmethod
+    def operator_reference(response):
+        """Reference in a successful answer, the top-up is done without one too."""
+        try:
+            body = response.json()
+        except ValueError:
+            return ""
+        return str(body.get("reference", "")) if isinstance(body, dict) else ""
+
+    def record_results(self, results):
+        now = timezone.now()
+        for result in results:
+            delivery = result.delivery
+            if result.outcome == DELIVERED:
+                stored = self.claimed(delivery).update(
+                    status=ChargeDelivery.Status.DELIVERED,
+                    delivered_at=now,
+                    operator_reference=result.detail[:100],
+                    last_error="",
+                    updated=now,
+                )
+            elif (
+                result.outcome == RETRY
+                and delivery.attempts < settings.TOPUP_MAX_ATTEMPTS
+            ):
+                stored = self.claimed(delivery).update(
+                    status=ChargeDelivery.Status.PENDING,
+                    next_attempt_at=now + self.backoff(delivery.attempts),
+                    last_error=result.detail,
+                    updated=now,
+                )
+            else:
+                stored = self.refund(result)
+            if not stored:
+                logger.warning(
+                    f"Delivery {delivery.id} was taken over by another worker, "
+                    f"outcome {result.outcome} of attempt {delivery.attempts} dropped"
+                )
+
+    @staticmethod
+    def claimed(delivery):
+        """The row of ``delivery`` while it is still held by the claim that sent it."""
+        return ChargeDelivery.objects.filter(
+            id=delivery.id,
+            status=ChargeDelivery.Status.IN_FLIGHT,
+            attempts=delivery.attempts,
+        )
+
+    @staticmethod
+    def backoff(attempts):
+        delay = min(
+            settings.TOPUP_RETRY_BASE_DELAY * 2 ** (attempts - 1),
+            settings.TOPUP_RETRY_MAX_DELAY,
+        )
+        return timedelta(seconds=random.uniform(delay / 2, delay))
+
+    @classmethod
+    def refund(cls, result):
+        """Fail the delivery and refund its charge, False when it was taken over."""
+        delivery = result.delivery
+        with transaction.atomic():
+            updated = cls.claimed(delivery).update(
+                status=ChargeDelivery.Status.FAILED,
+                last_error=result.detail,
+                updated=timezone.now(),
+            )
+            if not updated:
+                return False
+            ChargeRefund.objects.create(
+                charge_id=delivery.charge_id,
+                provider_account_id=delivery.provider_account_id,
+                amount=delivery.amount,
+                reason=result.detail,
+            )
+            ProviderWallet.deposit(
+                account_id=delivery.provider_account_id, amount=delivery.amount
+            )
+            requester_id, created = RequestCharge.objects.values_list(
+                "requester_id", "created"
+            ).get(id=delivery.charge_id)
+            SpendCounter.refund(
+                delivery.provider_account_id,
+                requester_id,
+                timezone.localdate(created),
+                delivery.amount,
+            )
+        logger.warning(
+            f"Charge {delivery.charge_id} refunded after {delivery.attempts} attempts: "
+            f"{result.detail}"
+        )
+        return True
+
+    def run_once(self):
+        deliveries = self.claim_batch()
+        if deliveries:
+            self.record_results(asyncio.run(self.send_batch(deliveries)))
+        return len(deliveries)
@@ -0,0 +1,158 @@
+"""
+Wire formats of the batch charge ingest endpoint.
+
+Requests carry ``(phone number, amount, idempotency key)`` items, responses
+one ``(index, charge id, error)`` result per item, in the request format:
+
+* ``application/msgpack``: a stream of msgpack arrays, one per item. The
+  charge id is nil for rejected items and the error nil for charged ones.
+* ``application/x-tabdeal-frames``: length prefixed frames. Every frame is
+  an unsigned 16 bit big endian payload length followed by the payload.
+  Item payload: phone number length (1 byte), phone number (ASCII), amount
+  (unsigned 64 bit), idempotency key (ASCII, rest of the frame).
+  Result payload: index (unsigned 32 bit), charge id (unsigned 64 bit, 0 for
+  rejected items), error (UTF-8, rest of the frame).
+"""
+
+import io
+import struct
+
+import msgpack
+
+
+class IngestError(ValueError):
+    pass
+
+
+class MsgpackCodec:
+    content_type = "application/msgpack"
+
+    def __init__(self):
+        self._packer = msgpack.Packer()
+
+    def decode(self, stream, max_items, chunk_size=65536):
+        unpacker = msgpack.Unpacker(use_list=False, raw=False)
+        items = []
+        received = decoded = 0
+        while chunk := stream.read(chunk_size):
+            unpacker.feed(chunk)
+            received += len(chunk)
+            try:
+                for item in unpacker:
+                    items.append(self._check_item(item, len(items)))
+                    if len(items) > max_items:
+                        raise IngestError(f"More than {max_items} items.")
+                    decoded = unpacker.tell()
+            except msgpack.UnpackException as e:
+                raise IngestError(f"Invalid msgpack: {e}")
+        if decoded != received:
+            raise IngestError("Truncated msgpack item.")
+        return items
+
+    @staticmethod
+    def _check_item(item, index):
+        if (
+            not isinstance(item, tuple)
+            or len(item) != 3
+            or not isinstance(item[0], str)
+            or not isinstance(item[1], int)
+            or not isinstance(item[2], str)
+        ):
+            raise IngestError(f"Item {index} is malformed.")
+        return item
+
+    def encode(self, index, charge_id, error):
+        return self._packer.pack((index, charge_id, error))
+
+    # Client side, used by the load test and tests
+
+    def encode_item(self, number, amount, key):
+        return self._packer.pack((number, amount, key))
+
+    def decode_results(self, data):
+        return list(msgpack.Unpacker(io.BytesIO(data), use_list=False, raw=False))
+
+
+class FrameCodec:
+    content_type = "application/x-tabdeal-frames"
+
+    LENGTH = struct.Struct("!H")
+    AMOUNT = struct.Struct("!Q")
+    RESULT = struct.Struct("!IQ")
+
+    def decode(self, stream, max_items, chunk_size=65536):
+        items = []
+        buffer = bytearray()
+        offset = 0
+        while chunk := stream.read(chunk_size):
+            # Drop the consumed frames before growing the buffer
+            del buffer[:offset]
+            buffer += chunk
+            view = memoryview(buffer)
+            offset = 0
+            try:
+                while offset + 2 <= len(buffer):
+                    (length,) = self.LENGTH.unpack_from(view, offset)
+                    end = offset + 2 + length
+                    if end > len(buffer):
+                        break
+                    items.append(self._decode_item(view, offset + 2, end))
+                    if len(items) > max_items:
+                        raise IngestError(f"More than {max_items} items.")
+                    offset = end
+            finally:
+                view.release()
+        if offset != len(buffer):
+            raise IngestError("Truncated frame.")
+        return items
+
+    def _decode_item(self, view, start, end):
+        try:
+            number_end = start + 1 + view[start]
+            (amount,) = self.AMOUNT.unpack_from(view, number_end)
+            key_start = number_end + self.AMOUNT.size
+            if key_start > end:
+                raise ValueError
+            return (
+                str(view[start + 1 : number_end], "ascii"),
+                amount,
+                str(view[key_start:end], "ascii"),
+            )
+        except (IndexError, ValueError, struct.error):
+            raise IngestError("Malformed frame.")
+
+    def encode(self, index, charge_id, error):
+        message = error.encode() if error else b""
+        return (
+            self.LENGTH.pack(self.RESULT.size + len(message))
+            + self.RESULT.pack(index, charge_id or 0)
+            + message
+        )
+
+    def encode_item(self, number, amount, key):
+        number, key = number.encode("ascii"), key.encode("ascii")
+        payload = bytes((len(number),)) + number + self.AMOUNT.pack(amount) + key
+        return self.LENGTH.pack(len(payload)) + payload
+
+    def decode_results(self, data):
+        results = []
+        view = memoryview(data)
+        offset = 0
+        while offset < len(data):
+            (length,) = self.LENGTH.unpack_from(view, offset)
+            index, charge_id = self.RESULT.unpack_from(view, offset + 2)
+            error = str(
+                view[offset + 2 + self.RESULT.size : offset + 2 + length], "utf-8"
+            )
+            results.append((index, charge_id or None, error or None))
+            offset += 2 + length
+        return results
+
+
+CODECS = {codec.content_type: codec for codec in (MsgpackCodec, FrameCodec)}
+CODECS["application/x-msgpack"] = MsgpackCodec
+
+
+def get_codec(content_type):
+    codec = CODECS.get((content_type or "").split(";")[0].strip())
+    return codec() if codec else None
@@ -0,0 +1,102 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from accounts.models import (
+    ProviderAccount,
+    ProviderAccountTeamMember,
+    ProviderWallet,
+    RequestDeposit,
+)
+from accounts.serializers import (
+    RequestDepositDetailSerializer,
+    RequestDepositDetailValuesSerializer,
+)
+from core.renderers import ORJSONRenderer
+
+User = get_user_model()
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare rendering a deposit list with ModelSerializer and JSONRenderer "
+        "against values() rows and ORJSONRenderer, on throwaway rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=5000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def _create_rows(self, count):
+        assignee = User.objects.create(username="benchmark-assignee", is_staff=True)
+        user = User.objects.create(username="benchmark-requester")
+        account = ProviderAccount.objects.create(name="benchmark")
+        ProviderWallet.objects.create(account=account)
+        requester = ProviderAccountTeamMember.objects.create(
+            user=user,
+            account=account,
+            permission_level=ProviderAccountTeamMember.PermissionLevel.ADMIN,
+        )
+        RequestDeposit.objects.bulk_create(
+            RequestDeposit(
+                requester=requester,
+                user_id=user.id,
+                account=account,
+                assignee=assignee,
+                amount=index + 1,
+                comment="benchmark" if index % 2 else None,
+            )
+            for index in range(count)
+        )
+        return RequestDeposit.objects.filter(account=account).order_by("-created")
+
+    def _best_of(self, repeat, render):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            output = render()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, output
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                queryset = self._create_rows(options["rows"])
+                baseline, expected = self._best_of(
+                    options["repeat"],
+                    lambda: JSONRenderer().render(
+                        RequestDepositDetailSerializer(
+                            queryset.select_related(
+                                "requester__user", "account", "assignee"
+                            ),
+                            many=True,
+                        ).data
+                    ),
+                )
+                fast, output = self._best_of(
+                    options["repeat"],
+                    lambda: ORJSONRenderer().render(
+                        RequestDepositDetailValuesSerializer(queryset, many=True).data
+                    ),
+                )
+                raise Rollback
+        except Rollback:
+            pass
+
+        if output != expected:
+            raise CommandError("Outputs differ")
+        self.stdout.write(
+            f"{options['rows']} deposits, {len(output)} bytes, best of "
+            f"{options['repeat']}\n"
+            f"ModelSerializer + JSONRenderer: {baseline * 1000:.1f} ms\n"
+            f"values() + ORJSONRenderer:     {fast * 1000:.1f} ms\n"
+            f"speedup: {baseline / fast:.1f}x"
+        )
@@ -0,0 +1,40 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from accounts.dispatcher import ChargeDispatcher
+
+
+class Command(BaseCommand):
+    help = "Deliver recorded charges to the operators."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=settings.TOPUP_DISPATCH_BATCH_SIZE
+        )
+        parser.add_argument("--poll-interval", type=float, default=1.0)
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="exit when no delivery is due, then print the throughput",
+        )
+
+    def handle(self, *args, **options):
+        dispatcher = ChargeDispatcher(batch_size=options["batch_size"])
+        started = time.monotonic()
+        total = 0
+        while True:
+            sent = dispatcher.run_once()
+            total += sent
+            if sent:
+                continue
+            if options["once"]:
+                break
+            time.sleep(options["poll_interval"])
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f"Dispatched {total} deliveries in {elapsed:.2f}s "
+            f"({total / elapsed if elapsed else 0:.0f}/s)"
+        )
@@ -0,0 +1,419 @@
+import random
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from accounts.models import (
+    PhoneNumber,
+    ProviderAccount,
+    ProviderAccountTeamMember,
+    ProviderWallet,
+    RequestCharge,
+    RequestDeposit,
+)
+from core.utils import insert_rows
+
+User = get_user_model()
+
+CHARGE_AMOUNTS = [10000, 20000, 50000, 100000, 200000, 500000]
+CHARGE_WEIGHTS = [30, 30, 20, 12, 6, 2]
+DEPOSIT_STATUSES = ["approved", "rejected", "open"]
+DEPOSIT_WEIGHTS = [85, 5, 10]
+
+CHARGE_FIELDS = [
+    "created",
+    "updated",
+    "phone_number",
+    "provider_account",
+    "requester",
+    "user_id",
+    "amount",
+]
+DEPOSIT_FIELDS = [
+    "created",
+    "updated",
+    "requester",
+    "user_id",
+    "amount",
+    "account",
+    "assignee",
+    "comment",
+    "status",
+]
+
+# Filled in the parent before the pool forks, read by the workers
+_plan = {}
+
+
+def _init_worker():
+    django.setup()
+
+
+def _rng(seed, phase, chunk):
+    return random.Random(f"{seed}:{phase}:{chunk}")
+
+
+def _pick_account(rng, plan):
+    if plan["hot"] and rng.random() < plan["hot_share"]:
+        return rng.choice(plan["hot"])
+    return rng.choice(plan["accounts"])
+
+
+def _created(rng, plan):
+    return plan["now"] - timedelta(seconds=rng.random() * plan["days"] * 86400)
+
+
+def generate_phone_numbers(chunk, start, count):
+    PhoneNumber.objects.bulk_create(
+        [
+            PhoneNumber(number=f"09{_plan['phone_offset'] + index:09d}")
+            for index in range(start, start + count)
+        ],
+        ignore_conflicts=True,
+    )
+    connections.close_all()
+    return count
+
+
+def generate_charges(chunk, count):
+    plan = _plan
+    rng = _rng(plan["seed"], "charges", chunk)
+    phone_ids = plan["phone_ids"]
+    rows = []
+    for _ in range(count):
+        account_id = _pick_account(rng, plan)
+        requester_id, user_id = rng.choice(plan["chargers"][account_id])
+        created = _created(rng, plan)
+        rows.append(
+            (
+                created,
+                created,
+                phone_ids[rng.randrange(len(phone_ids))],
+                account_id,
+                requester_id,
+                user_id,
+                rng.choices(CHARGE_AMOUNTS, CHARGE_WEIGHTS)[0],
+            )
+        )
+    with transaction.atomic():
+        insert_rows(RequestCharge, CHARGE_FIELDS, rows)
+    connections.close_all()
+    return count
+
+
+def generate_deposits(chunk, count):
+    plan = _plan
+    rng = _rng(plan["seed"], "deposits", chunk)
+    rows = []
+    for _ in range(count):
+        account_id = _pick_account(rng, plan)
+        requester_id, user_id = plan["admins"][account_id]
+        created = _created(rng, plan)
+        status = rng.choices(DEPOSIT_STATUSES, DEPOSIT_WEIGHTS)[0]
+        updated = (
+            created
+            if status == "open"
+            else min(plan["now"], created + timedelta(hours=rng.random() * 48))
+        )
+        rows.append(
+            (
+                created,
+                updated,
+                requester_id,
+                user_id,
+                rng.randrange(10, 1000) * 100000,
+                account_id,
+                rng.choice(plan["assignees"]),
+                None,
+                status,
+            )
+        )
+    with transaction.atomic():
+        insert_rows(RequestDeposit, DEPOSIT_FIELDS, rows)
+    connections.close_all()
+    return count
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a production like dataset: providers with team members, phone "
+        "numbers, charges and deposits with their history, skewed towards a few "
+        "hot providers. The same seed always generates the same data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--prefix", default="gen", help="of generated usernames")
+        parser.add_argument("--providers", type=int, default=2000)
+        parser.add_argument("--members", type=int, default=3, help="per provider")
+        parser.add_argument("--staff", type=int, default=20, help="deposit assignees")
+        parser.add_argument("--phone-numbers", type=int, default=1_000_000)
+        parser.add_argument("--charges", type=int, default=5_000_000)
+        parser.add_argument("--deposits", type=int, default=200_000)
+        parser.add_argument("--hot-providers", type=int, default=10)
+        parser.add_argument(
+            "--hot-share",
+            type=float,
+            default=0.6,
+            help="share of charges and deposits of the hot providers",
+        )
+        parser.add_argument("--days", type=int, default=90, help="history span")
+        parser.add_argument("--chunk-size", type=int, default=20_000)
+        parser.add_argument("--workers", type=int, default=4)
+
+    def handle(self, *args, **options):
+        self.options = options
+        if User.objects.filter(username__startswith=f"{options['prefix']}-").exists():
+            raise CommandError(
+                f"Users prefixed {options['prefix']}- exist, pick another --prefix"
+            )
+        started = time.monotonic()
+        _plan.update(
+            seed=options["seed"],
+            now=timezone.now(),
+            days=options["days"],
+            hot_share=options["hot_share"],
+            # keeps the numbers of different seeds apart
+            phone_offset=options["seed"] % 100 * 10_000_000,
+        )
+
+        self._step("providers and team members", self._create_providers)
+        self._step("phone numbers", self._create_phone_numbers)
+        self._step("charges", self._create_charges)
+        self._step("deposits", self._create_deposits)
+        self._step("deposit history and wallet balances", self._settle)
+        self.stdout.write(f"Done in {time.monotonic() - started:.1f}s")
+
+    def _step(self, name, func):
+        started = time.monotonic()
+        self.stdout.write(f"Generating {name}...")
+        func()
+        self.stdout.write(f"  {time.monotonic() - started:.1f}s")
+
+    def _run_parallel(self, func, counts):
+        # The workers inherit _plan and must not share the parent connection
+        connections.close_all()
+        if self.options["workers"] <= 1:
+            return sum(func(chunk, *count) for chunk, count in enumerate(counts))
+        with ProcessPoolExecutor(
+            max_workers=self.options["workers"], initializer=_init_worker
+        ) as pool:
+            futures = [
+                pool.submit(func, chunk, *count) for chunk, count in enumerate(counts)
+            ]
+            return sum(future.result() for future in futures)
+
+    def _chunks(self, total):
+        size = self.options["chunk_size"]
+        return [(min(size, total - start),) for start in range(0, total, size)]
+
+    def _create_providers(self):
+        options = self.options
+        prefix = options["prefix"]
+        rng = _rng(options["seed"], "providers", 0)
+        with transaction.atomic():
+            User.objects.bulk_create(
+                [
+                    User(
+                        username=f"{prefix}-staff-{index}",
+                        is_staff=True,
+                        password="!",
+                    )
+                    for index in range(options["staff"])
+                ]
+                + [
+                    User(username=f"{prefix}-{account}-{member}", password="!")
+                    for account in range(options["providers"])
+                    for member in range(options["members"])
+                ]
+            )
+            users = dict(
+                User.objects.filter(username__startswith=f"{prefix}-").values_list(
+                    "username", "id"
+                )
+            )
+            ProviderAccount.objects.bulk_create(
+                [
+                    ProviderAccount(name=f"{prefix} provider {account}")
+                    for account in range(options["providers"])
+                ]
+            )
+            accounts = list(
+                ProviderAccount.objects.filter(
+                    name__startswith=f"{prefix} provider "
+                ).values_list("name", "id")
+            )
+            accounts.sort(key=lambda item: int(item[0].rsplit(" ", 1)[1]))
+            account_ids = [account_id for name, account_id in accounts]
+            ProviderWallet.objects.bulk_create(
+                [ProviderWallet(account_id=account_id) for account_id in account_ids]
+            )
+            # The first member is the admin, the others a mix of levels
+            levels = ["staff", "staff", "user"]
+            ProviderAccountTeamMember.objects.bulk_create(
+                [
+                    ProviderAccountTeamMember(
+                        user_id=users[f"{prefix}-{account}-{member}"],
+                        account_id=account_id,
+                        permission_level=(
+                            "admin" if member == 0 else rng.choice(levels)
+                        ),
+                    )
+                    for account, account_id in enumerate(account_ids)
+                    for member in range(options["members"])
+                ]
+            )
+
+        chargers = {account_id: [] for account_id in account_ids}
+        admins = {}
+        for member_id, user_id, account_id, level in (
+            ProviderAccountTeamMember.objects.filter(account_id__in=account_ids)
+            .order_by("id")
+            .values_list("id", "user_id", "account_id", "permission_level")
+        ):
+            if level in ("admin", "staff"):
+                chargers[account_id].append((member_id, user_id))
+            if level == "admin":
+                admins[account_id] = (member_id, user_id)
+        _plan.update(
+            accounts=account_ids,
+            hot=rng.sample(
+                account_ids, min(options["hot_providers"], len(account_ids))
+            ),
+            chargers=chargers,
+            admins=admins,
+            assignees=sorted(
+                user_id
+                for username, user_id in users.items()
+                if username.startswith(f"{prefix}-staff-")
+            ),
+        )
+
+    def _create_phone_numbers(self):
+        size = self.options["chunk_size"]
+        total = self.options["phone_numbers"]
+        self._run_parallel(
+            generate_phone_numbers,
+            [(start, min(size, total - start)) for start in range(0, total, size)],
+        )
+        first = f"09{_plan['phone_offset']:09d}"
+        last = f"09{_plan['phone_offset'] + total - 1:09d}"
+        # Ordered by number, so that an index always means the same number
+        _plan["phone_ids"] = array(
+            "q",
+            PhoneNumber.objects.filter(number__range=(first, last))
+            .order_by("number")
+            .values_list("id", flat=True)
+            .iterator(chunk_size=self.options["chunk_size"]),
+        )
+
+    def _create_charges(self):
+        if self.options["charges"] and not _plan["phone_ids"]:
+            raise CommandError("Charges need phone numbers")
+        self._run_parallel(generate_charges, self._chunks(self.options["charges"]))
+
+    def _create_deposits(self):
+        _plan["first_deposit_id"] = (
+            RequestDeposit.objects.order_by("-id").values_list("id", flat=True).first()
+            or 0
+        ) + 1
+        self._run_parallel(generate_deposits, self._chunks(self.options["deposits"]))
+
+    def _settle(self):
+        accounts = _plan["accounts"]
+        charged = dict(
+            RequestCharge.objects.filter(provider_account_id__in=accounts)
+            .values_list("provider_account_id")
+            .annotate(total=Sum("amount"))
+        )
+        deposited = dict(
+            RequestDeposit.objects.filter(account_id__in=accounts, status="approved")
+            .values_list("account_id")
+            .annotate(total=Sum("amount"))
+        )
+        # Top up the providers that charged more than they deposited
+        rng = _rng(_plan["seed"], "top-ups", 0)
+        top_ups = []
+        for account_id in accounts:
+            missing = charged.get(account_id, 0) - deposited.get(account_id, 0)
+            if missing > 0:
+                amount = missing + rng.randrange(1, 100) * 100000
+                deposited[account_id] = deposited.get(account_id, 0) + amount
+                requester_id, user_id = _plan["admins"][account_id]
+                created = _plan["now"] - timedelta(days=_plan["days"])
+                top_ups.append(
+                    (
+                        created,
+                        created,
+                        requester_id,
+                        user_id,
+                        amount,
+                        account_id,
+                        rng.choice(_plan["assignees"]),
+                        None,
+                        "approved",
+                    )
+                )
+
+        history = RequestDeposit.history.model
+        columns = [
+            "id",
+            "created",
+            "updated",
+            "user_id",
+            "amount",
+            "comment",
+            "status",
+            "requester_id",
+            "account_id",
+            "assignee_id",
+        ]
+        quote = connection.ops.quote_name
+        insert = (
+            f"INSERT INTO {quote(history._meta.db_table)} "
+            f"({', '.join(quote(c) for c in columns)}, history_date, "
+            "history_change_reason, history_type, history_user_id) "
+            f"SELECT {{select}} FROM {quote(RequestDeposit._meta.db_table)} "
+            "WHERE id >= %s{where}"
+        )
+        with transaction.atomic():
+            insert_rows(RequestDeposit, DEPOSIT_FIELDS, top_ups)
+            with connection.cursor() as cursor:
+                # Created as open by the requester...
+                cursor.execute(
+                    insert.format(
+                        select=(
+                            "id, created, created, user_id, amount, comment, 'open', "
+                            "requester_id, account_id, assignee_id, created, NULL, '+', "
+                            "user_id"
+                        ),
+                        where="",
+                    ),
+                    [_plan["first_deposit_id"]],
+                )
+                # ...then approved or rejected by the assignee
+                cursor.execute(
+                    insert.format(
+                        select=(
+                            "id, created, updated, user_id, amount, comment, status, "
+                            "requester_id, account_id, assignee_id, updated, NULL, '~', "
+                            "assignee_id"
+                        ),
+                        where=" AND status <> 'open'",
+                    ),
+                    [_plan["first_deposit_id"]],
+                )
+            wallets = list(ProviderWallet.objects.filter(account_id__in=accounts))
+            for wallet in wallets:
+                wallet.balance = deposited.get(wallet.account_id, 0) - charged.get(
+                    wallet.account_id, 0
+                )
+            ProviderWallet.objects.bulk_update(wallets, ["balance"], batch_size=1000)
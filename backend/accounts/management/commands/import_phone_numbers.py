@@ -0,0 +1,55 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import PhoneNumber
+from core.utils import iter_csv_column
+
+
+class Command(BaseCommand):
+    help = "Stream phone numbers from a csv file into the PhoneNumber table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="csv file path, or - to read from stdin")
+        parser.add_argument(
+            "--column", type=int, default=0, help="index of the number column"
+        )
+        parser.add_argument("--chunk-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] <= 0:
+            raise CommandError("--chunk-size must be positive.")
+
+        started = time.monotonic()
+
+        def report(stats):
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f"read={stats['read']} created={stats['created']} "
+                f"skipped={stats['skipped']} invalid={stats['invalid']} "
+                f"rate={stats['read'] / elapsed if elapsed else 0:.0f}/s"
+            )
+
+        if options["path"] == "-":
+            stats = self._import(sys.stdin, options, report)
+        else:
+            try:
+                with open(options["path"], newline="", encoding="utf-8") as stream:
+                    stats = self._import(stream, options, report)
+            except FileNotFoundError:
+                raise CommandError(f"File {options['path']} does not exist.")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {stats['created']} phone numbers "
+                f"({stats['skipped']} skipped, {stats['invalid']} invalid)."
+            )
+        )
+
+    def _import(self, stream, options, report):
+        return PhoneNumber.bulk_import(
+            iter_csv_column(stream, column=options["column"]),
+            chunk_size=options["chunk_size"],
+            on_progress=report,
+        )
@@ -0,0 +1,105 @@
+import asyncio
+import time
+import uuid
+
+import httpx
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.ingest import FrameCodec, MsgpackCodec
+
+FORMATS = {"msgpack": MsgpackCodec, "frames": FrameCodec}
+
+
+class Command(BaseCommand):
+    help = (
+        "Send charges to a running server through request_charge/ or the batch "
+        "ingest endpoint and print the throughput of each format. Raise the "
+        "charge rate limits of the account first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000/api/")
+        parser.add_argument("--token", required=True)
+        parser.add_argument("--provider-account", type=int, required=True)
+        parser.add_argument(
+            "--number", required=True, help="an active phone number to charge"
+        )
+        parser.add_argument("--amount", type=int, default=1)
+        parser.add_argument("--charges", type=int, default=10000)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument(
+            "--format",
+            action="append",
+            choices=["json", *FORMATS],
+            help="may be repeated, defaults to all formats",
+        )
+
+    def handle(self, *args, **options):
+        self.options = options
+        for name in options["format"] or ["json", *FORMATS]:
+            started = time.perf_counter()
+            charged, failed = asyncio.run(self._run(name))
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"{name:8} {charged} charged, {failed} rejected in {elapsed:.2f}s "
+                f"({(charged + failed) / elapsed:.0f} charges/s)"
+            )
+
+    async def _run(self, name):
+        options = self.options
+        base_url = options["url"].rstrip("/")
+        headers = {"Authorization": f"Token {options['token']}"}
+        semaphore = asyncio.Semaphore(options["concurrency"])
+        async with httpx.AsyncClient(
+            headers=headers,
+            timeout=None,
+            limits=httpx.Limits(max_connections=options["concurrency"]),
+        ) as client:
+            if name == "json":
+                sends = [
+                    self._send_json(client, semaphore, f"{base_url}/request_charge/")
+                    for _ in range(options["charges"])
+                ]
+            else:
+                url = f"{base_url}/charge_batches/{options['provider_account']}/"
+                sizes = [options["batch_size"]] * (
+                    options["charges"] // options["batch_size"]
+                )
+                if options["charges"] % options["batch_size"]:
+                    sizes.append(options["charges"] % options["batch_size"])
+                sends = [
+                    self._send_batch(client, semaphore, url, FORMATS[name](), size)
+                    for size in sizes
+                ]
+            results = await asyncio.gather(*sends)
+        return sum(ok for ok, failed in results), sum(failed for ok, failed in results)
+
+    async def _send_json(self, client, semaphore, url):
+        async with semaphore:
+            response = await client.post(
+                url,
+                json={
+                    "phone_number": self.options["number"],
+                    "provider_account": self.options["provider_account"],
+                    "amount": self.options["amount"],
+                },
+            )
+        return (1, 0) if response.status_code == 201 else (0, 1)
+
+    async def _send_batch(self, client, semaphore, url, codec, size):
+        body = b"".join(
+            codec.encode_item(
+                self.options["number"], self.options["amount"], uuid.uuid4().hex
+            )
+            for _ in range(size)
+        )
+        async with semaphore:
+            response = await client.post(
+                url, content=body, headers={"Content-Type": codec.content_type}
+            )
+        if response.status_code != 200:
+            raise CommandError(f"{url}: {response.status_code} {response.text}")
+        results = codec.decode_results(response.content)
+        charged = sum(1 for index, charge_id, error in results if charge_id)
+        return charged, len(results) - charged
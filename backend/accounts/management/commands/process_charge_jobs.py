@@ -0,0 +1,42 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from accounts.models import ChargeJob
+
+
+class Command(BaseCommand):
+    help = "Process uploaded charge jobs in the background."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size", type=int, default=settings.CHARGE_JOB_CHUNK_SIZE
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=2.0,
+            help="seconds to sleep when there is no pending job",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="exit when there are no more pending jobs",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            job = ChargeJob.claim_next()
+            if job is None:
+                if options["once"]:
+                    return
+                time.sleep(options["poll_interval"])
+                continue
+
+            self.stdout.write(f"Processing charge job {job.id} ({job.total_rows} rows)")
+            job.process(chunk_size=options["chunk_size"])
+            self.stdout.write(
+                f"Charge job {job.id} {job.status}: "
+                f"{job.succeeded_rows} succeeded, {job.failed_rows} failed"
+            )
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import ChargeFingerprint
+
+
+class Command(BaseCommand):
+    help = "Delete the charge fingerprints whose dedup window is over, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        total = 0
+        while pruned := ChargeFingerprint.prune(options["batch_size"]):
+            total += pruned
+        self.stdout.write(f"Deleted {total} charge fingerprints")
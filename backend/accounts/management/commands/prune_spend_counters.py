@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import SpendCounter
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete the spend counters of windows that started more than "
+        "SPEND_COUNTER_RETENTION_DAYS ago, in batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        total = 0
+        while pruned := SpendCounter.prune(options["batch_size"]):
+            total += pruned
+        self.stdout.write(f"Deleted {total} spend counters")
@@ -0,0 +1,100 @@
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from accounts.models import ProviderWallet, WalletCheckpoint
+from core.utils import chunked
+
+
+def _init_worker():
+    django.setup()
+
+
+def reconcile_batch(account_ids, settle_seconds):
+    results = []
+    for account_id in account_ids:
+        try:
+            results.append(WalletCheckpoint.reconcile(account_id, settle_seconds))
+        except Exception as e:
+            results.append({"account_id": account_id, "error": str(e)})
+    connections.close_all()
+    return results
+
+
+class Command(BaseCommand):
+    help = (
+        "Check that every wallet balance equals approved deposits minus charges, "
+        "reading only ledger rows created since the previous run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--settle-seconds",
+            type=int,
+            default=settings.RECONCILIATION_SETTLE_SECONDS,
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="print every provider, not only the drifted ones",
+        )
+        parser.add_argument(
+            "--fail-on-drift",
+            action="store_true",
+            help="exit with an error when any wallet drifted",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        account_ids = list(
+            ProviderWallet.objects.order_by("account_id").values_list(
+                "account_id", flat=True
+            )
+        )
+        batches = chunked(account_ids, options["batch_size"])
+
+        if options["workers"] > 1:
+            # Workers must not inherit the parent's open connections
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=options["workers"], initializer=_init_worker
+            ) as executor:
+                futures = [
+                    executor.submit(reconcile_batch, batch, options["settle_seconds"])
+                    for batch in batches
+                ]
+                results = (result for future in futures for result in future.result())
+                summary = self._report(results, options)
+        else:
+            results = (
+                result
+                for batch in batches
+                for result in reconcile_batch(batch, options["settle_seconds"])
+            )
+            summary = self._report(results, options)
+
+        summary["duration_seconds"] = round(time.monotonic() - started, 3)
+        self.stdout.write(json.dumps({"event": "summary", **summary}))
+        if options["fail_on_drift"] and (summary["drifted"] or summary["errors"]):
+            raise CommandError("Wallet reconciliation found drifted wallets.")
+
+    def _report(self, results, options):
+        summary = {"providers": 0, "drifted": 0, "errors": 0}
+        for result in results:
+            summary["providers"] += 1
+            if "error" in result:
+                summary["errors"] += 1
+                self.stdout.write(json.dumps({"event": "error", **result}))
+            elif result["drift"]:
+                summary["drifted"] += 1
+                self.stdout.write(json.dumps({"event": "drift", **result}))
+            elif options["all"]:
+                self.stdout.write(json.dumps({"event": "ok", **result}))
+        return summary
@@ -0,0 +1,62 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from accounts.models import ChargeSchedule, ChargeScheduleRun
+
+logger = logging.getLogger("accounts")
+
+
+class Command(BaseCommand):
+    help = (
+        "Plan the due runs of the charge schedules, catching up on the ones "
+        "missed while no scheduler ran, and execute them in batches. Runs of "
+        "one wallet are executed one at a time, more workers may run at once."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size", type=int, default=settings.CHARGE_JOB_CHUNK_SIZE
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=settings.CHARGE_SCHEDULE_BATCH_PAUSE,
+            help="seconds to sleep between the batches of a run",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=10.0,
+            help="seconds to sleep when no run is ready",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="exit when no run is ready",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            planned = ChargeSchedule.plan_due_runs()
+            if planned:
+                self.stdout.write(f"Planned {planned} charge schedule runs")
+            run = ChargeScheduleRun.claim_next()
+            if run is None:
+                if options["once"]:
+                    return
+                time.sleep(options["poll_interval"])
+                continue
+
+            try:
+                run.process(options["chunk_size"], options["pause"])
+            except Exception:
+                # Taken over by a worker once its lease expires
+                logger.exception(f"Charge schedule run {run.id} stopped")
+                continue
+            self.stdout.write(
+                f"Charge schedule run {run.id} {run.status}: "
+                f"{run.succeeded_items} succeeded, {run.failed_items} failed"
+            )
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from accounts.stub_operator import StubOperatorServer
+
+
+class Command(BaseCommand):
+    help = "Run a local fake operator top-up API for development and benchmarks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8100)
+        parser.add_argument("--latency-ms", type=float, default=50)
+        parser.add_argument(
+            "--failure-rate",
+            type=float,
+            default=0.0,
+            help="share of requests answered with a retryable 503",
+        )
+        parser.add_argument(
+            "--reject-rate",
+            type=float,
+            default=0.0,
+            help="share of requests answered with a permanent 422",
+        )
+
+    def handle(self, *args, **options):
+        server = StubOperatorServer(
+            (options["host"], options["port"]),
+            latency=options["latency_ms"] / 1000,
+            failure_rate=options["failure_rate"],
+            reject_rate=options["reject_rate"],
+        )
+        self.stdout.write(f"Stub operator listening on {server.url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.server_close()
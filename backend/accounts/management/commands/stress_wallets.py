@@ -0,0 +1,351 @@
+import json
+import random
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+
+from accounts.admission import WalletBusyError
+from accounts.models import (
+    PhoneNumber,
+    ProviderAccount,
+    ProviderAccountTeamMember,
+    ProviderWallet,
+    RequestCharge,
+    RequestDeposit,
+    WalletCheckpoint,
+)
+from core.transactions import is_transient
+from core.traffic import percentile
+from core.utils import LOCKING_SQL
+
+User = get_user_model()
+
+OPERATIONS = ["charge", "deposit", "approve", "wallet_deposit", "transfer"]
+
+
+def _init_worker():
+    django.setup()
+
+
+class LockTimer:
+    """Execute wrapper summing the time spent in statements that lock rows."""
+
+    def __init__(self):
+        self.waited = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        if not LOCKING_SQL.search(sql):
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.waited += time.perf_counter() - started
+
+
+def _operation_stats():
+    return {
+        "ok": 0,
+        "rejected": 0,
+        "busy": 0,
+        "errors": 0,
+        "latencies": [],
+        "lock_wait": 0.0,
+    }
+
+
+def run_worker(worker, plan, deadline):
+    """Run random operations until ``deadline``, return stats per operation."""
+    rng = random.Random(f"{plan['seed']}:{worker}")
+    stats = defaultdict(_operation_stats)
+    wallet_deposits = defaultdict(int)
+    errors = []
+    timer = LockTimer()
+    with connection.execute_wrapper(timer):
+        while time.time() < deadline:
+            operation = rng.choices(OPERATIONS, plan["weights"])[0]
+            if plan["hot"] and rng.random() < plan["hot_share"]:
+                account = rng.choice(plan["hot"])
+            else:
+                account = rng.choice(plan["accounts"])
+            waited = timer.waited
+            started = time.perf_counter()
+            try:
+                outcome = _run(operation, account, plan, rng, wallet_deposits)
+            except WalletBusyError:
+                outcome = "busy"
+            except (ValueError, PermissionError, ValidationError):
+                outcome = "rejected"
+            except Exception as e:
+                if is_transient(e):
+                    outcome = "busy"
+                else:
+                    outcome = "errors"
+                    if len(errors) < 20:
+                        errors.append(f"{operation}: {type(e).__name__}: {e}")
+            entry = stats[operation]
+            entry[outcome] += 1
+            entry["latencies"].append(time.perf_counter() - started)
+            entry["lock_wait"] += timer.waited - waited
+    connections.close_all()
+    return dict(stats), dict(wallet_deposits), errors
+
+
+def _run(operation, account, plan, rng, wallet_deposits):
+    admin_id, staff_user_id, assignee_id = plan["members"][account["id"]]
+    if operation == "charge":
+        RequestCharge.create_charge_safely(
+            phone_number_id=rng.choice(plan["phone_numbers"]),
+            provider_account_id=account["id"],
+            user_id=rng.choice((account["admin_user_id"], staff_user_id)),
+            amount=rng.randrange(1, 50) * 1000,
+        )
+        return "ok"
+    if operation == "deposit":
+        RequestDeposit.objects.create(
+            requester_id=admin_id,
+            user_id=account["admin_user_id"],
+            account_id=account["id"],
+            assignee_id=assignee_id,
+            amount=rng.randrange(10, 200) * 1000,
+        )
+        return "ok"
+    if operation == "approve":
+        # Among the oldest open ones, so that approvers race on the same rows
+        open_ids = list(
+            RequestDeposit.objects.filter(account_id=account["id"], status="open")
+            .order_by("id")
+            .values_list("id", flat=True)[:5]
+        )
+        if not open_ids:
+            return "rejected"
+        deposit = RequestDeposit.objects.get(id=rng.choice(open_ids))
+        deposit.status = RequestDeposit.Status.APPROVED
+        deposit.save()
+        return "ok"
+    if operation == "transfer":
+        # Hot accounts send to each other in both directions at once
+        other = rng.choice(plan["hot"] or plan["accounts"])
+        if other["id"] == account["id"]:
+            return "rejected"
+        ProviderWallet.transfer(
+            [(account["id"], other["id"], rng.randrange(1, 50) * 1000)],
+            user_id=plan["reseller_user_id"],
+        )
+        return "ok"
+    amount = rng.randrange(10, 200) * 1000
+    ProviderWallet.deposit(account_id=account["id"], amount=amount)
+    wallet_deposits[account["id"]] += amount
+    return "ok"
+
+
+class Command(BaseCommand):
+    help = (
+        "Stress the wallets from many processes at once: skewed charges, "
+        "deposit requests, their approval through RequestDeposit.save, "
+        "direct ProviderWallet.deposit calls and transfers between wallets. "
+        "Then check that no balance went negative and that every balance "
+        "matches its ledger, and print the throughput, latency and time spent "
+        "waiting on row locks per operation. Meant for a local Postgres, "
+        "SQLite serializes all writes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--duration", type=float, default=30, help="seconds")
+        parser.add_argument("--workers", type=int, default=8)
+        parser.add_argument("--providers", type=int, default=50)
+        parser.add_argument("--hot-providers", type=int, default=3)
+        parser.add_argument("--hot-share", type=float, default=0.5)
+        parser.add_argument("--initial-balance", type=int, default=10**7)
+        parser.add_argument(
+            "--mix",
+            default="charge=65,deposit=15,approve=10,wallet_deposit=5,transfer=5",
+            help="relative weights of the operations",
+        )
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--json", help="also write the results to this file")
+
+    def handle(self, *args, **options):
+        weights = self._weights(options["mix"])
+        if connection.vendor != "postgresql":
+            self.stderr.write(
+                f"Running on {connection.vendor}, the numbers say little about "
+                "Postgres."
+            )
+        plan = self._setup(options)
+        plan["weights"] = weights
+
+        deadline = time.time() + options["duration"]
+        started = time.perf_counter()
+        if options["workers"] > 1:
+            # Workers must not inherit the parent's open connections
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=options["workers"], initializer=_init_worker
+            ) as executor:
+                futures = [
+                    executor.submit(run_worker, worker, plan, deadline)
+                    for worker in range(options["workers"])
+                ]
+                results = [future.result() for future in futures]
+        else:
+            results = [run_worker(0, plan, deadline)]
+        elapsed = time.perf_counter() - started
+
+        stats = defaultdict(_operation_stats)
+        wallet_deposits = defaultdict(int)
+        errors = []
+        for worker_stats, worker_deposits, worker_errors in results:
+            for operation, entry in worker_stats.items():
+                for key, value in entry.items():
+                    stats[operation][key] += value
+            for account_id, amount in worker_deposits.items():
+                wallet_deposits[account_id] += amount
+            errors.extend(worker_errors)
+
+        report = self._report(stats, elapsed, options["workers"])
+        violations = self._check(plan, wallet_deposits)
+        for error in errors:
+            self.stderr.write(error)
+        if options["json"]:
+            with open(options["json"], "w") as f:
+                json.dump(
+                    {
+                        "vendor": connection.vendor,
+                        "workers": options["workers"],
+                        "duration": elapsed,
+                        "operations": report,
+                        "violations": violations,
+                    },
+                    f,
+                    indent=2,
+                )
+        if violations:
+            raise CommandError(
+                f"{len(violations)} invariant violations:\n" + "\n".join(violations)
+            )
+        self.stdout.write("Invariants hold.")
+
+    def _weights(self, mix):
+        weights = dict.fromkeys(OPERATIONS, 0)
+        try:
+            for part in mix.split(","):
+                name, weight = part.split("=")
+                if name not in weights:
+                    raise ValueError
+                weights[name] = float(weight)
+        except ValueError:
+            raise CommandError(f"Invalid --mix {mix!r}.")
+        if not any(weights.values()):
+            raise CommandError("--mix must weigh some operation.")
+        return [weights[name] for name in OPERATIONS]
+
+    def _setup(self, options):
+        """Fresh providers funded through approved deposits."""
+        run = f"stress-{int(time.time() * 1000)}"
+        with transaction.atomic():
+            assignee = User.objects.create(username=f"{run}-assignee", is_staff=True)
+            phone_numbers = [
+                PhoneNumber.objects.get_or_create(number=f"0990{index:07d}")[0].id
+                for index in range(100)
+            ]
+            # Moves balance between the providers, which it resells
+            reseller = ProviderAccount.objects.create(name=f"{run} reseller")
+            reseller_admin = ProviderAccountTeamMember.objects.create(
+                user=User.objects.create(username=f"{run}-reseller-admin"),
+                account=reseller,
+                permission_level="admin",
+            )
+            accounts = []
+            members = {}
+            for index in range(options["providers"]):
+                provider = ProviderAccount.objects.create(
+                    name=f"{run} {index}", reseller=reseller
+                )
+                ProviderWallet.objects.create(account=provider)
+                admin, staff = (
+                    ProviderAccountTeamMember.objects.create(
+                        user=User.objects.create(username=f"{run}-{index}-{level}"),
+                        account=provider,
+                        permission_level=level,
+                    )
+                    for level in ("admin", "staff")
+                )
+                deposit = RequestDeposit.objects.create(
+                    requester=admin,
+                    account=provider,
+                    assignee=assignee,
+                    amount=options["initial_balance"],
+                )
+                deposit.status = RequestDeposit.Status.APPROVED
+                deposit.save()
+                accounts.append({"id": provider.id, "admin_user_id": admin.user_id})
+                members[provider.id] = (admin.id, staff.user_id, assignee.id)
+        rng = random.Random(options["seed"])
+        return {
+            "seed": options["seed"],
+            "accounts": accounts,
+            "hot": rng.sample(accounts, min(options["hot_providers"], len(accounts))),
+            "hot_share": options["hot_share"],
+            "members": members,
+            "reseller_user_id": reseller_admin.user_id,
+            "phone_numbers": phone_numbers,
+        }
+
+    def _report(self, stats, elapsed, workers):
+        def ms(value):
+            return "-" if value is None else f"{value * 1000:.1f}"
+
+        report = {}
+        self.stdout.write(
+            f"{workers} workers for {elapsed:.1f}s\n"
+            f"{'operation':15} {'ops':>7} {'ops/s':>8} {'ok':>7} {'rejected':>8} "
+            f"{'busy':>6} {'errors':>6} {'p50 ms':>7} {'p99 ms':>7} {'lock ms':>8}"
+        )
+        for operation in OPERATIONS:
+            entry = stats.get(operation)
+            if not entry or not entry["latencies"]:
+                continue
+            count = len(entry["latencies"])
+            row = {
+                "ops": count,
+                "ops_per_second": count / elapsed,
+                "ok": entry["ok"],
+                "rejected": entry["rejected"],
+                "busy": entry["busy"],
+                "errors": entry["errors"],
+                "p50": percentile(entry["latencies"], 0.5),
+                "p99": percentile(entry["latencies"], 0.99),
+                "lock_wait": entry["lock_wait"] / count,
+            }
+            report[operation] = row
+            self.stdout.write(
+                f"{operation:15} {count:>7} {row['ops_per_second']:>8.1f} "
+                f"{row['ok']:>7} {row['rejected']:>8} {row['busy']:>6} "
+                f"{row['errors']:>6} {ms(row['p50']):>7} {ms(row['p99']):>7} "
+                f"{ms(row['lock_wait']):>8}"
+            )
+        return report
+
+    def _check(self, plan, wallet_deposits):
+        """Balances stay positive and equal the ledger plus direct deposits."""
+        violations = []
+        for account in plan["accounts"]:
+            account_id = account["id"]
+            result = WalletCheckpoint.reconcile(account_id, settle_seconds=-1)
+            if result["balance"] < 0 or result["held_balance"] < 0:
+                violations.append(
+                    f"Account {account_id}: negative balance {result['balance']}"
+                    f" (held {result['held_balance']})"
+                )
+            # Direct wallet deposits have no ledger row
+            drift = result["drift"] - wallet_deposits.get(account_id, 0)
+            if drift:
+                violations.append(f"Account {account_id}: drift {drift}")
+        return violations
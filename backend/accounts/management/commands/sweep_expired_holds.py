@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.models import WalletHold
+
+
+class Command(BaseCommand):
+    help = "Return the funds of expired wallet holds in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="keep sweeping every this many seconds, 0 sweeps once",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            total = 0
+            while swept := WalletHold.sweep_expired(options["batch_size"]):
+                total += swept
+            if total:
+                self.stdout.write(f"Released {total} expired holds")
+            if not options["interval"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:16
+
+import django.core.validators
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_numbers(apps, schema_editor):
+    """
+    Keep the oldest row of every duplicated number, pointing the rows that
+    reference the others to it, so the unique constraint can be added.
+    """
+    PhoneNumber = apps.get_model('accounts', 'PhoneNumber')
+    duplicated = list(
+        PhoneNumber.objects.values('number')
+        .annotate(rows=Count('id'), keep=Min('id'))
+        .filter(rows__gt=1)
+        .order_by('number')
+    )
+    relations = [
+        relation
+        for relation in PhoneNumber._meta.related_objects
+        if relation.one_to_many
+    ]
+    unmergeable = [
+        relation.related_model._meta.label
+        for relation in PhoneNumber._meta.related_objects
+        if not relation.one_to_many
+    ]
+    if duplicated and unmergeable:
+        raise RuntimeError(
+            'Duplicate phone numbers %s are referenced by %s, merge them by hand '
+            'before migrating.'
+            % (
+                ', '.join(row['number'] for row in duplicated),
+                ', '.join(unmergeable),
+            )
+        )
+    for row in duplicated:
+        duplicates = PhoneNumber.objects.filter(number=row['number']).exclude(
+            id=row['keep']
+        )
+        for relation in relations:
+            relation.related_model._base_manager.filter(
+                **{f'{relation.field.name}__in': duplicates}
+            ).update(**{relation.field.attname: row['keep']})
+        if duplicates.filter(is_active=True).exists():
+            PhoneNumber.objects.filter(id=row['keep']).update(is_active=True)
+        duplicates.delete()
+    if duplicated and schema_editor.connection.vendor == 'postgresql':
+        # Run the deferred foreign key checks now, Postgres does not alter a
+        # table with pending trigger events
+        schema_editor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_numbers, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='phonenumber',
+            name='number',
+            field=models.CharField(max_length=11, unique=True, validators=[django.core.validators.RegexValidator('^09\\d{9}')], verbose_name='number'),
+        ),
+    ]
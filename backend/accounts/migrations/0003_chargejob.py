@@ -0,0 +1,38 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_phonenumber_unique_number'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChargeJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='create timestamp')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='update timestamp')),
+                ('user_id', models.PositiveBigIntegerField(help_text='id of requester user', verbose_name='user_id')),
+                ('source_file', models.FileField(upload_to='charge_jobs/source/', verbose_name='source file')),
+                ('result_file', models.FileField(blank=True, upload_to='charge_jobs/results/', verbose_name='result file')),
+                ('status', models.CharField(choices=[('pending', 'pending'), ('processing', 'processing'), ('completed', 'completed'), ('failed', 'failed')], db_index=True, default='pending', max_length=20, verbose_name='status')),
+                ('total_rows', models.PositiveIntegerField(default=0, verbose_name='total rows')),
+                ('processed_rows', models.PositiveIntegerField(default=0, verbose_name='processed rows')),
+                ('succeeded_rows', models.PositiveIntegerField(default=0, verbose_name='succeeded rows')),
+                ('failed_rows', models.PositiveIntegerField(default=0, verbose_name='failed rows')),
+                ('charged_amount', models.PositiveBigIntegerField(default=0, verbose_name='charged amount')),
+                ('error', models.TextField(blank=True, default='', verbose_name='error')),
+                ('provider_account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='charge_jobs', to='accounts.provideraccount', verbose_name='provider account')),
+                ('requester', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='charge_jobs', to='accounts.provideraccountteammember', verbose_name='requester')),
+            ],
+            options={
+                'verbose_name': 'charge job',
+                'verbose_name_plural': 'charge jobs',
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_chargejob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WalletCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='create timestamp')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='update timestamp')),
+                ('last_charge_id', models.PositiveBigIntegerField(default=0, verbose_name='last charge id')),
+                ('charge_total', models.PositiveBigIntegerField(default=0, verbose_name='charge total')),
+                ('last_deposit_history_id', models.PositiveBigIntegerField(default=0, verbose_name='last deposit history id')),
+                ('deposit_total', models.PositiveBigIntegerField(default=0, verbose_name='deposit total')),
+                ('drift', models.BigIntegerField(default=0, verbose_name='drift')),
+            ],
+            options={
+                'verbose_name': 'wallet checkpoint',
+                'verbose_name_plural': 'wallet checkpoints',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='requestcharge',
+            index=models.Index(fields=['provider_account', 'id'], name='accounts_re_provide_24288c_idx'),
+        ),
+        migrations.AddField(
+            model_name='walletcheckpoint',
+            name='account',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='wallet_checkpoint', to='accounts.provideraccount', verbose_name='account'),
+        ),
+    ]
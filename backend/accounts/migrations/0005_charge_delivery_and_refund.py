@@ -0,0 +1,180 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:24
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0004_walletcheckpoint"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="walletcheckpoint",
+            name="last_refund_id",
+            field=models.PositiveBigIntegerField(
+                default=0, verbose_name="last refund id"
+            ),
+        ),
+        migrations.AddField(
+            model_name="walletcheckpoint",
+            name="refund_total",
+            field=models.PositiveBigIntegerField(
+                default=0, verbose_name="refund total"
+            ),
+        ),
+        migrations.CreateModel(
+            name="ChargeDelivery",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="create timestamp"
+                    ),
+                ),
+                (
+                    "updated",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="update timestamp"
+                    ),
+                ),
+                ("operator", models.CharField(max_length=30, verbose_name="operator")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "pending"),
+                            ("in_flight", "in flight"),
+                            ("delivered", "delivered"),
+                            ("failed", "failed"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                        verbose_name="status",
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveSmallIntegerField(
+                        default=0, verbose_name="attempts"
+                    ),
+                ),
+                (
+                    "next_attempt_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        verbose_name="next attempt at",
+                    ),
+                ),
+                (
+                    "delivered_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="delivered at"
+                    ),
+                ),
+                (
+                    "operator_reference",
+                    models.CharField(
+                        blank=True,
+                        default="",
+                        max_length=100,
+                        verbose_name="operator reference",
+                    ),
+                ),
+                (
+                    "last_error",
+                    models.TextField(blank=True, default="", verbose_name="last error"),
+                ),
+                (
+                    "charge",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="delivery",
+                        to="accounts.requestcharge",
+                        verbose_name="charge",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "charge delivery",
+                "verbose_name_plural": "charge deliveries",
+                "indexes": [
+                    models.Index(
+                        fields=["status", "next_attempt_at"],
+                        name="accounts_ch_status_6c3921_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="ChargeRefund",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="create timestamp"
+                    ),
+                ),
+                (
+                    "updated",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="update timestamp"
+                    ),
+                ),
+                ("amount", models.PositiveBigIntegerField(verbose_name="amount")),
+                (
+                    "reason",
+                    models.TextField(blank=True, default="", verbose_name="reason"),
+                ),
+                (
+                    "charge",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="refund",
+                        to="accounts.requestcharge",
+                        verbose_name="charge",
+                    ),
+                ),
+                (
+                    "provider_account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="charge_refunds",
+                        to="accounts.provideraccount",
+                        verbose_name="provider account",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "charge refund",
+                "verbose_name_plural": "charge refunds",
+                "indexes": [
+                    models.Index(
+                        fields=["provider_account", "id"],
+                        name="accounts_ch_provide_1e0f89_idx",
+                    )
+                ],
+            },
+        ),
+    ]
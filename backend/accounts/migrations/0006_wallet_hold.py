@@ -0,0 +1,119 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0005_charge_delivery_and_refund"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="providerwallet",
+            name="held_balance",
+            field=models.PositiveBigIntegerField(
+                default=0,
+                help_text="amount reserved by holds that are not captured yet",
+                verbose_name="held balance",
+            ),
+        ),
+        migrations.CreateModel(
+            name="WalletHold",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="create timestamp"
+                    ),
+                ),
+                (
+                    "updated",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="update timestamp"
+                    ),
+                ),
+                (
+                    "user_id",
+                    models.PositiveBigIntegerField(
+                        help_text="id of requester user", verbose_name="user_id"
+                    ),
+                ),
+                ("amount", models.PositiveBigIntegerField(verbose_name="amount")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("held", "held"),
+                            ("captured", "captured"),
+                            ("released", "released"),
+                            ("expired", "expired"),
+                        ],
+                        default="held",
+                        max_length=20,
+                        verbose_name="status",
+                    ),
+                ),
+                ("expires_at", models.DateTimeField(verbose_name="expires at")),
+                (
+                    "charge",
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="hold",
+                        to="accounts.requestcharge",
+                        verbose_name="charge",
+                    ),
+                ),
+                (
+                    "phone_number",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="wallet_holds",
+                        to="accounts.phonenumber",
+                        verbose_name="phone number",
+                    ),
+                ),
+                (
+                    "provider_account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="wallet_holds",
+                        to="accounts.provideraccount",
+                        verbose_name="provider account",
+                    ),
+                ),
+                (
+                    "requester",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="wallet_holds",
+                        to="accounts.provideraccountteammember",
+                        verbose_name="requester",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "wallet hold",
+                "verbose_name_plural": "wallet holds",
+                "indexes": [
+                    models.Index(
+                        fields=["status", "expires_at"],
+                        name="accounts_wa_status_70dee1_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0006_wallet_hold"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="provideraccount",
+            name="charge_rate_limit",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="charge requests per minute, empty uses the default",
+                null=True,
+                verbose_name="charge rate limit",
+            ),
+        ),
+        migrations.AddField(
+            model_name="provideraccount",
+            name="deposit_rate_limit",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="deposit requests per minute, empty uses the default",
+                null=True,
+                verbose_name="deposit rate limit",
+            ),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0007_provider_account_rate_limits"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="requestcharge",
+            name="idempotency_key",
+            field=models.CharField(
+                blank=True,
+                help_text="key sent by the provider, unique per account",
+                max_length=64,
+                null=True,
+                verbose_name="idempotency key",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="requestcharge",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("idempotency_key__isnull", False)),
+                fields=("provider_account", "idempotency_key"),
+                name="unique_charge_idempotency_key",
+            ),
+        ),
+    ]
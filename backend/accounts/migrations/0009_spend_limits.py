@@ -0,0 +1,112 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0008_request_charge_idempotency_key"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="provideraccount",
+            name="daily_spend_limit",
+            field=models.PositiveBigIntegerField(
+                blank=True,
+                help_text="total charged per day, empty is unlimited",
+                null=True,
+                verbose_name="daily spend limit",
+            ),
+        ),
+        migrations.AddField(
+            model_name="provideraccount",
+            name="monthly_spend_limit",
+            field=models.PositiveBigIntegerField(
+                blank=True,
+                help_text="total charged per calendar month, empty is unlimited",
+                null=True,
+                verbose_name="monthly spend limit",
+            ),
+        ),
+        migrations.AddField(
+            model_name="provideraccountteammember",
+            name="daily_spend_limit",
+            field=models.PositiveBigIntegerField(
+                blank=True,
+                help_text="total charged per day, empty is unlimited",
+                null=True,
+                verbose_name="daily spend limit",
+            ),
+        ),
+        migrations.AddField(
+            model_name="provideraccountteammember",
+            name="monthly_spend_limit",
+            field=models.PositiveBigIntegerField(
+                blank=True,
+                help_text="total charged per calendar month, empty is unlimited",
+                null=True,
+                verbose_name="monthly spend limit",
+            ),
+        ),
+        migrations.CreateModel(
+            name="SpendCounter",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "scope",
+                    models.CharField(
+                        help_text="account:<id> or member:<id>",
+                        max_length=32,
+                        verbose_name="scope",
+                    ),
+                ),
+                (
+                    "period",
+                    models.CharField(
+                        choices=[("day", "day"), ("month", "month")],
+                        max_length=5,
+                        verbose_name="period",
+                    ),
+                ),
+                ("window_start", models.DateField(verbose_name="window start")),
+                (
+                    "amount",
+                    models.PositiveBigIntegerField(default=0, verbose_name="amount"),
+                ),
+                (
+                    "cap",
+                    models.PositiveBigIntegerField(
+                        blank=True,
+                        help_text="limit in force at the last charge, empty is unlimited",
+                        null=True,
+                        verbose_name="cap",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "spend counter",
+                "verbose_name_plural": "spend counters",
+                "indexes": [
+                    models.Index(
+                        fields=["window_start"], name="accounts_sp_window__adb94b_idx"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("scope", "period", "window_start"),
+                        name="unique_spend_counter_window",
+                    )
+                ],
+            },
+        ),
+    ]
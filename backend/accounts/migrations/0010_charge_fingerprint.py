@@ -0,0 +1,39 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0009_spend_limits"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChargeFingerprint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "key",
+                    models.CharField(max_length=64, unique=True, verbose_name="key"),
+                ),
+                (
+                    "expires_at",
+                    models.DateTimeField(db_index=True, verbose_name="expires at"),
+                ),
+            ],
+            options={
+                "verbose_name": "charge fingerprint",
+                "verbose_name_plural": "charge fingerprints",
+            },
+        ),
+    ]
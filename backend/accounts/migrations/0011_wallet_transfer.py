@@ -0,0 +1,98 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0010_charge_fingerprint"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="walletcheckpoint",
+            name="last_transfer_id",
+            field=models.PositiveBigIntegerField(
+                default=0, verbose_name="last transfer id"
+            ),
+        ),
+        migrations.AddField(
+            model_name="walletcheckpoint",
+            name="transfer_total",
+            field=models.BigIntegerField(
+                default=0,
+                help_text="transferred in minus out",
+                verbose_name="transfer total",
+            ),
+        ),
+        migrations.CreateModel(
+            name="WalletTransfer",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="create timestamp"
+                    ),
+                ),
+                (
+                    "updated",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="update timestamp"
+                    ),
+                ),
+                ("amount", models.PositiveBigIntegerField(verbose_name="amount")),
+                (
+                    "user_id",
+                    models.PositiveBigIntegerField(
+                        blank=True,
+                        help_text="id of requester user",
+                        null=True,
+                        verbose_name="user_id",
+                    ),
+                ),
+                (
+                    "destination_account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="incoming_transfers",
+                        to="accounts.provideraccount",
+                        verbose_name="destination account",
+                    ),
+                ),
+                (
+                    "source_account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="outgoing_transfers",
+                        to="accounts.provideraccount",
+                        verbose_name="source account",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "wallet transfer",
+                "verbose_name_plural": "wallet transfers",
+                "indexes": [
+                    models.Index(
+                        fields=["source_account", "id"],
+                        name="accounts_wa_source__df4ecf_idx",
+                    ),
+                    models.Index(
+                        fields=["destination_account", "id"],
+                        name="accounts_wa_destina_937692_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,282 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0011_wallet_transfer"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChargeSchedule",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="create timestamp"
+                    ),
+                ),
+                (
+                    "updated",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="update timestamp"
+                    ),
+                ),
+                (
+                    "user_id",
+                    models.PositiveBigIntegerField(
+                        help_text="id of requester user", verbose_name="user_id"
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, verbose_name="name")),
+                (
+                    "interval",
+                    models.CharField(
+                        choices=[
+                            ("daily", "daily"),
+                            ("weekly", "weekly"),
+                            ("monthly", "monthly"),
+                        ],
+                        max_length=10,
+                        verbose_name="interval",
+                    ),
+                ),
+                (
+                    "starts_at",
+                    models.DateTimeField(
+                        help_text="first due time", verbose_name="starts at"
+                    ),
+                ),
+                (
+                    "ends_at",
+                    models.DateTimeField(blank=True, null=True, verbose_name="ends at"),
+                ),
+                (
+                    "next_run_at",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="next due time not planned yet, empty starts at starts at",
+                        verbose_name="next run at",
+                    ),
+                ),
+                (
+                    "is_active",
+                    models.BooleanField(default=True, verbose_name="is_active"),
+                ),
+                (
+                    "provider_account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="charge_schedules",
+                        to="accounts.provideraccount",
+                        verbose_name="provider account",
+                    ),
+                ),
+                (
+                    "requester",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="charge_schedules",
+                        to="accounts.provideraccountteammember",
+                        verbose_name="requester",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "charge schedule",
+                "verbose_name_plural": "charge schedules",
+            },
+        ),
+        migrations.CreateModel(
+            name="ChargeScheduleItem",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("amount", models.PositiveBigIntegerField(verbose_name="amount")),
+                (
+                    "phone_number",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="schedule_items",
+                        to="accounts.phonenumber",
+                        verbose_name="phone number",
+                    ),
+                ),
+                (
+                    "schedule",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="items",
+                        to="accounts.chargeschedule",
+                        verbose_name="schedule",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "charge schedule item",
+                "verbose_name_plural": "charge schedule items",
+            },
+        ),
+        migrations.CreateModel(
+            name="ChargeScheduleRun",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="create timestamp"
+                    ),
+                ),
+                (
+                    "updated",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="update timestamp"
+                    ),
+                ),
+                ("due_at", models.DateTimeField(verbose_name="due at")),
+                (
+                    "not_before",
+                    models.DateTimeField(
+                        help_text="due time plus the spread of the schedule",
+                        verbose_name="not before",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "pending"),
+                            ("processing", "processing"),
+                            ("completed", "completed"),
+                            ("failed", "failed"),
+                            ("skipped", "skipped"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                        verbose_name="status",
+                    ),
+                ),
+                (
+                    "lease_expires_at",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="a processing run is taken over by another worker after it",
+                        null=True,
+                        verbose_name="lease expires at",
+                    ),
+                ),
+                (
+                    "last_item_id",
+                    models.PositiveBigIntegerField(
+                        default=0, verbose_name="last item id"
+                    ),
+                ),
+                (
+                    "processed_items",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="processed items"
+                    ),
+                ),
+                (
+                    "succeeded_items",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="succeeded items"
+                    ),
+                ),
+                (
+                    "failed_items",
+                    models.PositiveIntegerField(default=0, verbose_name="failed items"),
+                ),
+                (
+                    "charged_amount",
+                    models.PositiveBigIntegerField(
+                        default=0, verbose_name="charged amount"
+                    ),
+                ),
+                (
+                    "failures",
+                    models.JSONField(blank=True, default=list, verbose_name="failures"),
+                ),
+                (
+                    "error",
+                    models.TextField(blank=True, default="", verbose_name="error"),
+                ),
+                (
+                    "provider_account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="charge_schedule_runs",
+                        to="accounts.provideraccount",
+                        verbose_name="provider account",
+                    ),
+                ),
+                (
+                    "schedule",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="runs",
+                        to="accounts.chargeschedule",
+                        verbose_name="schedule",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "charge schedule run",
+                "verbose_name_plural": "charge schedule runs",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="chargeschedule",
+            index=models.Index(
+                fields=["is_active", "next_run_at"],
+                name="accounts_ch_is_acti_8c5a6e_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="chargescheduleitem",
+            constraint=models.UniqueConstraint(
+                fields=("schedule", "phone_number"),
+                name="unique_charge_schedule_phone_number",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="chargeschedulerun",
+            index=models.Index(
+                fields=["status", "not_before"], name="accounts_ch_status_0b71ec_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="chargeschedulerun",
+            constraint=models.UniqueConstraint(
+                fields=("schedule", "due_at"), name="unique_charge_schedule_run"
+            ),
+        ),
+    ]
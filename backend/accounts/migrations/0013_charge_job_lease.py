@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0012_charge_schedule"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="chargejob",
+            name="lease_expires_at",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="a processing job is taken over by another worker after it",
+                null=True,
+                verbose_name="lease expires at",
+            ),
+        ),
+    ]
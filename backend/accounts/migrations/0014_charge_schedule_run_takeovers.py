@@ -0,0 +1,22 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0013_charge_job_lease"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="chargeschedulerun",
+            name="takeovers",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="times the run was taken over from a worker that stopped",
+                verbose_name="takeovers",
+            ),
+        ),
+    ]
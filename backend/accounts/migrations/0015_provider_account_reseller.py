@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0014_charge_schedule_run_takeovers"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="provideraccount",
+            name="reseller",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="account whose admins may move balance to and from this one",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="resold_accounts",
+                to="accounts.provideraccount",
+                verbose_name="reseller",
+            ),
+        ),
+    ]
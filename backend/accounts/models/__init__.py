@@ -1,6 +1,17 @@
 from .phone_number import PhoneNumber
 from .provider_account_team_member import ProviderAccountTeamMember
 from .provider_account import ProviderAccount
+from .wallet_transfer import WalletTransfer
 from .provider_wallet import ProviderWallet
+from .spend_counter import SpendCounter
+from .charge_delivery import ChargeDelivery
+from .charge_refund import ChargeRefund
+from .charge_fingerprint import ChargeFingerprint
 from .request_charge import RequestCharge
-from .request_deposit import RequestDeposit
\ No newline at end of file
+from .request_deposit import RequestDeposit
+from .charge_job import ChargeJob
+from .charge_schedule_item import ChargeScheduleItem
+from .charge_schedule_run import ChargeScheduleRun
+from .charge_schedule import ChargeSchedule
+from .wallet_checkpoint import WalletCheckpoint
+from .wallet_hold import WalletHold
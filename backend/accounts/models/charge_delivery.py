@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from core.models import TimestampMixin
+
+
+class ChargeDelivery(TimestampMixin, models.Model):
+    """
+    Outbox row written in the same transaction as its charge. The dispatcher
+    picks pending rows up and delivers the top-up to the operator.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", _("pending")
+        IN_FLIGHT = "in_flight", _("in flight")
+        DELIVERED = "delivered", _("delivered")
+        FAILED = "failed", _("failed")
+
+    charge = models.OneToOneField(
+        "accounts.RequestCharge",
+        on_delete=models.CASCADE,
+        related_name="delivery",
+        verbose_name=_("charge"),
+    )
+    operator = models.CharField(_("operator"), max_length=30)
+    status = models.CharField(
+        _("status"), max_length=20, default=Status.PENDING, choices=Status.choices
+    )
+    attempts = models.PositiveSmallIntegerField(_("attempts"), default=0)
+    next_attempt_at = models.DateTimeField(_("next attempt at"), default=timezone.now)
+    delivered_at = models.DateTimeField(_("delivered at"), blank=True, null=True)
+    operator_reference = models.CharField(
+        _("operator reference"), max_length=100, blank=True, default=""
+    )
+    last_error = models.TextField(_("last error"), blank=True, default="")
+
+    @staticmethod
+    def operator_for(number: str) -> str:
+        for name, operator in settings.TOPUP_OPERATORS.items():
+            if number[:4] in operator["prefixes"]:
+                return name
+        return settings.TOPUP_DEFAULT_OPERATOR
+
+    @classmethod
+    def for_charge(cls, charge, number: str):
+        return cls(charge=charge, operator=cls.operator_for(number))
+
+    def __str__(self):
+        return f"{self.charge_id} ({self.status})"
+
+    class Meta:
+        verbose_name = _("charge delivery")
+        verbose_name_plural = _("charge deliveries")
+        indexes = [models.Index(fields=["status", "next_attempt_at"])]
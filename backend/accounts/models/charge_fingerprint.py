@@ -0,0 +1,54 @@
+from django.db import connections, models, router
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class ChargeFingerprint(models.Model):
+    """
+    Account, phone number and amount of a recent charge, so that the same
+    charge is accepted once per dedup window across all processes. A row
+    whose window is over is taken over by the next charge with the same key,
+    ``prune`` deletes the rest.
+    """
+
+    key = models.CharField(_("key"), max_length=64, unique=True)
+    expires_at = models.DateTimeField(_("expires at"), db_index=True)
+
+    @classmethod
+    def claim(cls, key, expires_at, using=None):
+        """True unless a live row holds ``key``, in one conditional upsert."""
+        using = using or router.db_for_write(cls)
+        adapt = connections[using].ops.adapt_datetimefield_value
+        table = cls._meta.db_table
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} (key, expires_at) VALUES (%s, %s) "
+                "ON CONFLICT (key) DO UPDATE SET expires_at = excluded.expires_at "
+                f"WHERE {table}.expires_at <= %s "
+                "RETURNING id",
+                [key, adapt(expires_at), adapt(timezone.now())],
+            )
+            return cursor.fetchone() is not None
+
+    @classmethod
+    def release(cls, key, expires_at):
+        cls.objects.filter(key=key, expires_at=expires_at).delete()
+
+    @classmethod
+    def prune(cls, batch_size: int = 1000):
+        """Delete one batch of expired fingerprints."""
+        ids = list(
+            cls.objects.filter(expires_at__lte=timezone.now()).values_list(
+                "id", flat=True
+            )[:batch_size]
+        )
+        if ids:
+            cls.objects.filter(id__in=ids).delete()
+        return len(ids)
+
+    def __str__(self):
+        return self.key
+
+    class Meta:
+        verbose_name = _("charge fingerprint")
+        verbose_name_plural = _("charge fingerprints")
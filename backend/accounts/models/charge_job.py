@@ -0,0 +1,260 @@
+import csv
+import io
+import itertools
+import logging
+import os
+from contextlib import closing
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from accounts.admission import WalletBusyError
+from core.models import TimestampMixin
+from core.transactions import is_transient
+from core.utils import chunked
+from accounts.models import RequestCharge
+
+logger = logging.getLogger("accounts")
+
+
+class LeaseLost(Exception):
+    """The job was taken over by another worker while this one was charging."""
+
+
+class ChargeJob(TimestampMixin, models.Model):
+    class Status(models.TextChoices):
+        PENDING = "pending", _("pending")
+        PROCESSING = "processing", _("processing")
+        COMPLETED = "completed", _("completed")
+        FAILED = "failed", _("failed")
+
+    provider_account = models.ForeignKey(
+        "accounts.ProviderAccount",
+        on_delete=models.CASCADE,
+        related_name="charge_jobs",
+        verbose_name=_("provider account"),
+    )
+    requester = models.ForeignKey(
+        "accounts.ProviderAccountTeamMember",
+        on_delete=models.CASCADE,
+        related_name="charge_jobs",
+        verbose_name=_("requester"),
+    )
+    user_id = models.PositiveBigIntegerField(
+        _("user_id"), help_text=_("id of requester user")
+    )
+    source_file = models.FileField(_("source file"), upload_to="charge_jobs/source/")
+    result_file = models.FileField(
+        _("result file"), upload_to="charge_jobs/results/", blank=True
+    )
+    status = models.CharField(
+        _("status"),
+        max_length=20,
+        default=Status.PENDING,
+        choices=Status.choices,
+        db_index=True,
+    )
+    total_rows = models.PositiveIntegerField(_("total rows"), default=0)
+    processed_rows = models.PositiveIntegerField(_("processed rows"), default=0)
+    succeeded_rows = models.PositiveIntegerField(_("succeeded rows"), default=0)
+    failed_rows = models.PositiveIntegerField(_("failed rows"), default=0)
+    charged_amount = models.PositiveBigIntegerField(_("charged amount"), default=0)
+    error = models.TextField(_("error"), blank=True, default="")
+    lease_expires_at = models.DateTimeField(
+        _("lease expires at"),
+        blank=True,
+        null=True,
+        help_text=_("a processing job is taken over by another worker after it"),
+    )
+
+    RESULT_HEADER = ["row", "phone_number", "amount", "error"]
+    PROGRESS_FIELDS = [
+        "processed_rows",
+        "succeeded_rows",
+        "failed_rows",
+        "charged_amount",
+    ]
+
+    @staticmethod
+    def count_rows(source):
+        source.seek(0)
+        rows = sum(1 for _ in ChargeJob.iter_rows(source))
+        source.seek(0)
+        return rows
+
+    @staticmethod
+    def iter_rows(source):
+        """Yield ``(phone number, amount)`` for every data row of a csv file."""
+        stream = io.TextIOWrapper(source, encoding="utf-8", newline="")
+        try:
+            for index, row in enumerate(csv.reader(stream)):
+                if not row:
+                    continue
+                number = row[0].strip()
+                if index == 0 and not number.isdigit():
+                    continue  # header
+                try:
+                    amount = int(row[1])
+                except (IndexError, ValueError):
+                    amount = None
+                yield number, amount
+        finally:
+            stream.detach()
+
+    @staticmethod
+    def _lease():
+        return timezone.now() + timedelta(seconds=settings.CHARGE_JOB_LEASE_SECONDS)
+
+    @classmethod
+    def claim_next(cls):
+        """
+        The oldest pending job, or a processing one whose worker stopped
+        renewing its lease, None when there is none.
+        """
+        with transaction.atomic():
+            job = (
+                cls.objects.select_for_update(skip_locked=True)
+                .filter(
+                    models.Q(status=cls.Status.PENDING)
+                    | models.Q(
+                        status=cls.Status.PROCESSING,
+                        lease_expires_at__lte=timezone.now(),
+                    )
+                )
+                .order_by("id")
+                .first()
+            )
+            if job is None:
+                return None
+            job.status = cls.Status.PROCESSING
+            job.lease_expires_at = cls._lease()
+            job.save(update_fields=["status", "lease_expires_at", "updated"])
+            return job
+
+    def process(self, chunk_size: int = 1000):
+        """
+        Charge the rows of the source file chunk by chunk. Progress is stored
+        with every chunk, so an interrupted job resumes where it stopped.
+        Every chunk is stored only if the progress it started from is still
+        the stored one, so a worker whose job was taken over stops there.
+        """
+        if not self.result_file:
+            self.result_file.name = f"charge_jobs/results/{self.id}.csv"
+            self.save(update_fields=["result_file", "updated"])
+        result_path = self.result_file.path
+        os.makedirs(os.path.dirname(result_path), exist_ok=True)
+        self._reset_result_file(result_path)
+
+        try:
+            with self.source_file.open("rb") as source, closing(
+                self.iter_rows(source)
+            ) as source_rows:
+                rows = itertools.islice(
+                    enumerate(source_rows, start=1),
+                    self.processed_rows,
+                    None,
+                )
+                for chunk in chunked(rows, chunk_size):
+                    self._process_chunk(chunk, result_path)
+        except LeaseLost:
+            logger.warning(f"Charge job {self.id} was taken over by another worker")
+            return
+        except (PermissionError, ValueError) as e:
+            self.status = self.Status.FAILED
+            self.error = str(e)
+        except Exception as e:
+            if isinstance(e, WalletBusyError) or is_transient(e):
+                # Claimed again shortly, resuming after the last stored chunk
+                self.lease_expires_at = timezone.now() + timedelta(
+                    seconds=settings.WALLET_BUSY_RETRY_AFTER
+                )
+                self.save(update_fields=["lease_expires_at", "updated"])
+                return
+            logger.exception(f"Charge job {self.id} failed")
+            self.status = self.Status.FAILED
+            self.error = f"{type(e).__name__}: {e}"
+        else:
+            self.status = self.Status.COMPLETED
+        self.lease_expires_at = None
+        self.save(update_fields=["status", "error", "lease_expires_at", "updated"])
+
+    def _reset_result_file(self, result_path):
+        """
+        Reload the stored progress and keep the failures of the stored chunks
+        only, dropping those of a chunk whose transaction did not commit.
+        """
+        with transaction.atomic():
+            # Waits for a chunk another worker is storing, its rows are kept
+            stored = ChargeJob.objects.select_for_update().get(id=self.id)
+            for field in self.PROGRESS_FIELDS:
+                setattr(self, field, getattr(stored, field))
+            kept = []
+            if self.processed_rows and os.path.exists(result_path):
+                with open(result_path, newline="", encoding="utf-8") as result:
+                    kept = [
+                        row
+                        for row in itertools.islice(csv.reader(result), 1, None)
+                        if int(row[0]) <= self.processed_rows
+                    ]
+            with open(result_path, "w", newline="", encoding="utf-8") as result:
+                writer = csv.writer(result)
+                writer.writerow(self.RESULT_HEADER)
+                writer.writerows(kept)
+
+    def _process_chunk(self, chunk, result_path):
+        with transaction.atomic():
+            results = RequestCharge.create_charge_batch(
+                provider_account_id=self.provider_account_id,
+                user_id=self.user_id,
+                items=[
+                    (number, amount, f"charge-job:{self.id}:{row}")
+                    for row, (number, amount) in chunk
+                ],
+            )
+            failures = []
+            succeeded = charged = 0
+            for (row, (number, amount)), result in zip(chunk, results):
+                if isinstance(result, RequestCharge):
+                    succeeded += 1
+                    charged += result.amount
+                else:
+                    failures.append([row, number, amount, result])
+            lease_expires_at = self._lease()
+            stored = ChargeJob.objects.filter(
+                id=self.id, processed_rows=self.processed_rows
+            ).update(
+                processed_rows=F("processed_rows") + len(chunk),
+                succeeded_rows=F("succeeded_rows") + succeeded,
+                failed_rows=F("failed_rows") + len(failures),
+                charged_amount=F("charged_amount") + charged,
+                lease_expires_at=lease_expires_at,
+                updated=timezone.now(),
+            )
+            if not stored:
+                raise LeaseLost
+            # Written before the commit, a chunk that does not commit has its
+            # rows dropped by _reset_result_file when the job resumes
+            with open(result_path, "a", newline="", encoding="utf-8") as result:
+                csv.writer(result).writerows(failures)
+        self.processed_rows += len(chunk)
+        self.succeeded_rows += succeeded
+        self.failed_rows += len(failures)
+        self.charged_amount += charged
+        self.lease_expires_at = lease_expires_at
+
+    @property
+    def progress(self) -> float:
+        if not self.total_rows:
+            return 100 if self.status == self.Status.COMPLETED else 0
+        return round(self.processed_rows * 100 / self.total_rows, 2)
+
+    def __str__(self):
+        return f"{self.id}"
+
+    class Meta:
+        verbose_name = _("charge job")
+        verbose_name_plural = _("charge jobs")
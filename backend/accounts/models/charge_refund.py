@@ -0,0 +1,31 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from core.models import TimestampMixin
+
+
+class ChargeRefund(TimestampMixin, models.Model):
+    """Amount of a charge returned to its wallet after a permanent delivery failure."""
+
+    charge = models.OneToOneField(
+        "accounts.RequestCharge",
+        on_delete=models.CASCADE,
+        related_name="refund",
+        verbose_name=_("charge"),
+    )
+    provider_account = models.ForeignKey(
+        "accounts.ProviderAccount",
+        on_delete=models.CASCADE,
+        related_name="charge_refunds",
+        verbose_name=_("provider account"),
+    )
+    amount = models.PositiveBigIntegerField(_("amount"))
+    reason = models.TextField(_("reason"), blank=True, default="")
+
+    def __str__(self):
+        return f"{self.charge_id}"
+
+    class Meta:
+        verbose_name = _("charge refund")
+        verbose_name_plural = _("charge refunds")
+        indexes = [models.Index(fields=["provider_account", "id"])]
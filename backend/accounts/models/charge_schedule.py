@@ -0,0 +1,142 @@
+import calendar
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from core.models import TimestampMixin
+from accounts.models import ChargeScheduleRun
+
+
+class ChargeSchedule(TimestampMixin, models.Model):
+    """
+    Recurring charges of a provider account, e.g. every Monday at 10:00 the
+    same amount to a list of numbers. The scheduler plans a ChargeScheduleRun
+    per due time and executes it in batches through create_charge_batch.
+    """
+
+    class Interval(models.TextChoices):
+        DAILY = "daily", _("daily")
+        WEEKLY = "weekly", _("weekly")
+        MONTHLY = "monthly", _("monthly")
+
+    provider_account = models.ForeignKey(
+        "accounts.ProviderAccount",
+        on_delete=models.CASCADE,
+        related_name="charge_schedules",
+        verbose_name=_("provider account"),
+    )
+    requester = models.ForeignKey(
+        "accounts.ProviderAccountTeamMember",
+        on_delete=models.CASCADE,
+        related_name="charge_schedules",
+        verbose_name=_("requester"),
+    )
+    user_id = models.PositiveBigIntegerField(
+        _("user_id"), help_text=_("id of requester user")
+    )
+    name = models.CharField(_("name"), max_length=100)
+    interval = models.CharField(_("interval"), max_length=10, choices=Interval.choices)
+    starts_at = models.DateTimeField(_("starts at"), help_text=_("first due time"))
+    ends_at = models.DateTimeField(_("ends at"), blank=True, null=True)
+    next_run_at = models.DateTimeField(
+        _("next run at"),
+        blank=True,
+        help_text=_("next due time not planned yet, empty starts at starts at"),
+    )
+    is_active = models.BooleanField(_("is_active"), default=True)
+
+    def save(self, *args, **kwargs):
+        if self.next_run_at is None:
+            self.next_run_at = self.starts_at
+        if self.user_id is None:
+            self.user_id = self.requester.user_id
+        super().save(*args, **kwargs)
+
+    def due_after(self, due_at):
+        """The due time following ``due_at``, counted from ``starts_at``."""
+        if self.interval == self.Interval.DAILY:
+            return due_at + timedelta(days=1)
+        if self.interval == self.Interval.WEEKLY:
+            return due_at + timedelta(weeks=1)
+        # The n-th month after the start, on its day or the last day of shorter months
+        start = self.starts_at
+        months = (due_at.year - start.year) * 12 + due_at.month - start.month + 1
+        year, month = divmod(start.month - 1 + months, 12)
+        year, month = start.year + year, month + 1
+        day = min(start.day, calendar.monthrange(year, month)[1])
+        return start.replace(year=year, month=month, day=day)
+
+    def spread(self):
+        """Stable offset of the runs of this schedule from their due time."""
+        seconds = settings.CHARGE_SCHEDULE_SPREAD_SECONDS
+        return timedelta(seconds=random.Random(self.id).uniform(0, seconds))
+
+    @classmethod
+    def plan_due_runs(cls, now=None):
+        """
+        Create the runs of every due time up to ``now`` that was not planned
+        yet, including the ones missed while no scheduler ran. Missed runs
+        beyond the last ``CHARGE_SCHEDULE_MAX_CATCH_UP`` are recorded as
+        skipped instead of charging the same numbers many times over.
+        Returns the number of runs created.
+        """
+        now = now or timezone.now()
+        keep = settings.CHARGE_SCHEDULE_MAX_CATCH_UP
+        planned = 0
+        with transaction.atomic():
+            schedules = cls.objects.select_for_update(skip_locked=True).filter(
+                is_active=True, next_run_at__lte=now
+            )
+            for schedule in schedules:
+                due_times = []
+                due_at = schedule.next_run_at
+                while due_at <= now and (
+                    schedule.ends_at is None or due_at <= schedule.ends_at
+                ):
+                    due_times.append(due_at)
+                    due_at = schedule.due_after(due_at)
+                # Runs planned before a crash are kept as they are
+                planned_before = set(
+                    schedule.runs.filter(due_at__in=due_times).values_list(
+                        "due_at", flat=True
+                    )
+                )
+                spread = schedule.spread()
+                runs = [
+                    ChargeScheduleRun(
+                        schedule=schedule,
+                        provider_account_id=schedule.provider_account_id,
+                        due_at=due,
+                        not_before=due + spread,
+                        **(
+                            {
+                                "status": ChargeScheduleRun.Status.SKIPPED,
+                                "error": "Missed by more than "
+                                f"{keep} runs of the schedule.",
+                            }
+                            if index < len(due_times) - keep
+                            else {}
+                        ),
+                    )
+                    for index, due in enumerate(due_times)
+                    if due not in planned_before
+                ]
+                ChargeScheduleRun.objects.bulk_create(runs)
+                planned += len(runs)
+                schedule.next_run_at = due_at
+                if schedule.ends_at is not None and due_at > schedule.ends_at:
+                    schedule.is_active = False
+                schedule.save(update_fields=["next_run_at", "is_active", "updated"])
+        return planned
+
+    def __str__(self):
+        return f"{self.name}"
+
+    class Meta:
+        verbose_name = _("charge schedule")
+        verbose_name_plural = _("charge schedules")
+        indexes = [models.Index(fields=["is_active", "next_run_at"])]
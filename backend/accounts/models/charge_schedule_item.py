@@ -0,0 +1,31 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class ChargeScheduleItem(models.Model):
+    schedule = models.ForeignKey(
+        "accounts.ChargeSchedule",
+        on_delete=models.CASCADE,
+        related_name="items",
+        verbose_name=_("schedule"),
+    )
+    phone_number = models.ForeignKey(
+        "accounts.PhoneNumber",
+        on_delete=models.CASCADE,
+        related_name="schedule_items",
+        verbose_name=_("phone number"),
+    )
+    amount = models.PositiveBigIntegerField(_("amount"))
+
+    def __str__(self):
+        return f"{self.schedule_id}: {self.phone_number_id} {self.amount}"
+
+    class Meta:
+        verbose_name = _("charge schedule item")
+        verbose_name_plural = _("charge schedule items")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["schedule", "phone_number"],
+                name="unique_charge_schedule_phone_number",
+            )
+        ]
@@ -0,0 +1,243 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from accounts.admission import WalletBusyError
+from core.models import TimestampMixin
+from core.transactions import is_transient
+from accounts.models import ChargeScheduleItem, RequestCharge
+from accounts.models.charge_job import LeaseLost
+
+logger = logging.getLogger("accounts")
+
+
+class ChargeScheduleRun(TimestampMixin, models.Model):
+    """
+    One due time of a ChargeSchedule. There is one row per schedule and due
+    time, so planning a run again is a no-op, and every charge of a run
+    carries an idempotency key, so processing it again charges nothing twice.
+    """
+
+    # Runs of a schedule turned off before its end are not charged. A schedule
+    # that ran out turns itself off, its last runs still go
+    INACTIVE = models.Q(schedule__is_active=False) & (
+        models.Q(schedule__ends_at__isnull=True)
+        | models.Q(schedule__next_run_at__lte=F("schedule__ends_at"))
+    )
+
+    class Status(models.TextChoices):
+        PENDING = "pending", _("pending")
+        PROCESSING = "processing", _("processing")
+        COMPLETED = "completed", _("completed")
+        FAILED = "failed", _("failed")
+        SKIPPED = "skipped", _("skipped")
+
+    schedule = models.ForeignKey(
+        "accounts.ChargeSchedule",
+        on_delete=models.CASCADE,
+        related_name="runs",
+        verbose_name=_("schedule"),
+    )
+    provider_account = models.ForeignKey(
+        "accounts.ProviderAccount",
+        on_delete=models.CASCADE,
+        related_name="charge_schedule_runs",
+        verbose_name=_("provider account"),
+    )
+    due_at = models.DateTimeField(_("due at"))
+    not_before = models.DateTimeField(
+        _("not before"), help_text=_("due time plus the spread of the schedule")
+    )
+    status = models.CharField(
+        _("status"), max_length=20, default=Status.PENDING, choices=Status.choices
+    )
+    lease_expires_at = models.DateTimeField(
+        _("lease expires at"),
+        blank=True,
+        null=True,
+        help_text=_("a processing run is taken over by another worker after it"),
+    )
+    takeovers = models.PositiveIntegerField(
+        _("takeovers"),
+        default=0,
+        help_text=_("times the run was taken over from a worker that stopped"),
+    )
+    last_item_id = models.PositiveBigIntegerField(_("last item id"), default=0)
+    processed_items = models.PositiveIntegerField(_("processed items"), default=0)
+    succeeded_items = models.PositiveIntegerField(_("succeeded items"), default=0)
+    failed_items = models.PositiveIntegerField(_("failed items"), default=0)
+    charged_amount = models.PositiveBigIntegerField(_("charged amount"), default=0)
+    failures = models.JSONField(_("failures"), default=list, blank=True)
+    error = models.TextField(_("error"), blank=True, default="")
+
+    @classmethod
+    def claim_next(cls, now=None):
+        """
+        The oldest ready run of a provider account that no worker is charging,
+        so that one worker charges a wallet at a time, or None. A run is
+        claimed alone, its lease renewed with every chunk it stores.
+        """
+        now = now or timezone.now()
+        stale = models.Q(status=cls.Status.PROCESSING, lease_expires_at__lte=now)
+        ready = models.Q(status=cls.Status.PENDING) | stale
+        max_takeovers = settings.CHARGE_SCHEDULE_MAX_TAKEOVERS
+        with transaction.atomic():
+            cls.skip_inactive(cls.objects.filter(ready, not_before__lte=now))
+            # A run that stops every worker taking it is not retried forever
+            cls.objects.filter(stale, takeovers__gte=max_takeovers).update(
+                status=cls.Status.FAILED,
+                lease_expires_at=None,
+                error=f"Stopped {max_takeovers + 1} workers without an outcome.",
+                updated=now,
+            )
+            busy = cls.objects.filter(
+                status=cls.Status.PROCESSING, lease_expires_at__gt=now
+            ).values("provider_account_id")
+            run = (
+                cls.objects.select_for_update(skip_locked=True)
+                .filter(ready, not_before__lte=now)
+                .exclude(provider_account_id__in=busy)
+                .select_related("schedule")
+                .order_by("not_before", "id")
+                .first()
+            )
+            if run is None:
+                return None
+            if run.status == cls.Status.PROCESSING:
+                run.takeovers += 1
+            run.status = cls.Status.PROCESSING
+            run.lease_expires_at = now + timedelta(
+                seconds=settings.CHARGE_SCHEDULE_LEASE_SECONDS
+            )
+            run.save(
+                update_fields=["status", "lease_expires_at", "takeovers", "updated"]
+            )
+            return run
+
+    @classmethod
+    def skip_inactive(cls, runs):
+        """Mark the ``runs`` of inactive schedules skipped, returns how many."""
+        return runs.filter(cls.INACTIVE).update(
+            status=cls.Status.SKIPPED,
+            lease_expires_at=None,
+            error="Schedule is inactive.",
+            updated=timezone.now(),
+        )
+
+    def process(self, chunk_size: int = 1000, pause: float = 0):
+        """
+        Charge the items of the schedule in batches of ``chunk_size``, each in
+        its own transaction with its progress, sleeping ``pause`` seconds in
+        between so that other charges get the wallet lock. Every save is
+        fenced on the lease of this claim, a worker whose run was taken over
+        stops without storing anything.
+        """
+        if self.skip_inactive(ChargeScheduleRun.objects.filter(id=self.id)):
+            self.status, self.lease_expires_at = self.Status.SKIPPED, None
+            return
+        try:
+            while chunk := list(
+                ChargeScheduleItem.objects.filter(
+                    schedule_id=self.schedule_id, id__gt=self.last_item_id
+                )
+                .order_by("id")
+                .values_list("id", "phone_number__number", "amount")[:chunk_size]
+            ):
+                self._process_chunk(chunk)
+                if pause:
+                    time.sleep(pause)
+        except LeaseLost:
+            outcome = None
+        except (PermissionError, ValueError) as e:
+            outcome = {"status": self.Status.FAILED, "error": str(e)}
+        except Exception as e:
+            if isinstance(e, WalletBusyError) or is_transient(e):
+                # Claimed again shortly, resuming after the last stored chunk
+                outcome = {
+                    "status": self.Status.PENDING,
+                    "not_before": timezone.now()
+                    + timedelta(seconds=settings.WALLET_BUSY_RETRY_AFTER),
+                }
+            else:
+                logger.exception(f"Charge schedule run {self.id} failed")
+                outcome = {
+                    "status": self.Status.FAILED,
+                    "error": f"{type(e).__name__}: {e}",
+                }
+        else:
+            outcome = {"status": self.Status.COMPLETED}
+        if outcome is None or not self._save_claimed(**outcome, lease_expires_at=None):
+            logger.warning(
+                f"Charge schedule run {self.id} was taken over by another worker"
+            )
+
+    def _save_claimed(self, **fields):
+        """Store ``fields`` if the run is still held by this claim."""
+        stored = ChargeScheduleRun.objects.filter(
+            id=self.id,
+            status=self.Status.PROCESSING,
+            lease_expires_at=self.lease_expires_at,
+        ).update(**fields, updated=timezone.now())
+        if not stored:
+            return False
+        for name, value in fields.items():
+            setattr(self, name, value)
+        return True
+
+    def _process_chunk(self, chunk):
+        with transaction.atomic():
+            results = RequestCharge.create_charge_batch(
+                provider_account_id=self.provider_account_id,
+                user_id=self.schedule.user_id,
+                items=[
+                    (number, amount, f"schedule-run:{self.id}:{item_id}")
+                    for item_id, number, amount in chunk
+                ],
+            )
+            succeeded = charged = 0
+            failures = []
+            for (item_id, number, amount), result in zip(chunk, results):
+                if isinstance(result, RequestCharge):
+                    succeeded += 1
+                    charged += result.amount
+                else:
+                    failures.append(
+                        {
+                            "item": item_id,
+                            "phone_number": number,
+                            "amount": amount,
+                            "error": result,
+                        }
+                    )
+            stored = self._save_claimed(
+                last_item_id=chunk[-1][0],
+                processed_items=self.processed_items + len(chunk),
+                succeeded_items=self.succeeded_items + succeeded,
+                failed_items=self.failed_items + len(failures),
+                charged_amount=self.charged_amount + charged,
+                failures=self.failures + failures,
+                lease_expires_at=timezone.now()
+                + timedelta(seconds=settings.CHARGE_SCHEDULE_LEASE_SECONDS),
+            )
+            if not stored:
+                # Taken over meanwhile, the chunk is rolled back
+                raise LeaseLost
+
+    def __str__(self):
+        return f"{self.schedule_id} at {self.due_at} ({self.status})"
+
+    class Meta:
+        verbose_name = _("charge schedule run")
+        verbose_name_plural = _("charge schedule runs")
+        indexes = [models.Index(fields=["status", "not_before"])]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["schedule", "due_at"], name="unique_charge_schedule_run"
+            )
+        ]
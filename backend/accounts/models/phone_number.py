@@ -1,14 +1,91 @@
+import io
 import random
 
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import connection, models, transaction
 from django.utils.translation import gettext_lazy as _
 
 from core.models import TimestampMixin
-from core.utils import PhoneNumberRegexValidation
+from core.utils import PhoneNumberRegexValidation, chunked
 
 
 class PhoneNumber(TimestampMixin, models.Model):
     number = models.CharField(
-        _("number"), max_length=11, validators=[PhoneNumberRegexValidation]
+        _("number"), max_length=11, unique=True, validators=[PhoneNumberRegexValidation]
     )
-    is_active = models.BooleanField(_("is_active"), default=True, db_index=True)
\ No newline at end of file
+    is_active = models.BooleanField(_("is_active"), default=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.number}"
+
+    @classmethod
+    def is_valid_number(cls, number: str) -> bool:
+        if len(number) != cls._meta.get_field("number").max_length:
+            return False
+        try:
+            PhoneNumberRegexValidation(number)
+        except ValidationError:
+            return False
+        return True
+
+    @classmethod
+    def bulk_import(cls, numbers, chunk_size: int = 5000, on_progress=None):
+        """
+        Stream ``numbers`` into the table in chunks of ``chunk_size``.
+        Invalid numbers are counted and dropped, numbers that already exist (in
+        the table or earlier in the stream) are skipped.
+        Memory use is bounded by the chunk size, not by the input size.
+        """
+        stats = {"read": 0, "invalid": 0, "created": 0, "skipped": 0}
+        for chunk in chunked(numbers, chunk_size):
+            valid = set()
+            for raw in chunk:
+                number = (raw or "").strip()
+                if cls.is_valid_number(number):
+                    valid.add(number)
+                else:
+                    stats["invalid"] += 1
+            if valid:
+                if connection.vendor == "postgresql":
+                    created = cls._copy_chunk(valid)
+                else:
+                    created = cls._bulk_create_chunk(valid)
+            else:
+                created = 0
+            stats["read"] += len(chunk)
+            stats["created"] += created
+            stats["skipped"] = stats["read"] - stats["invalid"] - stats["created"]
+            if on_progress:
+                on_progress(dict(stats))
+        return stats
+
+    @classmethod
+    def _bulk_create_chunk(cls, numbers) -> int:
+        existing = set(
+            cls.objects.filter(number__in=numbers).values_list("number", flat=True)
+        )
+        new_numbers = [cls(number=number) for number in numbers - existing]
+        cls.objects.bulk_create(new_numbers, ignore_conflicts=True)
+        return len(new_numbers)
+
+    @classmethod
+    def _copy_chunk(cls, numbers) -> int:
+        table = cls._meta.db_table
+        buffer = io.StringIO("\n".join(numbers) + "\n")
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS phone_number_import "
+                "(number varchar(11)) ON COMMIT DELETE ROWS"
+            )
+            copy_sql = "COPY phone_number_import (number) FROM STDIN"
+            if hasattr(cursor.cursor, "copy_expert"):  # psycopg2
+                cursor.cursor.copy_expert(copy_sql, buffer)
+            else:  # psycopg 3
+                with cursor.cursor.copy(copy_sql) as copy:
+                    copy.write(buffer.getvalue())
+            cursor.execute(
+                f"INSERT INTO {table} (number, is_active, created, updated) "
+                "SELECT number, true, now(), now() FROM phone_number_import "
+                "ON CONFLICT (number) DO NOTHING"
+            )
+            return cursor.rowcount
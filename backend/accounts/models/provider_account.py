@@ -8,6 +8,39 @@ from core.models import TimestampMixin
 class ProviderAccount(TimestampMixin, models.Model):
     name = models.CharField(_("name"), max_length=100, unique=True)
     is_active = models.BooleanField(_("is_active"), default=True, db_index=True)
+    reseller = models.ForeignKey(
+        "self",
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name="resold_accounts",
+        verbose_name=_("reseller"),
+        help_text=_("account whose admins may move balance to and from this one"),
+    )
+    charge_rate_limit = models.PositiveIntegerField(
+        _("charge rate limit"),
+        blank=True,
+        null=True,
+        help_text=_("charge requests per minute, empty uses the default"),
+    )
+    deposit_rate_limit = models.PositiveIntegerField(
+        _("deposit rate limit"),
+        blank=True,
+        null=True,
+        help_text=_("deposit requests per minute, empty uses the default"),
+    )
+    daily_spend_limit = models.PositiveBigIntegerField(
+        _("daily spend limit"),
+        blank=True,
+        null=True,
+        help_text=_("total charged per day, empty is unlimited"),
+    )
+    monthly_spend_limit = models.PositiveBigIntegerField(
+        _("monthly spend limit"),
+        blank=True,
+        null=True,
+        help_text=_("total charged per calendar month, empty is unlimited"),
+    )
 
     def __str__(self):
         return f"{self.name}"
@@ -32,6 +32,18 @@ class ProviderAccountTeamMember(TimestampMixin, models.Model):
         choices=PermissionLevel.choices,
         default=PermissionLevel.USER,
     )
+    daily_spend_limit = models.PositiveBigIntegerField(
+        _("daily spend limit"),
+        blank=True,
+        null=True,
+        help_text=_("total charged per day, empty is unlimited"),
+    )
+    monthly_spend_limit = models.PositiveBigIntegerField(
+        _("monthly spend limit"),
+        blank=True,
+        null=True,
+        help_text=_("total charged per calendar month, empty is unlimited"),
+    )
 
     def __str__(self):
         return f"{self.account.name} - {self.user.username} ({self.permission_level})"
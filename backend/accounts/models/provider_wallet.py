@@ -1,8 +1,17 @@
-from django.db import models, transaction
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 
 from core.models import TimestampMixin
+from accounts.models import (
+    ProviderAccount,
+    ProviderAccountTeamMember,
+    WalletTransfer,
+)
+from accounts.wallet_cache import wallet_changed
+from core.transactions import atomic_with_retry, set_local_lock_timeout
 
 
 class ProviderWallet(TimestampMixin, models.Model):
@@ -13,16 +22,112 @@ class ProviderWallet(TimestampMixin, models.Model):
         related_name="wallet",
     )
     balance = models.PositiveBigIntegerField(_("balance"), default=0)
+    held_balance = models.PositiveBigIntegerField(
+        _("held balance"),
+        default=0,
+        help_text=_("amount reserved by holds that are not captured yet"),
+    )
 
     @classmethod
+    @atomic_with_retry
     def deposit(cls, account_id: int, amount: int):
-        with transaction.atomic():
-            try:
-                account = cls.objects.get(account_id=account_id)
-                account.balance = models.F("balance") + amount
-                account.save()
-            except ProviderWallet.DoesNotExist:
-                raise ValueError("Provider account not found.")
+        # One UPDATE of the balance only, so held_balance moved by a hold in
+        # the meantime is not written back
+        updated = cls.objects.filter(account_id=account_id).update(
+            balance=models.F("balance") + amount, updated=timezone.now()
+        )
+        if not updated:
+            raise ValueError("Provider account not found.")
+        wallet_changed(account_id)
+
+    @classmethod
+    def transfer(cls, transfers, user_id: int):
+        """
+        ``transfer_preauthorized`` on behalf of the user ``user_id``, who must
+        be an admin of an account that is, or is the reseller of, both the
+        source and the destination of every transfer.
+        """
+        try:
+            requester = ProviderAccountTeamMember.objects.get(user_id=user_id)
+        except ProviderAccountTeamMember.DoesNotExist:
+            raise ValueError("Requester not found.")
+        managed = set()
+        if (
+            requester.permission_level
+            == ProviderAccountTeamMember.PermissionLevel.ADMIN
+        ):
+            managed = {requester.account_id} | set(
+                ProviderAccount.objects.filter(
+                    reseller_id=requester.account_id
+                ).values_list("id", flat=True)
+            )
+        for index, (source, destination, amount) in enumerate(transfers):
+            if source not in managed or destination not in managed:
+                raise PermissionError(
+                    f"Transfer {index}: The Requester user does not have "
+                    "permission to this action"
+                )
+        return cls.transfer_preauthorized(transfers, user_id=user_id)
+
+    @classmethod
+    @atomic_with_retry
+    def transfer_preauthorized(cls, transfers, user_id: int = None):
+        """
+        Move balance between wallets, all of ``transfers`` or none. Each one
+        is ``(source account id, destination account id, amount)``, applied in
+        order. The wallets involved are locked with one query in account id
+        order, the canonical lock order, so that transfers in opposite
+        directions wait for each other instead of deadlocking. Returns the
+        WalletTransfer rows recording the movements.
+
+        Nothing is checked about the user, callers on behalf of a provider go
+        through ``transfer``.
+        """
+        for index, (source, destination, amount) in enumerate(transfers):
+            if not amount or amount <= 0:
+                raise ValueError(f"Transfer {index}: amount must be positive.")
+            if source == destination:
+                raise ValueError(f"Transfer {index}: source and destination are equal.")
+        if not transfers:
+            return []
+
+        account_ids = {
+            account_id for transfer in transfers for account_id in transfer[:2]
+        }
+        set_local_lock_timeout(settings.WALLET_LOCK_TIMEOUT_MS)
+        wallets = {
+            wallet.account_id: wallet
+            for wallet in cls.objects.select_for_update()
+            .filter(account_id__in=account_ids)
+            .order_by("account_id")
+        }
+        for index, (source, destination, amount) in enumerate(transfers):
+            if source not in wallets or destination not in wallets:
+                raise ValueError(f"Transfer {index}: provider wallet not found.")
+            if wallets[source].balance < amount:
+                raise ValueError(
+                    f"Transfer {index}: insufficient balance in provider account."
+                )
+            wallets[source].balance -= amount
+            wallets[destination].balance += amount
+
+        now = timezone.now()
+        for wallet in wallets.values():
+            wallet.updated = now
+        cls.objects.bulk_update(wallets.values(), ["balance", "updated"])
+        for account_id in wallets:
+            wallet_changed(account_id)
+        return WalletTransfer.objects.bulk_create(
+            [
+                WalletTransfer(
+                    source_account_id=source,
+                    destination_account_id=destination,
+                    amount=amount,
+                    user_id=user_id,
+                )
+                for source, destination, amount in transfers
+            ]
+        )
 
     def __str__(self):
         return f"{self.account.name}"
@@ -1,8 +1,24 @@
+from django.conf import settings
 from django.db import models, transaction
 from django.utils.translation import gettext_lazy as _
 
+from accounts.admission import wallet_admission
+from accounts.dedup import (
+    DuplicateChargeError,
+    charge_dedup,
+    claim_charge,
+    release_charge,
+)
+from accounts.wallet_cache import wallet_changed
 from core.models import TimestampMixin
-from accounts.models import ProviderWallet, ProviderAccountTeamMember, PhoneNumber
+from core.transactions import atomic_with_retry, set_local_lock_timeout
+from accounts.models import (
+    ChargeDelivery,
+    ProviderWallet,
+    ProviderAccountTeamMember,
+    PhoneNumber,
+    SpendCounter,
+)
 
 
 class RequestCharge(TimestampMixin, models.Model):
@@ -26,60 +42,240 @@ class RequestCharge(TimestampMixin, models.Model):
         _("user_id"), help_text=_("id of requester user")
     )  # requester.user.id
     amount = models.PositiveBigIntegerField("amount", default="2000")
+    idempotency_key = models.CharField(
+        _("idempotency key"),
+        max_length=64,
+        blank=True,
+        null=True,
+        help_text=_("key sent by the provider, unique per account"),
+    )
 
     @classmethod
     def create_charge_safely(
         cls, phone_number_id: int, provider_account_id: int, user_id: int, amount: int
     ):
+        with charge_dedup(provider_account_id, phone_number_id, amount):
+            with wallet_admission(provider_account_id):
+                return cls._create_charge(
+                    phone_number_id, provider_account_id, user_id, amount
+                )
+
+    @classmethod
+    # A lock timeout is left to wallet_admission, which answers 429 at once
+    # instead of queueing again for the hot wallet
+    @atomic_with_retry(
+        retry_on={"deadlock", "serialization_failure", "database_locked"}
+    )
+    def _create_charge(
+        cls, phone_number_id: int, provider_account_id: int, user_id: int, amount: int
+    ):
+        try:
+            if not amount or amount <= 0:
+                raise ValueError("Charge amount must be positive.")
+            set_local_lock_timeout(settings.WALLET_LOCK_TIMEOUT_MS)
+            provider_wallet = ProviderWallet.objects.select_for_update().get(
+                account_id=provider_account_id
+            )
+            requester = ProviderAccountTeamMember.objects.select_related("account").get(
+                user_id=user_id
+            )
+
+            phone_number = PhoneNumber.objects.get(id=phone_number_id)
+
+            if provider_wallet.balance < amount:
+                raise ValueError("Insufficient balance in provider account.")
+            if (
+                requester.account_id != provider_account_id
+                or requester.permission_level
+                not in [
+                    ProviderAccountTeamMember.PermissionLevel.ADMIN,
+                    ProviderAccountTeamMember.PermissionLevel.STAFF,
+                ]
+            ):
+                raise PermissionError(
+                    "The Requester user does not have permission to this action"
+                )
+
+            SpendCounter.charge(SpendCounter.counters_of(requester), amount)
+            provider_wallet.balance = models.F("balance") - amount
+            provider_wallet.save(update_fields=["balance"])
+            wallet_changed(provider_account_id)
+
+            request_charge = cls.objects.create(
+                phone_number=phone_number,
+                provider_account_id=provider_account_id,
+                amount=amount,
+                user_id=user_id,
+                requester=requester,
+            )
+            ChargeDelivery.for_charge(request_charge, phone_number.number).save()
+            return request_charge
+        except ProviderWallet.DoesNotExist:
+            raise ValueError("Provider wallet not found.")
+        except PhoneNumber.DoesNotExist:
+            raise ValueError("Phone number not found.")
+        except ProviderAccountTeamMember.DoesNotExist:
+            raise ValueError("Requester not found.")
+        except Exception as e:
+            # TODO Handel Error
+            raise e
+
+    @classmethod
+    def create_charge_batch(cls, provider_account_id: int, user_id: int, items):
+        """
+        Charge many ``(phone number, amount)`` items from one wallet while
+        locking it once. Returns one entry per item, in order: the created
+        charge or the error message of the rejected item.
+
+        Items may carry an idempotency key as third element. An item whose key
+        was already charged for the account returns that charge again. Items
+        without one are rejected as duplicates like ``create_charge_safely``
+        charges, within the dedup window.
+        """
+        try:
+            requester = ProviderAccountTeamMember.objects.select_related("account").get(
+                user_id=user_id
+            )
+        except ProviderAccountTeamMember.DoesNotExist:
+            raise ValueError("Requester not found.")
+        if (
+            requester.account_id != provider_account_id
+            or requester.permission_level
+            not in [
+                ProviderAccountTeamMember.PermissionLevel.ADMIN,
+                ProviderAccountTeamMember.PermissionLevel.STAFF,
+            ]
+        ):
+            raise PermissionError(
+                "The Requester user does not have permission to this action"
+            )
+
+        phone_numbers = {
+            number: (phone_number_id, is_active)
+            for number, phone_number_id, is_active in PhoneNumber.objects.filter(
+                number__in={item[0] for item in items}
+            ).values_list("number", "id", "is_active")
+        }
+
+        results = [None] * len(items)
+        # Claimed before queueing for the wallet lock, as single charges are
+        claims = {}
+        try:
+            for index, (number, amount, *key) in enumerate(items):
+                if (key and key[0]) or not amount or amount <= 0:
+                    continue
+                if not phone_numbers.get(number, (None, False))[1]:
+                    continue
+                try:
+                    claims[index] = claim_charge(
+                        provider_account_id, phone_numbers[number][0], amount
+                    )
+                except DuplicateChargeError as e:
+                    results[index] = str(e)
+            cls._charge_batch(requester, user_id, phone_numbers, items, results)
+        except BaseException:
+            for claim in claims.values():
+                release_charge(claim)
+            raise
+        for index, claim in claims.items():
+            if not isinstance(results[index], RequestCharge):
+                release_charge(claim)
+        return results
+
+    @classmethod
+    def _charge_batch(cls, requester, user_id, phone_numbers, items, results):
+        """Fill in ``results`` for the items without one, under the wallet lock."""
+        provider_account_id = requester.account_id
         with transaction.atomic():
             try:
-                if not amount or amount <= 0:
-                    raise ValueError("Charge amount must be positive.")
                 provider_wallet = ProviderWallet.objects.select_for_update().get(
                     account_id=provider_account_id
                 )
-                requester = ProviderAccountTeamMember.objects.get(user_id=user_id)
-
-                phone_number = PhoneNumber.objects.get(id=phone_number_id)
-
-                if provider_wallet.balance < amount:
-                    raise ValueError("Insufficient balance in provider account.")
-                if (
-                    requester.account.id != provider_account_id
-                    or requester.permission_level
-                    not in [
-                        ProviderAccountTeamMember.PermissionLevel.ADMIN,
-                        ProviderAccountTeamMember.PermissionLevel.STAFF,
-                    ]
-                ):
-                    raise PermissionError(
-                        "The Requester user does not have permission to this action"
+            except ProviderWallet.DoesNotExist:
+                raise ValueError("Provider wallet not found.")
+
+            # Looked up under the wallet lock, keys are unique per account
+            keys = {item[2] for item in items if len(item) > 2 and item[2]}
+            charged = (
+                {
+                    charge.idempotency_key: charge
+                    for charge in cls.objects.filter(
+                        provider_account_id=provider_account_id,
+                        idempotency_key__in=keys,
                     )
+                }
+                if keys
+                else {}
+            )
 
-                provider_wallet.balance = models.F("balance") - amount
-                provider_wallet.save(update_fields=["balance"])
+            remaining = provider_wallet.balance
+            counters = SpendCounter.counters_of(requester)
+            headroom = SpendCounter.headroom(counters)
+            charges = []
+            for index, (number, amount, *key) in enumerate(items):
+                key = key[0] if key else None
+                if results[index] is not None:
+                    continue
+                elif key in charged:
+                    results[index] = charged[key]
+                elif key is not None and not 0 < len(key) <= 64:
+                    results[index] = "Invalid idempotency key."
+                elif not amount or amount <= 0:
+                    results[index] = "Charge amount must be positive."
+                elif number not in phone_numbers:
+                    results[index] = "Phone number not found."
+                elif not phone_numbers[number][1]:
+                    results[index] = "Phone number is not active."
+                elif remaining < amount:
+                    results[index] = "Insufficient balance in provider account."
+                elif capped := [
+                    counter for counter, left in headroom.items() if left < amount
+                ]:
+                    results[index] = SpendCounter.label(*capped[0])
+                else:
+                    remaining -= amount
+                    for counter in headroom:
+                        headroom[counter] -= amount
+                    charge = cls(
+                        phone_number_id=phone_numbers[number][0],
+                        provider_account_id=provider_account_id,
+                        amount=amount,
+                        user_id=user_id,
+                        requester=requester,
+                        idempotency_key=key,
+                    )
+                    charges.append((index, number, charge))
+                    if key is not None:
+                        charged[key] = charge
 
-                request_charge = cls.objects.create(
-                    phone_number=phone_number,
-                    provider_account=provider_wallet.account,
-                    amount=amount,
-                    user_id=user_id,
-                    requester=requester,
+            if charges:
+                SpendCounter.charge(counters, provider_wallet.balance - remaining)
+                provider_wallet.balance = models.F("balance") - (
+                    provider_wallet.balance - remaining
                 )
-                return request_charge
-            except ProviderWallet.DoesNotExist:
-                raise ValueError("Provider wallet not found.")
-            except PhoneNumber.DoesNotExist:
-                raise ValueError("Phone number not found.")
-            except ProviderAccountTeamMember.DoesNotExist:
-                raise ValueError("Requester not found.")
-            except Exception as e:
-                # TODO Handel Error
-                raise e
+                provider_wallet.save(update_fields=["balance"])
+                wallet_changed(provider_account_id)
+                cls.objects.bulk_create([charge for index, number, charge in charges])
+                ChargeDelivery.objects.bulk_create(
+                    [
+                        ChargeDelivery.for_charge(charge, number)
+                        for index, number, charge in charges
+                    ]
+                )
+                for index, number, charge in charges:
+                    results[index] = charge
 
     def __str__(self):
-        return f"{self.name}"
+        return f"{self.id}"
 
     class Meta:
         verbose_name = _("request of charge")
         verbose_name_plural = _("requests of charges")
+        indexes = [models.Index(fields=["provider_account", "id"])]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["provider_account", "idempotency_key"],
+                condition=models.Q(idempotency_key__isnull=False),
+                name="unique_charge_idempotency_key",
+            )
+        ]
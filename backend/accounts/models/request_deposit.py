@@ -7,6 +7,9 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 
 from core.models import TimestampMixin
+from core.transactions import atomic_with_retry
+from accounts.wallet_cache import account_channel, wallet_changed
+from core import events
 from accounts.models import ProviderWallet, ProviderAccountTeamMember
 
 from simple_history.models import HistoricalRecords
@@ -64,10 +67,14 @@ class RequestDeposit(TimestampMixin, models.Model):
                     _("Cannot change the status of a finalized deposit request.")
                 )
 
+    @atomic_with_retry
     def save(self, *args, **kwargs):
         if self.pk:
             is_new = False
-            original_request_deposit = RequestDeposit.objects.get(pk=self.pk)
+            # Locked so that concurrent approvals credit the wallet once
+            original_request_deposit = RequestDeposit.objects.select_for_update().get(
+                pk=self.pk
+            )
             if original_request_deposit.is_finalized():
                 raise ValidationError(_("Cannot modify a finalized deposit request."))
             else:
@@ -89,6 +96,19 @@ class RequestDeposit(TimestampMixin, models.Model):
                 self.user_id = self.requester.user.id
 
         super().save(*args, **kwargs)
+        # Listed in the wallet summary
+        wallet_changed(self.account_id)
+        if self.status != original_status:
+            events.publish_on_commit(
+                account_channel(self.account_id),
+                {
+                    "type": "deposit",
+                    "id": self.id,
+                    "account": self.account_id,
+                    "amount": self.amount,
+                    "status": self.status,
+                },
+            )
 
         if (
             self.status == self.Status.APPROVED
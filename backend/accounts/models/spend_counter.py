@@ -0,0 +1,173 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, models, router
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class SpendCounter(models.Model):
+    """
+    Total charged by a provider account or a team member in one day or month.
+    ``charge`` adds to all counters of a charge with one conditional upsert,
+    in the transaction of the wallet debit, so a limit check reads and writes
+    one row per counter however many charges came before. A new window starts
+    with a new row, ``prune`` deletes the windows that are over.
+    """
+
+    class Period(models.TextChoices):
+        DAY = "day", _("day")
+        MONTH = "month", _("month")
+
+    scope = models.CharField(
+        _("scope"), max_length=32, help_text=_("account:<id> or member:<id>")
+    )
+    period = models.CharField(_("period"), max_length=5, choices=Period.choices)
+    window_start = models.DateField(_("window start"))
+    amount = models.PositiveBigIntegerField(_("amount"), default=0)
+    cap = models.PositiveBigIntegerField(
+        _("cap"),
+        blank=True,
+        null=True,
+        help_text=_("limit in force at the last charge, empty is unlimited"),
+    )
+
+    LIMIT_FIELDS = {
+        Period.DAY: "daily_spend_limit",
+        Period.MONTH: "monthly_spend_limit",
+    }
+    LABELS = {
+        ("account", Period.DAY): "Daily spend limit of the provider account reached.",
+        (
+            "account",
+            Period.MONTH,
+        ): "Monthly spend limit of the provider account reached.",
+        ("member", Period.DAY): "Daily spend limit of the requester reached.",
+        ("member", Period.MONTH): "Monthly spend limit of the requester reached.",
+    }
+
+    @staticmethod
+    def window_of(period, day):
+        return day if period == SpendCounter.Period.DAY else day.replace(day=1)
+
+    @classmethod
+    def counters_of(cls, requester, day=None):
+        """
+        ``(scope, period, window start, cap)`` of the counters a charge of
+        ``requester`` adds to, ``requester.account`` should be selected with it.
+        """
+        day = day or timezone.localdate()
+        account = requester.account
+        return [
+            (
+                f"{kind}:{owner.id}",
+                period,
+                cls.window_of(period, day),
+                getattr(owner, cls.LIMIT_FIELDS[period]),
+            )
+            for kind, owner in (("account", account), ("member", requester))
+            for period in (cls.Period.DAY, cls.Period.MONTH)
+        ]
+
+    @classmethod
+    def headroom(cls, counters):
+        """``{(scope, period): amount left}`` of the capped ``counters``."""
+        capped = [counter for counter in counters if counter[3] is not None]
+        if not capped:
+            return {}
+        lookup = models.Q()
+        for scope, period, window_start, cap in capped:
+            lookup |= models.Q(scope=scope, period=period, window_start=window_start)
+        spent = {
+            (scope, period): amount
+            for scope, period, amount in cls.objects.filter(lookup).values_list(
+                "scope", "period", "amount"
+            )
+        }
+        return {
+            (scope, period): max(0, cap - spent.get((scope, period), 0))
+            for scope, period, window_start, cap in capped
+        }
+
+    @classmethod
+    def charge(cls, counters, amount, using=None):
+        """
+        Add ``amount`` to ``counters`` unless that takes one over its cap, in
+        which case ValueError is raised and the caller's transaction must roll
+        back. Counters are always kept, so a cap set mid window applies to the
+        whole window.
+        """
+        for scope, period, window_start, cap in counters:
+            if cap is not None and amount > cap:
+                raise ValueError(cls.label(scope, period))
+        using = using or router.db_for_write(cls)
+        adapt = connections[using].ops.adapt_datefield_value
+        table = cls._meta.db_table
+        values = ", ".join(["(%s, %s, %s, %s, %s)"] * len(counters))
+        params = []
+        for scope, period, window_start, cap in counters:
+            params += [scope, period, adapt(window_start), amount, cap]
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} (scope, period, window_start, amount, cap) "
+                f"VALUES {values} "
+                "ON CONFLICT (scope, period, window_start) DO UPDATE "
+                f"SET amount = {table}.amount + excluded.amount, cap = excluded.cap "
+                f"WHERE excluded.cap IS NULL OR {table}.amount + excluded.amount "
+                "<= excluded.cap "
+                "RETURNING scope, period",
+                params,
+            )
+            added = set(cursor.fetchall())
+        for scope, period, window_start, cap in counters:
+            if (scope, period) not in added:
+                raise ValueError(cls.label(scope, period))
+
+    @classmethod
+    def refund(cls, account_id, requester_id, day, amount):
+        """
+        Take ``amount`` of a charge made on ``day`` off its counters once the
+        money went back to the wallet. Windows already pruned are left alone.
+        """
+        lookup = models.Q()
+        for scope in (f"account:{account_id}", f"member:{requester_id}"):
+            for period in (cls.Period.DAY, cls.Period.MONTH):
+                lookup |= models.Q(
+                    scope=scope, period=period, window_start=cls.window_of(period, day)
+                )
+        cls.objects.filter(lookup).update(amount=Greatest(F("amount") - amount, 0))
+
+    @classmethod
+    def label(cls, scope, period):
+        return cls.LABELS[(scope.split(":")[0], period)]
+
+    @classmethod
+    def prune(cls, batch_size: int = 1000):
+        """Delete one batch of the windows older than the retention."""
+        before = timezone.localdate() - timedelta(
+            days=settings.SPEND_COUNTER_RETENTION_DAYS
+        )
+        ids = list(
+            cls.objects.filter(window_start__lt=before).values_list("id", flat=True)[
+                :batch_size
+            ]
+        )
+        if ids:
+            cls.objects.filter(id__in=ids).delete()
+        return len(ids)
+
+    def __str__(self):
+        return f"{self.scope} {self.period} {self.window_start}"
+
+    class Meta:
+        verbose_name = _("spend counter")
+        verbose_name_plural = _("spend counters")
+        indexes = [models.Index(fields=["window_start"])]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["scope", "period", "window_start"],
+                name="unique_spend_counter_window",
+            )
+        ]
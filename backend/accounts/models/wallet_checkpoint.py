@@ -0,0 +1,163 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Max, Q, Sum
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from core.models import TimestampMixin
+from accounts.models import (
+    ChargeRefund,
+    ProviderWallet,
+    RequestCharge,
+    RequestDeposit,
+    WalletTransfer,
+)
+
+
+def _total(queryset):
+    return queryset.aggregate(total=Sum("amount"))["total"] or 0
+
+
+def _net_transfers(queryset, account_id):
+    """Transferred into the wallet minus transferred out of it."""
+    return _total(queryset.filter(destination_account_id=account_id)) - _total(
+        queryset.filter(source_account_id=account_id)
+    )
+
+
+class WalletCheckpoint(TimestampMixin, models.Model):
+    """
+    High-water marks of the ledger rows already summed for a wallet, so a
+    reconciliation only has to read rows created since the previous run.
+    """
+
+    account = models.OneToOneField(
+        "accounts.ProviderAccount",
+        on_delete=models.CASCADE,
+        related_name="wallet_checkpoint",
+        verbose_name=_("account"),
+    )
+    last_charge_id = models.PositiveBigIntegerField(_("last charge id"), default=0)
+    charge_total = models.PositiveBigIntegerField(_("charge total"), default=0)
+    last_deposit_history_id = models.PositiveBigIntegerField(
+        _("last deposit history id"), default=0
+    )
+    deposit_total = models.PositiveBigIntegerField(_("deposit total"), default=0)
+    last_refund_id = models.PositiveBigIntegerField(_("last refund id"), default=0)
+    refund_total = models.PositiveBigIntegerField(_("refund total"), default=0)
+    last_transfer_id = models.PositiveBigIntegerField(_("last transfer id"), default=0)
+    transfer_total = models.BigIntegerField(
+        _("transfer total"), default=0, help_text=_("transferred in minus out")
+    )
+    drift = models.BigIntegerField(_("drift"), default=0)
+
+    @classmethod
+    def reconcile(cls, account_id: int, settle_seconds: int = None):
+        """
+        Compare the wallet balance with approved deposits minus charges plus
+        refunds plus net transfers, and move the checkpoint over rows older than
+        ``settle_seconds``, which are assumed to be committed by now.
+        """
+        if settle_seconds is None:
+            settle_seconds = settings.RECONCILIATION_SETTLE_SECONDS
+        settled_before = timezone.now() - timedelta(seconds=settle_seconds)
+        cls.objects.get_or_create(account_id=account_id)
+
+        with transaction.atomic():
+            checkpoint = cls.objects.select_for_update().get(account_id=account_id)
+            charges = RequestCharge.objects.filter(
+                provider_account_id=account_id, id__gt=checkpoint.last_charge_id
+            )
+            deposits = RequestDeposit.history.filter(
+                account_id=account_id,
+                history_type="~",
+                status=RequestDeposit.Status.APPROVED,
+                history_id__gt=checkpoint.last_deposit_history_id,
+            )
+            refunds = ChargeRefund.objects.filter(
+                provider_account_id=account_id, id__gt=checkpoint.last_refund_id
+            )
+            transfers = WalletTransfer.objects.filter(
+                Q(source_account_id=account_id) | Q(destination_account_id=account_id),
+                id__gt=checkpoint.last_transfer_id,
+            )
+
+            last_charge_id = charges.filter(created__lt=settled_before).aggregate(
+                last=Max("id")
+            )["last"]
+            if last_charge_id is not None:
+                checkpoint.charge_total += _total(
+                    charges.filter(id__lte=last_charge_id)
+                )
+                checkpoint.last_charge_id = last_charge_id
+            last_deposit_id = deposits.filter(
+                history_date__lt=settled_before
+            ).aggregate(last=Max("history_id"))["last"]
+            if last_deposit_id is not None:
+                checkpoint.deposit_total += _total(
+                    deposits.filter(history_id__lte=last_deposit_id)
+                )
+                checkpoint.last_deposit_history_id = last_deposit_id
+            last_refund_id = refunds.filter(created__lt=settled_before).aggregate(
+                last=Max("id")
+            )["last"]
+            if last_refund_id is not None:
+                checkpoint.refund_total += _total(
+                    refunds.filter(id__lte=last_refund_id)
+                )
+                checkpoint.last_refund_id = last_refund_id
+            last_transfer_id = transfers.filter(created__lt=settled_before).aggregate(
+                last=Max("id")
+            )["last"]
+            if last_transfer_id is not None:
+                checkpoint.transfer_total += _net_transfers(
+                    transfers.filter(id__lte=last_transfer_id), account_id
+                )
+                checkpoint.last_transfer_id = last_transfer_id
+
+            # Holding the wallet lock keeps charges and deposits out while the
+            # unsettled tail is summed, so balance and ledger are consistent.
+            try:
+                wallet = ProviderWallet.objects.select_for_update().get(
+                    account_id=account_id
+                )
+            except ProviderWallet.DoesNotExist:
+                raise ValueError("Provider wallet not found.")
+            expected_balance = (
+                checkpoint.deposit_total
+                + _total(
+                    deposits.filter(history_id__gt=checkpoint.last_deposit_history_id)
+                )
+                - checkpoint.charge_total
+                - _total(charges.filter(id__gt=checkpoint.last_charge_id))
+                + checkpoint.refund_total
+                + _total(refunds.filter(id__gt=checkpoint.last_refund_id))
+                + checkpoint.transfer_total
+                + _net_transfers(
+                    transfers.filter(id__gt=checkpoint.last_transfer_id), account_id
+                )
+            )
+            # Held amounts left the balance but are not charged yet
+            checkpoint.drift = wallet.balance + wallet.held_balance - expected_balance
+            checkpoint.save()
+
+        return {
+            "account_id": account_id,
+            "balance": wallet.balance,
+            "held_balance": wallet.held_balance,
+            "expected_balance": expected_balance,
+            "drift": checkpoint.drift,
+            "last_charge_id": checkpoint.last_charge_id,
+            "last_deposit_history_id": checkpoint.last_deposit_history_id,
+            "last_refund_id": checkpoint.last_refund_id,
+            "last_transfer_id": checkpoint.last_transfer_id,
+        }
+
+    def __str__(self):
+        return f"{self.account_id}"
+
+    class Meta:
+        verbose_name = _("wallet checkpoint")
+        verbose_name_plural = _("wallet checkpoints")
@@ -0,0 +1,210 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from accounts.wallet_cache import wallet_changed
+from core.models import TimestampMixin
+from accounts.models import (
+    ChargeDelivery,
+    PhoneNumber,
+    ProviderAccountTeamMember,
+    ProviderWallet,
+    RequestCharge,
+    SpendCounter,
+)
+
+
+class WalletHold(TimestampMixin, models.Model):
+    """
+    Amount moved from a wallet balance to its held balance until the charge is
+    captured or released. Every step is a single conditional UPDATE, so the
+    wallet row is locked only for the length of a short transaction. The hold
+    counts towards the spend limits when it is made and is taken off them when
+    its funds go back.
+    """
+
+    class Status(models.TextChoices):
+        HELD = "held", _("held")
+        CAPTURED = "captured", _("captured")
+        RELEASED = "released", _("released")
+        EXPIRED = "expired", _("expired")
+
+    provider_account = models.ForeignKey(
+        "accounts.ProviderAccount",
+        on_delete=models.CASCADE,
+        related_name="wallet_holds",
+        verbose_name=_("provider account"),
+    )
+    phone_number = models.ForeignKey(
+        "accounts.PhoneNumber",
+        on_delete=models.CASCADE,
+        related_name="wallet_holds",
+        verbose_name=_("phone number"),
+    )
+    requester = models.ForeignKey(
+        "accounts.ProviderAccountTeamMember",
+        on_delete=models.CASCADE,
+        related_name="wallet_holds",
+        verbose_name=_("requester"),
+    )
+    user_id = models.PositiveBigIntegerField(
+        _("user_id"), help_text=_("id of requester user")
+    )
+    amount = models.PositiveBigIntegerField(_("amount"))
+    status = models.CharField(
+        _("status"), max_length=20, default=Status.HELD, choices=Status.choices
+    )
+    expires_at = models.DateTimeField(_("expires at"))
+    charge = models.OneToOneField(
+        "accounts.RequestCharge",
+        on_delete=models.SET_NULL,
+        related_name="hold",
+        verbose_name=_("charge"),
+        blank=True,
+        null=True,
+    )
+
+    @classmethod
+    def reserve(
+        cls,
+        phone_number_id: int,
+        provider_account_id: int,
+        user_id: int,
+        amount: int,
+        ttl: int = None,
+    ):
+        if not amount or amount <= 0:
+            raise ValueError("Charge amount must be positive.")
+        try:
+            requester = ProviderAccountTeamMember.objects.select_related("account").get(
+                user_id=user_id
+            )
+        except ProviderAccountTeamMember.DoesNotExist:
+            raise ValueError("Requester not found.")
+        if (
+            requester.account_id != provider_account_id
+            or requester.permission_level
+            not in [
+                ProviderAccountTeamMember.PermissionLevel.ADMIN,
+                ProviderAccountTeamMember.PermissionLevel.STAFF,
+            ]
+        ):
+            raise PermissionError(
+                "The Requester user does not have permission to this action"
+            )
+        if not PhoneNumber.objects.filter(id=phone_number_id).exists():
+            raise ValueError("Phone number not found.")
+
+        ttl = settings.WALLET_HOLD_TTL_SECONDS if ttl is None else ttl
+        with transaction.atomic():
+            reserved = ProviderWallet.objects.filter(
+                account_id=provider_account_id, balance__gte=amount
+            ).update(
+                balance=F("balance") - amount,
+                held_balance=F("held_balance") + amount,
+            )
+            if not reserved:
+                if not ProviderWallet.objects.filter(
+                    account_id=provider_account_id
+                ).exists():
+                    raise ValueError("Provider wallet not found.")
+                raise ValueError("Insufficient balance in provider account.")
+            SpendCounter.charge(SpendCounter.counters_of(requester), amount)
+            wallet_changed(provider_account_id)
+            return cls.objects.create(
+                provider_account_id=provider_account_id,
+                phone_number_id=phone_number_id,
+                requester=requester,
+                user_id=user_id,
+                amount=amount,
+                expires_at=timezone.now() + timedelta(seconds=ttl),
+            )
+
+    def _settle(self, status, refund: bool):
+        now = timezone.now()
+        holds = WalletHold.objects.filter(id=self.id, status=self.Status.HELD)
+        if not refund:
+            holds = holds.filter(expires_at__gt=now)
+        settled = holds.update(status=status, updated=now)
+        if not settled:
+            raise ValueError("Hold is not active.")
+        self.status = status
+        ProviderWallet.objects.filter(account_id=self.provider_account_id).update(
+            held_balance=F("held_balance") - self.amount,
+            **({"balance": F("balance") + self.amount} if refund else {}),
+        )
+        wallet_changed(self.provider_account_id)
+
+    def capture(self):
+        with transaction.atomic():
+            self._settle(self.Status.CAPTURED, refund=False)
+            self.charge = RequestCharge.objects.create(
+                phone_number_id=self.phone_number_id,
+                provider_account_id=self.provider_account_id,
+                amount=self.amount,
+                user_id=self.user_id,
+                requester_id=self.requester_id,
+            )
+            ChargeDelivery.for_charge(self.charge, self.phone_number.number).save()
+            self.save(update_fields=["charge", "updated"])
+        return self.charge
+
+    def release(self):
+        with transaction.atomic():
+            self._settle(self.Status.RELEASED, refund=True)
+            SpendCounter.refund(
+                self.provider_account_id,
+                self.requester_id,
+                timezone.localdate(self.created),
+                self.amount,
+            )
+
+    @classmethod
+    def sweep_expired(cls, batch_size: int = 1000):
+        """Return the funds of one batch of expired holds to their wallets."""
+        with transaction.atomic():
+            ids = list(
+                cls.objects.select_for_update(skip_locked=True)
+                .filter(status=cls.Status.HELD, expires_at__lte=timezone.now())
+                .order_by("expires_at")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                return 0
+            expired = cls.objects.filter(id__in=ids)
+            totals = (
+                expired.values("provider_account_id")
+                .annotate(total=Sum("amount"))
+                .order_by("provider_account_id")  # canonical lock order
+            )
+            for row in totals:
+                ProviderWallet.objects.filter(
+                    account_id=row["provider_account_id"]
+                ).update(
+                    balance=F("balance") + row["total"],
+                    held_balance=F("held_balance") - row["total"],
+                )
+                wallet_changed(row["provider_account_id"])
+            for hold in expired.only(
+                "provider_account_id", "requester_id", "amount", "created"
+            ):
+                SpendCounter.refund(
+                    hold.provider_account_id,
+                    hold.requester_id,
+                    timezone.localdate(hold.created),
+                    hold.amount,
+                )
+            expired.update(status=cls.Status.EXPIRED, updated=timezone.now())
+        return len(ids)
+
+    def __str__(self):
+        return f"{self.id} ({self.status})"
+
+    class Meta:
+        verbose_name = _("wallet hold")
+        verbose_name_plural = _("wallet holds")
+        indexes = [models.Index(fields=["status", "expires_at"])]
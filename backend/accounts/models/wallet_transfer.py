@@ -0,0 +1,36 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from core.models import TimestampMixin
+
+
+class WalletTransfer(TimestampMixin, models.Model):
+    """Balance moved from one provider wallet to another, see ProviderWallet.transfer."""
+
+    source_account = models.ForeignKey(
+        "accounts.ProviderAccount",
+        on_delete=models.CASCADE,
+        related_name="outgoing_transfers",
+        verbose_name=_("source account"),
+    )
+    destination_account = models.ForeignKey(
+        "accounts.ProviderAccount",
+        on_delete=models.CASCADE,
+        related_name="incoming_transfers",
+        verbose_name=_("destination account"),
+    )
+    amount = models.PositiveBigIntegerField(_("amount"))
+    user_id = models.PositiveBigIntegerField(
+        _("user_id"), blank=True, null=True, help_text=_("id of requester user")
+    )
+
+    def __str__(self):
+        return f"{self.source_account_id} -> {self.destination_account_id}"
+
+    class Meta:
+        verbose_name = _("wallet transfer")
+        verbose_name_plural = _("wallet transfers")
+        indexes = [
+            models.Index(fields=["source_account", "id"]),
+            models.Index(fields=["destination_account", "id"]),
+        ]
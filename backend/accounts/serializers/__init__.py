@@ -1,6 +1,19 @@
-from .request_charge import RequestChargeCreateSerializer, RequestChargeDetailSerializer
+from .request_charge import (
+    RequestChargeCreateSerializer,
+    RequestChargeDetailSerializer,
+    RequestChargeDetailValuesSerializer,
+)
 from .request_deposit import (
     RequestDepositDetailSerializer,
     RequestDepositSerializer,
     RequestDepositCreateSerializer,
+    RequestDepositValuesSerializer,
+    RequestDepositDetailValuesSerializer,
+)
+from .charge_job import ChargeJobCreateSerializer, ChargeJobSerializer
+from .wallet_summary import (
+    WalletSummarySerializer,
+    WalletValuesSerializer,
+    WalletChargeValuesSerializer,
+    WalletDepositValuesSerializer,
 )
@@ -0,0 +1,71 @@
+from django.urls import reverse
+from rest_framework import serializers
+from rest_framework.exceptions import PermissionDenied
+
+from accounts.models import ChargeJob, ProviderAccount, ProviderAccountTeamMember
+
+
+class ChargeJobCreateSerializer(serializers.ModelSerializer):
+    provider_account = serializers.PrimaryKeyRelatedField(
+        queryset=ProviderAccount.objects.filter(is_active=True),
+    )
+    source_file = serializers.FileField(
+        help_text="csv file of phone_number,amount rows"
+    )
+
+    class Meta:
+        model = ChargeJob
+        fields = ["provider_account", "source_file"]
+
+    def validate(self, data):
+        user = self.context["request"].user
+        try:
+            requester = user.team
+        except ProviderAccountTeamMember.DoesNotExist:
+            raise PermissionDenied()
+        if requester.account_id != data["provider_account"].id or (
+            requester.permission_level
+            not in [
+                ProviderAccountTeamMember.PermissionLevel.ADMIN,
+                ProviderAccountTeamMember.PermissionLevel.STAFF,
+            ]
+        ):
+            raise PermissionDenied()
+        data["requester"] = requester
+        data["user_id"] = user.id
+        return data
+
+    def create(self, validated_data):
+        source_file = validated_data["source_file"]
+        validated_data["total_rows"] = ChargeJob.count_rows(source_file.file)
+        return super().create(validated_data)
+
+
+class ChargeJobSerializer(serializers.ModelSerializer):
+    result_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ChargeJob
+        fields = (
+            "id",
+            "provider_account",
+            "status",
+            "total_rows",
+            "processed_rows",
+            "succeeded_rows",
+            "failed_rows",
+            "charged_amount",
+            "progress",
+            "error",
+            "result_url",
+            "created",
+            "updated",
+        )
+        read_only_fields = fields
+
+    def get_result_url(self, obj) -> str | None:
+        if obj.status not in [ChargeJob.Status.COMPLETED, ChargeJob.Status.FAILED]:
+            return None
+        request = self.context.get("request")
+        url = reverse("charge_job_result", args=[obj.id])
+        return request.build_absolute_uri(url) if request else url
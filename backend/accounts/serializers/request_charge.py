@@ -1,8 +1,10 @@
 from rest_framework import serializers
 
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, Throttled
 
+from accounts.admission import WalletBusyError
 from accounts.models import RequestCharge, PhoneNumber, ProviderAccount
+from core.serializers import ValuesSerializer
 from core.utils import PhoneNumberRegexValidation
 
 
@@ -38,6 +40,8 @@ class RequestChargeCreateSerializer(serializers.ModelSerializer):
                 user_id=user.id,
             )
             return request_charge
+        except WalletBusyError as e:
+            raise Throttled(wait=e.retry_after, detail=str(e))
         except PermissionError as e:
             raise PermissionDenied()
         except ValueError as e:
@@ -59,4 +63,14 @@ class RequestChargeDetailSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = RequestCharge
-        fields = ["number", "account_name", "amount"]
\ No newline at end of file
+        fields = ["number", "account_name", "amount"]
+
+
+class RequestChargeDetailValuesSerializer(ValuesSerializer):
+    """Same output as RequestChargeDetailSerializer."""
+
+    fields = {
+        "number": "phone_number__number",
+        "account_name": "provider_account__name",
+        "amount": "amount",
+    }
@@ -5,6 +5,7 @@ from rest_framework.exceptions import PermissionDenied
 
 
 from accounts.models import RequestDeposit, PhoneNumber, ProviderAccount
+from core.serializers import BlankAsNullCharField, ValuesSerializer
 
 
 class RequestDepositCreateSerializer(serializers.ModelSerializer):
@@ -74,7 +75,8 @@ class RequestDepositSerializer(serializers.ModelSerializer):
 
 
 class RequestDepositDetailSerializer(RequestDepositSerializer):
-    comment = serializers.TimeField(read_only=True)
+    # Blank comments have always been rendered as null
+    comment = BlankAsNullCharField(read_only=True, allow_null=True)
     assignee_username = serializers.CharField(
         source="assignee.username", read_only=True
     )
@@ -82,3 +84,29 @@ class RequestDepositDetailSerializer(RequestDepositSerializer):
     class Meta:
         model = RequestDeposit
         fields = RequestDepositSerializer.Meta.fields + ("comment", "assignee_username")
+
+
+class RequestDepositValuesSerializer(ValuesSerializer):
+    """Same output as RequestDepositSerializer, built from ``values()`` rows."""
+
+    fields = {
+        "id": "id",
+        "requester_username": "requester__user__username",
+        "account_name": "account__name",
+        "amount": "amount",
+        "status": "status",
+        "created": "created",
+        "updated": "updated",
+    }
+    datetime_fields = ("created", "updated")
+
+
+class RequestDepositDetailValuesSerializer(RequestDepositValuesSerializer):
+    """Same output as RequestDepositDetailSerializer."""
+
+    fields = {
+        **RequestDepositValuesSerializer.fields,
+        "comment": "comment",
+        "assignee_username": "assignee__username",
+    }
+    blank_as_null_fields = ("comment",)
@@ -0,0 +1,63 @@
+from rest_framework import serializers
+
+from core.serializers import ValuesSerializer
+
+
+class WalletValuesSerializer(ValuesSerializer):
+    fields = {
+        "balance": "balance",
+        "held_balance": "held_balance",
+        "updated": "updated",
+    }
+    datetime_fields = ("updated",)
+
+
+class WalletChargeValuesSerializer(ValuesSerializer):
+    fields = {
+        "id": "id",
+        "number": "phone_number__number",
+        "amount": "amount",
+        "created": "created",
+    }
+    datetime_fields = ("created",)
+
+
+class WalletDepositValuesSerializer(ValuesSerializer):
+    fields = {
+        "id": "id",
+        "amount": "amount",
+        "status": "status",
+        "created": "created",
+    }
+    datetime_fields = ("created",)
+
+
+class WalletChargeSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    number = serializers.CharField()
+    amount = serializers.IntegerField()
+    created = serializers.DateTimeField()
+
+
+class WalletDepositSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    amount = serializers.IntegerField()
+    status = serializers.CharField()
+    created = serializers.DateTimeField()
+
+
+class PendingDepositsSerializer(serializers.Serializer):
+    count = serializers.IntegerField()
+    amount = serializers.IntegerField()
+
+
+class WalletSummarySerializer(serializers.Serializer):
+    """Documents the summary built by the wallet_summary view."""
+
+    provider_account = serializers.IntegerField()
+    balance = serializers.IntegerField()
+    held_balance = serializers.IntegerField()
+    updated = serializers.DateTimeField()
+    pending_deposits = PendingDepositsSerializer()
+    recent_charges = WalletChargeSerializer(many=True)
+    recent_deposits = WalletDepositSerializer(many=True)
@@ -0,0 +1,64 @@
+"""
+Local stand-in for the operators' top-up API, used by tests and benchmarks.
+"""
+
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubOperatorHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if server.latency:
+            time.sleep(server.latency)
+
+        roll = server.random.random()
+        if roll < server.reject_rate:
+            status, payload = 422, {"error": "subscriber can not be charged"}
+        elif roll < server.reject_rate + server.failure_rate:
+            status, payload = 503, {"error": "operator unavailable"}
+        else:
+            status, payload = 200, {"reference": f"op-{body['reference']}"}
+        with server.lock:
+            server.received.append((self.path, body, status))
+
+        content = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubOperatorServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self, address, latency=0.0, failure_rate=0.0, reject_rate=0.0, seed=None
+    ):
+        super().__init__(address, StubOperatorHandler)
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.reject_rate = reject_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.received = []
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
@@ -1,4 +1,34 @@
 from .integration_test import LargeScaleIntegrationTest
 from .request_charge_multiprocess import RequestChargeRaceConditionTest
 from .request_charge_test import RequestChargeEdgeCaseTest
-from .request_deposit_test import RequestDepositModelTest
\ No newline at end of file
+from .request_deposit_test import RequestDepositModelTest
+from .phone_number_import_test import PhoneNumberBulkImportTest
+from .charge_job_test import ChargeJobTest
+from .wallet_reconciliation_test import WalletReconciliationTest
+from .charge_dispatcher_test import ChargeDispatcherTest
+from .wallet_hold_test import WalletHoldTest
+from .rate_limit_test import TokenBucketBackendTest, ChargeRateLimitTest
+from .wallet_admission_test import WalletAdmissionTest, ChargeLockTimeoutTest
+from .transaction_retry_test import TransactionRetryTest
+from .json_rendering_test import ORJSONRendererTest, RequestDepositValuesSerializerTest
+from .charge_batch_ingest_test import ChargeBatchIngestTest
+from .profiling_test import ProfilingTest
+from .slow_query_test import SlowQueryLogTest
+from .query_budget_test import QueryBudgetTest, EndpointQueryBudgetTest
+from .generate_dataset_test import GenerateDatasetTest
+from .traffic_capture_test import TrafficCaptureTest
+from .wallet_stress_test import WalletStressTest
+from .wallet_summary_test import WalletSummaryTest
+from .wallet_events_test import EventBrokerTest, WalletEventStreamTest
+from .deposit_conditional_get_test import DepositConditionalGetTest
+from .spend_limit_test import SpendLimitTest
+from .charge_dedup_test import ChargeDedupTest
+from .wallet_transfer_test import (
+    WalletTransferTest,
+    WalletTransferAuthorizationTest,
+    WalletTransferConcurrencyTest,
+)
+from .charge_schedule_test import ChargeScheduleTest
+from .replica_routing_test import ReplicaRouterTest, ReplicaRoutingMiddlewareTest
+from .metrics_test import MetricsRegistryTest, PoolMetricsTest, MetricsViewTest
+from .phone_number_migration_test import PhoneNumberUniqueMigrationTest
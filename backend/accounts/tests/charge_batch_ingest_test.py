@@ -0,0 +1,150 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from accounts.api.charge_batch import CHARGE_FAILED
+from accounts.ingest import FrameCodec, MsgpackCodec
+from accounts.models import (
+    PhoneNumber,
+    ProviderAccount,
+    ProviderAccountTeamMember,
+    ProviderWallet,
+    RequestCharge,
+)
+
+User = get_user_model()
+
+
+@override_settings(CHARGE_INGEST_BATCH_SIZE=2)
+class ChargeBatchIngestTest(TestCase):
+    def setUp(self):
+        self.provider_account = ProviderAccount.objects.create(name="Partner")
+        self.provider_wallet = ProviderWallet.objects.create(
+            account=self.provider_account, balance=1000
+        )
+        self.user = User.objects.create(username="partner_staff")
+        ProviderAccountTeamMember.objects.create(
+            user=self.user,
+            account=self.provider_account,
+            permission_level=ProviderAccountTeamMember.PermissionLevel.STAFF,
+        )
+        PhoneNumber.objects.create(number="09120000001")
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=self.user).key}"
+        )
+        self.url = reverse("charge_batch_ingest", args=[self.provider_account.id])
+
+    def _post(self, codec, items):
+        response = self.client.generic(
+            "POST",
+            self.url,
+            b"".join(codec.encode_item(*item) for item in items),
+            content_type=codec.content_type,
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], codec.content_type)
+        return codec.decode_results(b"".join(response.streaming_content))
+
+    def _assert_batch(self, codec):
+        results = self._post(
+            codec,
+            [
+                ("09120000001", 300, "a"),
+                ("09129999999", 300, "b"),
+                ("09120000001", 300, "c"),
+                ("09120000001", 300, "a"),
+                ("09120000001", 600, "d"),
+            ],
+        )
+
+        charges = {
+            charge.idempotency_key: charge.id for charge in RequestCharge.objects.all()
+        }
+        self.assertEqual(
+            results,
+            [
+                (0, charges["a"], None),
+                (1, None, "Phone number not found."),
+                (2, charges["c"], None),
+                (3, charges["a"], None),
+                (4, None, "Insufficient balance in provider account."),
+            ],
+        )
+        self.provider_wallet.refresh_from_db()
+        self.assertEqual(self.provider_wallet.balance, 400)
+
+        # a retried batch charges nothing twice
+        self.assertEqual(
+            self._post(codec, [("09120000001", 300, "c")]), [(0, charges["c"], None)]
+        )
+        self.assertEqual(RequestCharge.objects.count(), 2)
+
+    def test_msgpack_batch(self):
+        self._assert_batch(MsgpackCodec())
+
+    def test_frame_batch(self):
+        self._assert_batch(FrameCodec())
+
+    def test_failed_chunk_gets_error_results(self):
+        create_charge_batch = RequestCharge.create_charge_batch
+        calls = []
+
+        def fail_first_chunk(*args):
+            calls.append(args)
+            if len(calls) == 1:
+                raise DatabaseError("connection lost")
+            return create_charge_batch(*args)
+
+        with mock.patch.object(
+            RequestCharge, "create_charge_batch", side_effect=fail_first_chunk
+        ), self.assertLogs("accounts", "ERROR"):
+            results = self._post(
+                MsgpackCodec(),
+                [("09120000001", 100, key) for key in ("a", "b", "c")],
+            )
+
+        charge = RequestCharge.objects.get()
+        self.assertEqual(
+            results,
+            [(0, None, CHARGE_FAILED), (1, None, CHARGE_FAILED), (2, charge.id, None)],
+        )
+
+    def test_binary_body_is_not_logged(self):
+        codec = FrameCodec()
+        with self.assertLogs("accounts", "INFO") as logs:
+            self._post(codec, [("09120000001", 300, "a")])
+
+        self.assertFalse(any("Body=" in line for line in logs.output))
+
+    def test_rejects_malformed_body_and_unknown_format(self):
+        codec = FrameCodec()
+        response = self.client.generic(
+            "POST",
+            self.url,
+            codec.encode_item("09120000001", 300, "a")[:-1],
+            content_type=codec.content_type,
+        )
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post(self.url, {}, format="json")
+        self.assertEqual(response.status_code, 415)
+        self.assertEqual(RequestCharge.objects.count(), 0)
+
+    def test_other_account_is_forbidden(self):
+        other = ProviderAccount.objects.create(name="Other")
+        codec = MsgpackCodec()
+
+        response = self.client.generic(
+            "POST",
+            reverse("charge_batch_ingest", args=[other.id]),
+            codec.encode_item("09120000001", 300, "a"),
+            content_type=codec.content_type,
+        )
+
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,162 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from accounts import dedup, throttling
+from accounts.dedup import DuplicateChargeError
+from accounts.models import (
+    ChargeFingerprint,
+    PhoneNumber,
+    ProviderAccount,
+    ProviderAccountTeamMember,
+    ProviderWallet,
+    RequestCharge,
+)
+
+User = get_user_model()
+
+
+@override_settings(CHARGE_DEDUP_WINDOW_SECONDS=10)
+class ChargeDedupTest(TestCase):
+    def setUp(self):
+        dedup.clear()
+        throttling._limits.clear()
+        self.provider_account = ProviderAccount.objects.create(name="Deduped")
+        self.wallet = ProviderWallet.objects.create(
+            account=self.provider_account, balance=10000
+        )
+        self.phone_number = PhoneNumber.objects.create(number="09120000000")
+        self.user = User.objects.create(username="deduped")
+        ProviderAccountTeamMember.objects.create(
+            user=self.user,
+            account=self.provider_account,
+            permission_level=ProviderAccountTeamMember.PermissionLevel.ADMIN,
+        )
+
+    def charge(self, amount=1000):
+        return RequestCharge.create_charge_safely(
+            phone_number_id=self.phone_number.id,
+            provider_account_id=self.provider_account.id,
+            user_id=self.user.id,
+            amount=amount,
+        )
+
+    def test_repeated_charge_is_rejected_by_the_process(self):
+        suppressed = dedup.SUPPRESSED.get(check="memory")
+        self.charge()
+
+        with self.assertNumQueries(0), self.assertRaises(DuplicateChargeError):
+            self.charge()
+        self.charge(amount=2000)
+
+        self.assertEqual(dedup.SUPPRESSED.get(check="memory"), suppressed + 1)
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, 7000)
+
+    def test_charge_seen_by_another_process_is_rejected_by_the_table(self):
+        suppressed = dedup.SUPPRESSED.get(check="database")
+        self.charge()
+        dedup.clear()
+
+        with self.assertRaises(DuplicateChargeError):
+            self.charge()
+
+        self.assertEqual(dedup.SUPPRESSED.get(check="database"), suppressed + 1)
+        self.assertEqual(RequestCharge.objects.count(), 1)
+
+    def test_failed_charge_gives_its_claim_back(self):
+        with self.assertRaisesMessage(
+            ValueError, "Insufficient balance in provider account."
+        ):
+            self.charge(amount=20000)
+        self.assertFalse(ChargeFingerprint.objects.exists())
+
+        ProviderWallet.deposit(account_id=self.provider_account.id, amount=20000)
+        self.charge(amount=20000)
+
+    def test_expired_fingerprint_is_taken_over(self):
+        ChargeFingerprint.objects.create(
+            key=f"{self.provider_account.id}:{self.phone_number.id}:1000",
+            expires_at=timezone.now() - timedelta(seconds=1),
+        )
+
+        self.charge()
+
+        self.assertGreater(ChargeFingerprint.objects.get().expires_at, timezone.now())
+
+    @override_settings(CHARGE_DEDUP_WINDOW_SECONDS=0)
+    def test_disabled_window_accepts_repeats(self):
+        self.charge()
+        self.charge()
+
+        self.assertEqual(RequestCharge.objects.count(), 2)
+        self.assertFalse(ChargeFingerprint.objects.exists())
+
+    def test_duplicate_is_a_bad_request(self):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=self.user).key}"
+        )
+        data = {
+            "phone_number": self.phone_number.number,
+            "provider_account": self.provider_account.id,
+            "amount": 1000,
+        }
+
+        self.assertEqual(
+            client.post(reverse("request_charge"), data, format="json").status_code,
+            201,
+        )
+        response = client.post(reverse("request_charge"), data, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["detail"], str(DuplicateChargeError()))
+
+    def test_prune_deletes_expired_fingerprints(self):
+        now = timezone.now()
+        ChargeFingerprint.objects.create(key="1:1:1", expires_at=now)
+        ChargeFingerprint.objects.create(
+            key="1:1:2", expires_at=now + timedelta(seconds=10)
+        )
+
+        call_command("prune_charge_fingerprints", stdout=StringIO())
+
+        self.assertEqual(
+            list(ChargeFingerprint.objects.values_list("key", flat=True)), ["1:1:2"]
+        )
+
+    def test_batch_items_without_a_key_are_deduplicated(self):
+        self.charge()
+        number = self.phone_number.number
+
+        results = RequestCharge.create_charge_batch(
+            provider_account_id=self.provider_account.id,
+            user_id=self.user.id,
+            items=[
+                (number, 1000),
+                (number, 1000, "retry-1"),
+                (number, 2000),
+                (number, 2000),
+                (number, 20000),
+            ],
+        )
+
+        self.assertEqual(
+            [getattr(result, "amount", result) for result in results],
+            [
+                str(DuplicateChargeError()),
+                1000,
+                2000,
+                str(DuplicateChargeError()),
+                "Insufficient balance in provider account.",
+            ],
+        )
+        # The rejected item gave its claim back
+        self.assertEqual(ChargeFingerprint.objects.count(), 2)
@@ -0,0 +1,213 @@
+from datetime import timedelta
+
+import httpx
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from accounts.dispatcher import (
+    DELIVERED,
+    REJECTED,
+    ChargeDispatcher,
+    DeliveryResult,
+)
+from accounts.models import (
+    ChargeDelivery,
+    ChargeRefund,
+    PhoneNumber,
+    ProviderAccount,
+    ProviderAccountTeamMember,
+    ProviderWallet,
+    RequestCharge,
+    WalletCheckpoint,
+)
+from accounts.stub_operator import StubOperatorServer
+
+User = get_user_model()
+
+
+class ChargeDispatcherTest(TestCase):
+    def setUp(self):
+        self.provider_account = ProviderAccount.objects.create(name="Dispatch Provider")
+        self.provider_wallet = ProviderWallet.objects.create(
+            account=self.provider_account, balance=10000
+        )
+        self.user = User.objects.create(username="dispatch_staff")
+        ProviderAccountTeamMember.objects.create(
+            user=self.user,
+            account=self.provider_account,
+            permission_level=ProviderAccountTeamMember.PermissionLevel.STAFF,
+        )
+        self.mci_number = PhoneNumber.objects.create(number="09120000001")
+        self.irancell_number = PhoneNumber.objects.create(number="09350000001")
+
+    def _start_operator(self, **options):
+        server = StubOperatorServer(("127.0.0.1", 0), **options)
+        server.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        operators = {
+            name: {**operator, "url": f"{server.url}/{name}/topup"}
+            for name, operator in settings.TOPUP_OPERATORS.items()
+        }
+        settings_override = override_settings(TOPUP_OPERATORS=operators)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        return server
+
+    def _charge(self, phone_number, amount=1000):
+        return RequestCharge.create_charge_safely(
+            phone_number_id=phone_number.id,
+            provider_account_id=self.provider_account.id,
+            user_id=self.user.id,
+            amount=amount,
+        )
+
+    def test_charge_writes_outbox_row(self):
+        charge = self._charge(self.irancell_number)
+
+        self.assertEqual(charge.delivery.status, ChargeDelivery.Status.PENDING)
+        self.assertEqual(charge.delivery.operator, "irancell")
+
+    def test_delivers_pending_charges(self):
+        server = self._start_operator()
+        charges = [self._charge(self.mci_number), self._charge(self.irancell_number)]
+
+        self.assertEqual(ChargeDispatcher().run_once(), 2)
+
+        for charge in charges:
+            charge.delivery.refresh_from_db()
+            self.assertEqual(charge.delivery.status, ChargeDelivery.Status.DELIVERED)
+            self.assertEqual(
+                charge.delivery.operator_reference, f"op-charge-{charge.id}"
+            )
+        self.assertEqual(
+            sorted(path for path, _, _ in server.received),
+            ["/irancell/topup", "/mci/topup"],
+        )
+        self.assertEqual(ChargeDispatcher().run_once(), 0)
+
+    def test_retryable_failure_is_rescheduled(self):
+        self._start_operator(failure_rate=1)
+        charge = self._charge(self.mci_number)
+
+        ChargeDispatcher().run_once()
+
+        charge.delivery.refresh_from_db()
+        self.assertEqual(charge.delivery.status, ChargeDelivery.Status.PENDING)
+        self.assertEqual(charge.delivery.attempts, 1)
+        self.assertEqual(charge.delivery.last_error, "HTTP 503")
+        self.assertGreater(charge.delivery.next_attempt_at, charge.delivery.created)
+        self.assertEqual(ChargeDispatcher().run_once(), 0)
+
+    def test_exhausted_retries_are_refunded(self):
+        self._start_operator(failure_rate=1)
+        charge = self._charge(self.mci_number, amount=4000)
+
+        with self.settings(TOPUP_MAX_ATTEMPTS=1), self.assertLogs("accounts"):
+            ChargeDispatcher().run_once()
+
+        charge.delivery.refresh_from_db()
+        self.assertEqual(charge.delivery.status, ChargeDelivery.Status.FAILED)
+        self.provider_wallet.refresh_from_db()
+        self.assertEqual(self.provider_wallet.balance, 10000)
+        self.assertEqual(ChargeRefund.objects.get(charge=charge).amount, 4000)
+
+    def test_rejected_charge_is_refunded_and_reconciles(self):
+        self._start_operator(reject_rate=1)
+        charge = self._charge(self.mci_number, amount=4000)
+
+        with self.assertLogs("accounts"):
+            ChargeDispatcher().run_once()
+
+        charge.delivery.refresh_from_db()
+        self.assertEqual(charge.delivery.status, ChargeDelivery.Status.FAILED)
+        self.assertEqual(charge.delivery.attempts, 1)
+        self.provider_wallet.refresh_from_db()
+        self.assertEqual(self.provider_wallet.balance, 10000)
+        result = WalletCheckpoint.reconcile(self.provider_account.id, settle_seconds=0)
+        self.assertEqual(result["expected_balance"], 0)  # opening balance is drift
+        self.assertEqual(result["drift"], 10000)
+
+    def test_success_without_json_body_is_delivered(self):
+        charge = self._charge(self.mci_number)
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, text="OK"))
+
+        ChargeDispatcher(transport=transport).run_once()
+
+        charge.delivery.refresh_from_db()
+        self.assertEqual(charge.delivery.status, ChargeDelivery.Status.DELIVERED)
+        self.assertEqual(charge.delivery.operator_reference, "")
+
+    def test_unexpected_error_does_not_lose_other_results(self):
+        def handler(request):
+            if request.url.path.startswith("/mci"):
+                raise RuntimeError("operator client broke")
+            return httpx.Response(200, json={"reference": "op-1"})
+
+        mci, irancell = self._charge(self.mci_number), self._charge(
+            self.irancell_number
+        )
+
+        ChargeDispatcher(transport=httpx.MockTransport(handler)).run_once()
+
+        mci.delivery.refresh_from_db()
+        irancell.delivery.refresh_from_db()
+        self.assertEqual(mci.delivery.status, ChargeDelivery.Status.PENDING)
+        self.assertEqual(mci.delivery.last_error, "RuntimeError: operator client broke")
+        self.assertEqual(irancell.delivery.status, ChargeDelivery.Status.DELIVERED)
+        self.assertEqual(irancell.delivery.operator_reference, "op-1")
+
+    @override_settings(TOPUP_DELIVERY_LEASE_SECONDS=60, TOPUP_REQUEST_TIMEOUT=10)
+    def test_lease_covers_the_whole_batch(self):
+        operators = {**settings.TOPUP_OPERATORS}
+        operators["rightel"] = {**operators["rightel"], "concurrency": 10}
+        with self.settings(TOPUP_OPERATORS=operators):
+            self.assertEqual(
+                ChargeDispatcher.lease_seconds(["rightel"] * 200 + ["gone"]), 260
+            )
+            charge = self._charge(self.mci_number)
+
+            started = timezone.now()
+            ChargeDispatcher().claim_batch()
+
+        charge.delivery.refresh_from_db()
+        self.assertGreaterEqual(
+            charge.delivery.next_attempt_at, started + timedelta(seconds=70)
+        )
+
+    def test_overrun_claim_does_not_undo_the_takeover(self):
+        charge = self._charge(self.mci_number, amount=4000)
+        (overrun,) = ChargeDispatcher().claim_batch()
+        # The lease ran out while the first worker was still sending
+        ChargeDelivery.objects.filter(id=overrun.id).update(
+            next_attempt_at=timezone.now()
+        )
+        (takeover,) = ChargeDispatcher().claim_batch()
+        ChargeDispatcher().record_results([DeliveryResult(takeover, DELIVERED, "op-2")])
+
+        with self.assertLogs("accounts", "WARNING"):
+            ChargeDispatcher().record_results(
+                [DeliveryResult(overrun, REJECTED, "HTTP 400")]
+            )
+
+        charge.delivery.refresh_from_db()
+        self.assertEqual(charge.delivery.status, ChargeDelivery.Status.DELIVERED)
+        self.assertEqual(charge.delivery.operator_reference, "op-2")
+        self.assertFalse(ChargeRefund.objects.exists())
+        self.provider_wallet.refresh_from_db()
+        self.assertEqual(self.provider_wallet.balance, 6000)
+
+    def test_unknown_operator_is_rejected(self):
+        charge = self._charge(self.mci_number, amount=4000)
+        ChargeDelivery.objects.filter(id=charge.delivery.id).update(operator="gone")
+        transport = httpx.MockTransport(lambda request: self.fail("sent"))
+
+        with self.assertLogs("accounts"):
+            ChargeDispatcher(transport=transport).run_once()
+
+        charge.delivery.refresh_from_db()
+        self.assertEqual(charge.delivery.status, ChargeDelivery.Status.FAILED)
+        self.assertEqual(charge.delivery.last_error, "Unknown operator gone")
+        self.assertEqual(ChargeRefund.objects.get(charge=charge).amount, 4000)
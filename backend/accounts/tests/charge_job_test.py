@@ -0,0 +1,277 @@
+import csv
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from accounts.admission import WalletBusyError
+from accounts.models import (
+    ChargeJob,
+    PhoneNumber,
+    ProviderAccount,
+    ProviderAccountTeamMember,
+    ProviderWallet,
+    RequestCharge,
+)
+
+User = get_user_model()
+
+
+class ChargeJobTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media_override = override_settings(MEDIA_ROOT=self.media_root)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+
+        self.provider_account = ProviderAccount.objects.create(name="Bulk Provider")
+        self.provider_wallet = ProviderWallet.objects.create(
+            account=self.provider_account, balance=1000
+        )
+        self.user = User.objects.create(username="bulk_staff")
+        self.requester = ProviderAccountTeamMember.objects.create(
+            user=self.user,
+            account=self.provider_account,
+            permission_level=ProviderAccountTeamMember.PermissionLevel.STAFF,
+        )
+        self.active = PhoneNumber.objects.create(number="09120000001")
+        self.inactive = PhoneNumber.objects.create(
+            number="09120000002", is_active=False
+        )
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=self.user).key}"
+        )
+
+    def test_create_charge_batch_reports_per_item_errors(self):
+        results = RequestCharge.create_charge_batch(
+            provider_account_id=self.provider_account.id,
+            user_id=self.user.id,
+            items=[
+                ("09120000001", 400),
+                ("09129999999", 100),
+                ("09120000002", 100),
+                ("09120000001", 0),
+                ("09120000001", 500),
+                ("09120000001", 200),
+            ],
+        )
+
+        self.assertIsInstance(results[0], RequestCharge)
+        self.assertEqual(results[1], "Phone number not found.")
+        self.assertEqual(results[2], "Phone number is not active.")
+        self.assertEqual(results[3], "Charge amount must be positive.")
+        self.assertIsInstance(results[4], RequestCharge)
+        self.assertEqual(results[5], "Insufficient balance in provider account.")
+        self.assertEqual(RequestCharge.objects.count(), 2)
+        self.provider_wallet.refresh_from_db()
+        self.assertEqual(self.provider_wallet.balance, 100)
+
+    def test_create_charge_batch_requires_permission(self):
+        self.requester.permission_level = ProviderAccountTeamMember.PermissionLevel.USER
+        self.requester.save()
+
+        with self.assertRaises(PermissionError):
+            RequestCharge.create_charge_batch(
+                provider_account_id=self.provider_account.id,
+                user_id=self.user.id,
+                items=[("09120000001", 100)],
+            )
+
+    def test_upload_and_process_job(self):
+        source = SimpleUploadedFile(
+            "charges.csv",
+            b"phone_number,amount\n"
+            b"09120000001,300\n"
+            b"09120000002,100\n"
+            b"09129999999,100\n"
+            b"09120000001,abc\n"
+            b"09120000001,600\n"
+            b"09120000001,300\n",
+            content_type="text/csv",
+        )
+        response = self.client.post(
+            reverse("charge_job_create"),
+            {"provider_account": self.provider_account.id, "source_file": source},
+            format="multipart",
+        )
+        self.assertEqual(response.status_code, 202, response.data)
+        self.assertEqual(response.data["total_rows"], 6)
+        job_id = response.data["id"]
+
+        call_command("process_charge_jobs", once=True, chunk_size=2, stdout=StringIO())
+
+        response = self.client.get(reverse("charge_job_detail", args=[job_id]))
+        self.assertEqual(response.data["status"], ChargeJob.Status.COMPLETED)
+        self.assertEqual(response.data["processed_rows"], 6)
+        self.assertEqual(response.data["succeeded_rows"], 2)
+        self.assertEqual(response.data["failed_rows"], 4)
+        self.assertEqual(response.data["charged_amount"], 900)
+        self.assertEqual(response.data["progress"], 100)
+        self.provider_wallet.refresh_from_db()
+        self.assertEqual(self.provider_wallet.balance, 100)
+
+        response = self.client.get(reverse("charge_job_result", args=[job_id]))
+        self.assertEqual(response.status_code, 200)
+        rows = list(
+            csv.reader(b"".join(response.streaming_content).decode().splitlines())
+        )
+        response.close()
+        self.assertEqual(rows[0], ChargeJob.RESULT_HEADER)
+        self.assertEqual(
+            [(row[0], row[3]) for row in rows[1:]],
+            [
+                ("2", "Phone number is not active."),
+                ("3", "Phone number not found."),
+                ("4", "Charge amount must be positive."),
+                ("6", "Insufficient balance in provider account."),
+            ],
+        )
+
+    def test_upload_requires_charge_permission(self):
+        self.requester.permission_level = ProviderAccountTeamMember.PermissionLevel.USER
+        self.requester.save()
+        source = SimpleUploadedFile("charges.csv", b"09120000001,300\n")
+
+        response = self.client.post(
+            reverse("charge_job_create"),
+            {"provider_account": self.provider_account.id, "source_file": source},
+            format="multipart",
+        )
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(ChargeJob.objects.count(), 0)
+
+    def _create_job(self, rows=b"09120000001,300\n"):
+        return ChargeJob.objects.create(
+            provider_account=self.provider_account,
+            requester=self.requester,
+            user_id=self.user.id,
+            source_file=SimpleUploadedFile("charges.csv", rows),
+            total_rows=1,
+        )
+
+    def test_running_job_is_claimed_once_until_its_lease_expires(self):
+        job = self._create_job()
+
+        self.assertEqual(ChargeJob.claim_next(), job)
+        self.assertIsNone(ChargeJob.claim_next())
+
+        ChargeJob.objects.filter(id=job.id).update(
+            lease_expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(ChargeJob.claim_next(), job)
+
+    def test_unexpected_error_fails_the_job(self):
+        self._create_job()
+        job = ChargeJob.claim_next()
+
+        with mock.patch.object(
+            RequestCharge, "create_charge_batch", side_effect=OSError("disk full")
+        ), self.assertLogs("accounts", "ERROR"):
+            job.process()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ChargeJob.Status.FAILED)
+        self.assertEqual(job.error, "OSError: disk full")
+        self.assertIsNone(job.lease_expires_at)
+        self.assertIsNone(ChargeJob.claim_next())
+
+    def test_busy_wallet_leaves_the_job_to_a_later_claim(self):
+        self._create_job()
+        job = ChargeJob.claim_next()
+
+        with mock.patch.object(
+            RequestCharge,
+            "create_charge_batch",
+            side_effect=WalletBusyError(self.provider_account.id),
+        ):
+            job.process()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ChargeJob.Status.PROCESSING)
+        self.assertEqual(job.processed_rows, 0)
+        self.assertLessEqual(
+            job.lease_expires_at,
+            timezone.now() + timedelta(seconds=settings.WALLET_BUSY_RETRY_AFTER),
+        )
+
+    def test_taken_over_job_stops_without_storing_its_chunk(self):
+        self._create_job(b"09120000001,300\n09120000001,200\n")
+        stale = ChargeJob.claim_next()
+        iter_rows = ChargeJob.iter_rows
+
+        def taken_over(source):
+            rows = iter_rows(source)
+            yield next(rows)
+            # Another worker took the job over and stored the second row
+            ChargeJob.objects.filter(id=stale.id).update(processed_rows=2)
+            yield from rows
+
+        with mock.patch.object(ChargeJob, "iter_rows", side_effect=taken_over):
+            with self.assertLogs("accounts", "WARNING"):
+                stale.process(chunk_size=1)
+
+        job = ChargeJob.objects.get(id=stale.id)
+        self.assertEqual(job.status, ChargeJob.Status.PROCESSING)
+        self.assertEqual(job.processed_rows, 2)
+        # Only the first row was charged by the stale worker
+        self.assertEqual(RequestCharge.objects.get().amount, 300)
+        self.provider_wallet.refresh_from_db()
+        self.assertEqual(self.provider_wallet.balance, 700)
+
+    def test_rows_are_charged_once_by_their_job_row_key(self):
+        self._create_job(b"09120000001,300\n09120000001,200\n")
+        job = ChargeJob.claim_next()
+        job.process(chunk_size=1)
+        # Replayed from the start, e.g. by a worker holding a stale claim
+        ChargeJob.objects.filter(id=job.id).update(
+            status=ChargeJob.Status.PROCESSING, processed_rows=0, succeeded_rows=0
+        )
+        job.refresh_from_db()
+        job.process(chunk_size=2)
+
+        self.assertEqual(
+            sorted(RequestCharge.objects.values_list("idempotency_key", flat=True)),
+            [f"charge-job:{job.id}:1", f"charge-job:{job.id}:2"],
+        )
+        self.provider_wallet.refresh_from_db()
+        self.assertEqual(self.provider_wallet.balance, 500)
+
+    def test_failures_of_uncommitted_chunks_are_dropped_on_resume(self):
+        self._create_job(b"09120000002,300\n09120000002,200\n09120000001,100\n")
+        job = ChargeJob.claim_next()
+        job.result_file.name = f"charge_jobs/results/{job.id}.csv"
+        job.save()
+        os.makedirs(os.path.dirname(job.result_file.path))
+        # Row 1 is stored, row 2 was written by a chunk that did not commit
+        ChargeJob.objects.filter(id=job.id).update(processed_rows=1, failed_rows=1)
+        with open(job.result_file.path, "w", newline="") as result:
+            csv.writer(result).writerows(
+                [ChargeJob.RESULT_HEADER, [1, "x", 300, "old"], [2, "x", 200, "old"]]
+            )
+
+        job.process(chunk_size=2)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ChargeJob.Status.COMPLETED)
+        self.assertEqual(job.failed_rows, 2)
+        with open(job.result_file.path, newline="") as result:
+            rows = list(csv.reader(result))
+        self.assertEqual(
+            [(row[0], row[3]) for row in rows[1:]],
+            [("1", "old"), ("2", "Phone number is not active.")],
+        )
@@ -0,0 +1,263 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from accounts.models import (
+    ChargeSchedule,
+    ChargeScheduleItem,
+    ChargeScheduleRun,
+    PhoneNumber,
+    ProviderAccount,
+    ProviderAccountTeamMember,
+    ProviderWallet,
+    RequestCharge,
+)
+
+User = get_user_model()
+
+MONDAY = datetime(2026, 10, 5, 10, tzinfo=dt_timezone.utc)
+
+
+@override_settings(CHARGE_SCHEDULE_SPREAD_SECONDS=0, CHARGE_SCHEDULE_MAX_CATCH_UP=3)
+class ChargeScheduleTest(TestCase):
+    def setUp(self):
+        self.provider_account = ProviderAccount.objects.create(name="Recurring")
+        self.wallet = ProviderWallet.objects.create(
+            account=self.provider_account, balance=100000
+        )
+        self.requester = ProviderAccountTeamMember.objects.create(
+            user=User.objects.create(username="recurring"),
+            account=self.provider_account,
+            permission_level=ProviderAccountTeamMember.PermissionLevel.ADMIN,
+        )
+        self.numbers = [
+            PhoneNumber.objects.create(number=f"0912000000{index}")
+            for index in range(3)
+        ]
+
+    def create_schedule(self, interval=ChargeSchedule.Interval.WEEKLY, **fields):
+        fields.setdefault("starts_at", MONDAY)
+        schedule = ChargeSchedule.objects.create(
+            provider_account=self.provider_account,
+            requester=self.requester,
+            name="Monday top-ups",
+            interval=interval,
+            **fields,
+        )
+        ChargeScheduleItem.objects.bulk_create(
+            ChargeScheduleItem(schedule=schedule, phone_number=number, amount=1000)
+            for number in self.numbers
+        )
+        return schedule
+
+    def test_due_times_follow_the_interval(self):
+        schedule = self.create_schedule()
+        self.assertEqual(schedule.due_after(MONDAY), MONDAY + timedelta(weeks=1))
+
+        schedule.interval = ChargeSchedule.Interval.MONTHLY
+        schedule.starts_at = datetime(2026, 1, 31, 10, tzinfo=dt_timezone.utc)
+        february = schedule.due_after(schedule.starts_at)
+        self.assertEqual(february.date().isoformat(), "2026-02-28")
+        self.assertEqual(schedule.due_after(february).date().isoformat(), "2026-03-31")
+
+    def test_missed_runs_are_planned_once(self):
+        schedule = self.create_schedule()
+        now = MONDAY + timedelta(weeks=4, hours=1)
+
+        self.assertEqual(ChargeSchedule.plan_due_runs(now), 5)
+        self.assertEqual(ChargeSchedule.plan_due_runs(now), 0)
+
+        runs = list(schedule.runs.order_by("due_at").values_list("status", flat=True))
+        self.assertEqual(runs, ["skipped"] * 2 + ["pending"] * 3)
+        schedule.refresh_from_db()
+        self.assertEqual(schedule.next_run_at, MONDAY + timedelta(weeks=5))
+
+    def test_runs_planned_before_a_crash_are_not_counted(self):
+        schedule = self.create_schedule()
+        ChargeScheduleRun.objects.create(
+            schedule=schedule,
+            provider_account=self.provider_account,
+            due_at=MONDAY + timedelta(weeks=1),
+            not_before=MONDAY + timedelta(weeks=1),
+        )
+
+        self.assertEqual(ChargeSchedule.plan_due_runs(MONDAY + timedelta(weeks=1)), 1)
+        self.assertEqual(schedule.runs.count(), 2)
+
+    def test_schedule_ends(self):
+        schedule = self.create_schedule(ends_at=MONDAY + timedelta(weeks=1))
+
+        ChargeSchedule.plan_due_runs(MONDAY + timedelta(weeks=3))
+
+        self.assertEqual(schedule.runs.count(), 2)
+        schedule.refresh_from_db()
+        self.assertFalse(schedule.is_active)
+
+    def test_runs_are_spread_from_their_due_time(self):
+        schedule = self.create_schedule()
+
+        with self.settings(CHARGE_SCHEDULE_SPREAD_SECONDS=600):
+            ChargeSchedule.plan_due_runs(MONDAY)
+            spread = schedule.spread()
+
+        run = schedule.runs.get()
+        self.assertEqual(run.not_before - run.due_at, spread)
+        self.assertLessEqual(spread, timedelta(seconds=600))
+        self.assertIsNone(ChargeScheduleRun.claim_next(MONDAY))
+
+    def test_run_charges_in_batches_and_records_results(self):
+        schedule = self.create_schedule()
+        self.numbers[1].is_active = False
+        self.numbers[1].save()
+        ChargeSchedule.plan_due_runs(MONDAY)
+
+        run = ChargeScheduleRun.claim_next(MONDAY)
+        run.process(chunk_size=2)
+
+        run.refresh_from_db()
+        self.assertEqual(run.status, ChargeScheduleRun.Status.COMPLETED)
+        self.assertEqual((run.succeeded_items, run.failed_items), (2, 1))
+        self.assertEqual(run.charged_amount, 2000)
+        self.assertEqual(run.failures[0]["error"], "Phone number is not active.")
+        self.assertEqual(run.last_item_id, schedule.items.order_by("id").last().id)
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, 98000)
+
+    def test_interrupted_run_is_taken_over_without_charging_twice(self):
+        self.create_schedule()
+        ChargeSchedule.plan_due_runs(MONDAY)
+        run = ChargeScheduleRun.claim_next(MONDAY)
+        run.process()
+        # As if the worker stopped before its progress was saved
+        ChargeScheduleRun.objects.filter(id=run.id).update(
+            status=ChargeScheduleRun.Status.PROCESSING,
+            lease_expires_at=MONDAY,
+            last_item_id=0,
+        )
+
+        self.assertIsNone(ChargeScheduleRun.claim_next(MONDAY - timedelta(hours=1)))
+        run = ChargeScheduleRun.claim_next(MONDAY)
+        run.process()
+
+        self.assertEqual(RequestCharge.objects.count(), 3)
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, 97000)
+
+    def test_one_run_of_a_wallet_is_charged_at_a_time(self):
+        self.create_schedule()
+        self.create_schedule(interval=ChargeSchedule.Interval.DAILY)
+        other = ProviderAccount.objects.create(name="Other")
+        ChargeScheduleRun.objects.create(
+            schedule=ChargeSchedule.objects.first(),
+            provider_account=other,
+            due_at=MONDAY + timedelta(days=1),
+            not_before=MONDAY + timedelta(days=1),
+        )
+        ChargeSchedule.plan_due_runs(MONDAY)
+        now = MONDAY + timedelta(days=1)
+
+        first = ChargeScheduleRun.claim_next(now)
+        self.assertEqual(first.provider_account_id, self.provider_account.id)
+        self.assertEqual(ChargeScheduleRun.claim_next(now).provider_account, other)
+        self.assertIsNone(ChargeScheduleRun.claim_next(now))
+
+        first.process()
+        second = ChargeScheduleRun.claim_next(now)
+        self.assertEqual(second.provider_account_id, self.provider_account.id)
+        self.assertNotEqual(second, first)
+
+    def test_taken_over_run_stores_nothing(self):
+        self.create_schedule()
+        ChargeSchedule.plan_due_runs(MONDAY)
+        stale = ChargeScheduleRun.claim_next(MONDAY)
+        run = ChargeScheduleRun.claim_next(stale.lease_expires_at)
+        self.assertEqual((run, run.takeovers), (stale, 1))
+
+        with self.assertLogs("accounts", "WARNING"):
+            stale.process(chunk_size=2)
+
+        self.assertEqual(RequestCharge.objects.count(), 0)
+        run.process(chunk_size=2)
+        run.refresh_from_db()
+        self.assertEqual(run.status, ChargeScheduleRun.Status.COMPLETED)
+        self.assertEqual((run.processed_items, run.succeeded_items), (3, 3))
+        self.assertEqual(RequestCharge.objects.count(), 3)
+
+    @override_settings(CHARGE_SCHEDULE_MAX_TAKEOVERS=2)
+    def test_run_stopping_every_worker_fails(self):
+        self.create_schedule()
+        ChargeSchedule.plan_due_runs(MONDAY)
+        now = MONDAY
+        for takeovers in range(3):
+            run = ChargeScheduleRun.claim_next(now)
+            self.assertEqual(run.takeovers, takeovers)
+            now = run.lease_expires_at
+
+        self.assertIsNone(ChargeScheduleRun.claim_next(now))
+        run.refresh_from_db()
+        self.assertEqual(run.status, ChargeScheduleRun.Status.FAILED)
+        self.assertEqual(run.error, "Stopped 3 workers without an outcome.")
+
+    def test_unexpected_error_fails_the_run(self):
+        self.create_schedule()
+        ChargeSchedule.plan_due_runs(MONDAY)
+        run = ChargeScheduleRun.claim_next(MONDAY)
+
+        with mock.patch.object(
+            RequestCharge, "create_charge_batch", side_effect=RuntimeError("boom")
+        ), self.assertLogs("accounts"):
+            run.process()
+
+        run.refresh_from_db()
+        self.assertEqual(run.status, ChargeScheduleRun.Status.FAILED)
+        self.assertEqual(run.error, "RuntimeError: boom")
+        self.assertIsNone(run.lease_expires_at)
+
+    def test_runs_of_inactive_schedule_are_skipped(self):
+        schedule = self.create_schedule()
+        ChargeSchedule.plan_due_runs(MONDAY + timedelta(weeks=1))
+        first = ChargeScheduleRun.claim_next(MONDAY + timedelta(weeks=1))
+        schedule.is_active = False
+        schedule.save()
+
+        first.process()
+        # The other run is skipped without being claimed
+        self.assertIsNone(ChargeScheduleRun.claim_next(MONDAY + timedelta(weeks=1)))
+
+        self.assertEqual(first.status, ChargeScheduleRun.Status.SKIPPED)
+        self.assertEqual(
+            set(schedule.runs.values_list("status", "error")),
+            {(ChargeScheduleRun.Status.SKIPPED, "Schedule is inactive.")},
+        )
+        self.assertEqual(RequestCharge.objects.count(), 0)
+
+    def test_last_run_of_ended_schedule_is_charged(self):
+        schedule = self.create_schedule(ends_at=MONDAY)
+        ChargeSchedule.plan_due_runs(MONDAY)
+        schedule.refresh_from_db()
+        self.assertFalse(schedule.is_active)
+
+        run = ChargeScheduleRun.claim_next(MONDAY)
+        run.process()
+
+        self.assertEqual(run.status, ChargeScheduleRun.Status.COMPLETED)
+        self.assertEqual(RequestCharge.objects.count(), 3)
+
+    def test_command_catches_up_and_executes(self):
+        # Started weeks ago, with no scheduler running since
+        self.create_schedule(starts_at=MONDAY - timedelta(weeks=10))
+
+        out = StringIO()
+        call_command("run_charge_schedules", once=True, pause=0, stdout=out)
+
+        self.assertIn("Planned", out.getvalue())
+        self.assertEqual(RequestCharge.objects.count(), 3 * 3)
+        self.assertFalse(
+            ChargeScheduleRun.objects.exclude(
+                status__in=["completed", "skipped"]
+            ).exists()
+        )
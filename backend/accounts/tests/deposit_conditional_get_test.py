@@ -0,0 +1,90 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from accounts import throttling
+from accounts.models import (
+    ProviderAccount,
+    ProviderAccountTeamMember,
+    ProviderWallet,
+    RequestDeposit,
+)
+from core.testing import query_budget
+
+User = get_user_model()
+
+
+class DepositConditionalGetTest(TestCase):
+    def setUp(self):
+        throttling._limits.clear()
+        self.staff_user = User.objects.create(username="etag_staff", is_staff=True)
+        self.account = ProviderAccount.objects.create(name="ETag Provider")
+        ProviderWallet.objects.create(account=self.account)
+        self.member = ProviderAccountTeamMember.objects.create(
+            user=User.objects.create(username="etag_admin"),
+            account=self.account,
+            permission_level=ProviderAccountTeamMember.PermissionLevel.ADMIN,
+        )
+        self.deposit = self._create_deposit(1000)
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=self.member.user).key}"
+        )
+
+    def _create_deposit(self, amount):
+        return RequestDeposit.objects.create(
+            requester=self.member,
+            account=self.account,
+            assignee=self.staff_user,
+            amount=amount,
+        )
+
+    def test_detail_is_not_modified_until_the_deposit_changes(self):
+        url = reverse("request_deposit_detail", args=[self.deposit.id])
+        response = self.client.get(url)
+        etag = response["ETag"]
+        self.assertIn("Last-Modified", response)
+
+        # Token lookup and the updated column
+        with query_budget(queries=2, name="GET request_deposit/<pk>/ 304"):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+        self.deposit.status = RequestDeposit.Status.REJECTED
+        self.deposit.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], "rejected")
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_list_is_not_modified_until_a_deposit_is_added(self):
+        url = reverse("request_deposit")
+        etag = self.client.get(url)["ETag"]
+
+        # Token lookup, the team of the user and one aggregate
+        with query_budget(queries=3, name="GET request_deposit/ 304"):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self._create_deposit(2000)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 2)
+
+    def test_list_variants_have_their_own_etags(self):
+        url = reverse("request_deposit")
+
+        self.assertNotEqual(
+            self.client.get(url)["ETag"], self.client.get(f"{url}?page=2")["ETag"]
+        )
+
+    def test_unknown_deposit_is_not_found(self):
+        response = self.client.get(
+            reverse("request_deposit_detail", args=[self.deposit.id + 1]),
+            HTTP_IF_NONE_MATCH='"1-0"',
+        )
+
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,91 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from accounts.models import (
+    ProviderAccount,
+    ProviderAccountTeamMember,
+    ProviderWallet,
+    RequestCharge,
+    RequestDeposit,
+    WalletCheckpoint,
+)
+
+
+def _generate(prefix, seed=7):
+    call_command(
+        "generate_dataset",
+        seed=seed,
+        prefix=prefix,
+        providers=6,
+        members=3,
+        staff=2,
+        phone_numbers=50,
+        charges=300,
+        deposits=40,
+        hot_providers=1,
+        chunk_size=64,
+        workers=1,
+        stdout=StringIO(),
+    )
+
+
+def _snapshot(prefix):
+    accounts = ProviderAccount.objects.filter(name__startswith=f"{prefix} provider ")
+    names = dict(accounts.values_list("id", "name"))
+    return sorted(
+        (names[account_id], number, amount)
+        for account_id, number, amount in RequestCharge.objects.filter(
+            provider_account__in=accounts
+        ).values_list("provider_account_id", "phone_number__number", "amount")
+    )
+
+
+class GenerateDatasetTest(TestCase):
+    def test_generates_a_consistent_skewed_dataset(self):
+        _generate("a")
+        accounts = ProviderAccount.objects.filter(name__startswith="a provider ")
+        self.assertEqual(accounts.count(), 6)
+        self.assertEqual(RequestCharge.objects.count(), 300)
+        self.assertGreaterEqual(RequestDeposit.objects.count(), 40)
+        for account in accounts:
+            self.assertTrue(
+                ProviderAccountTeamMember.objects.filter(
+                    account=account, permission_level="admin"
+                ).exists()
+            )
+            # Balances match the ledger the reconciliation reads
+            report = WalletCheckpoint.reconcile(account.id, settle_seconds=-60)
+            self.assertEqual(report["drift"], 0)
+
+        # One hot provider takes most of the charges
+        busiest = max(
+            RequestCharge.objects.filter(provider_account=account).count()
+            for account in accounts
+        )
+        self.assertGreater(busiest, 150)
+
+        opened = RequestDeposit.history.filter(history_type="+").count()
+        self.assertEqual(opened, RequestDeposit.objects.count())
+        self.assertEqual(
+            RequestDeposit.history.filter(history_type="~").count(),
+            RequestDeposit.objects.exclude(status="open").count(),
+        )
+        self.assertFalse(ProviderWallet.objects.filter(balance__lt=0).exists())
+
+    def test_same_seed_generates_the_same_data(self):
+        _generate("a")
+        first = _snapshot("a")
+        RequestCharge.objects.all().delete()
+        _generate("b")
+        self.assertEqual(
+            [(name.replace("b ", "a ", 1), *rest) for name, *rest in _snapshot("b")],
+            first,
+        )
+
+    def test_refuses_an_existing_prefix(self):
+        _generate("a")
+        with self.assertRaises(CommandError):
+            _generate("a")
@@ -0,0 +1,127 @@
+import io
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from accounts.models import (
+    ProviderAccount,
+    ProviderAccountTeamMember,
+    ProviderWallet,
+    RequestDeposit,
+)
+from accounts.serializers import (
+    RequestDepositDetailSerializer,
+    RequestDepositDetailValuesSerializer,
+    RequestDepositValuesSerializer,
+    RequestDepositSerializer,
+)
+from core.parsers import ORJSONParser
+from core.renderers import ORJSONRenderer
+
+User = get_user_model()
+
+
+class ORJSONRendererTest(SimpleTestCase):
+    def test_matches_drf_renderer(self):
+        data = {
+            "text": 'سلام \u2028\u2029 "quoted" \\',
+            "numbers": [0, -1, 2**63 - 1, 1.5, None, True],
+            "nested": {1: "int key", "list": []},
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_falls_back_for_indent_and_big_integers(self):
+        renderer = ORJSONRenderer()
+        for data, media_type in (
+            ({"a": [1]}, "application/json; indent=2"),
+            ({"a": 2**70}, None),
+        ):
+            self.assertEqual(
+                renderer.render(data, media_type),
+                JSONRenderer().render(data, media_type),
+            )
+
+    def test_non_finite_floats_are_rejected(self):
+        for value in (float("nan"), float("inf"), -float("inf")):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                ORJSONRenderer().render({"a": [None, {"b": value}]})
+
+    def test_parser(self):
+        parser = ORJSONParser()
+        self.assertEqual(parser.parse(io.BytesIO('{"a": "ب"}'.encode())), {"a": "ب"})
+        with self.assertRaises(ParseError):
+            parser.parse(io.BytesIO(b"[NaN]"))
+
+
+class RequestDepositValuesSerializerTest(TestCase):
+    def setUp(self):
+        assignee = User.objects.create(username="assignee", is_staff=True)
+        self.user = User.objects.create(username="requester")
+        account = ProviderAccount.objects.create(name="حساب")
+        ProviderWallet.objects.create(account=account)
+        requester = ProviderAccountTeamMember.objects.create(
+            user=self.user,
+            account=account,
+            permission_level=ProviderAccountTeamMember.PermissionLevel.ADMIN,
+        )
+        for amount, comment in ((100, None), (200, "line\u2028break"), (300, "")):
+            RequestDeposit.objects.create(
+                requester=requester,
+                account=account,
+                assignee=assignee,
+                amount=amount,
+                comment=comment,
+            )
+
+    def test_output_is_byte_compatible(self):
+        queryset = RequestDeposit.objects.order_by("-created")
+        for model_serializer, values_serializer in (
+            (RequestDepositSerializer, RequestDepositValuesSerializer),
+            (RequestDepositDetailSerializer, RequestDepositDetailValuesSerializer),
+        ):
+            expected = JSONRenderer().render(model_serializer(queryset, many=True).data)
+            self.assertEqual(
+                ORJSONRenderer().render(values_serializer(queryset, many=True).data),
+                expected,
+            )
+            self.assertEqual(
+                ORJSONRenderer().render(values_serializer(queryset[0]).data),
+                JSONRenderer().render(model_serializer(queryset[0]).data),
+            )
+
+    def test_blank_comment_is_null(self):
+        deposit = RequestDeposit.objects.get(amount=300)
+
+        for serializer in (
+            RequestDepositDetailSerializer,
+            RequestDepositDetailValuesSerializer,
+        ):
+            self.assertIsNone(serializer(deposit).data["comment"])
+        self.assertIsNone(
+            RequestDepositDetailValuesSerializer(
+                RequestDeposit.objects.filter(amount=300), many=True
+            ).data[0]["comment"]
+        )
+
+    def test_list_endpoint(self):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=self.user).key}"
+        )
+
+        response = client.get(reverse("request_deposit"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.content,
+            JSONRenderer().render(
+                RequestDepositDetailSerializer(
+                    RequestDeposit.objects.order_by("-created"), many=True
+                ).data
+            ),
+        )
@@ -0,0 +1,145 @@
+from unittest import mock
+
+from django.db import OperationalError
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from core import metrics
+from core.backends.postgresql import base as pool_base
+
+
+class MetricsRegistryTest(SimpleTestCase):
+    def setUp(self):
+        registry = mock.patch.dict(metrics._metrics, clear=True)
+        collectors = mock.patch.object(metrics, "_collectors", [])
+        registry.start()
+        collectors.start()
+        self.addCleanup(registry.stop)
+        self.addCleanup(collectors.stop)
+
+    def test_metrics_are_registered_once_by_name(self):
+        requests = metrics.counter("requests_total", "Requests.")
+
+        self.assertIs(metrics.counter("requests_total", "Requests."), requests)
+        with self.assertRaisesMessage(
+            ValueError, "Metric requests_total is already registered as a counter."
+        ):
+            metrics.gauge("requests_total", "Requests.")
+
+    def test_render_uses_the_prometheus_text_format(self):
+        requests = metrics.counter("requests_total", "Requests.")
+        requests.inc(view="home")
+        requests.inc(2, view="home")
+        requests.inc(view='say "hi"\\')
+        in_flight = metrics.gauge("in_flight", "Requests in flight.")
+        in_flight.set(3)
+        in_flight.dec()
+
+        self.assertEqual(requests.get(view="home"), 3)
+        self.assertEqual(
+            metrics.render(),
+            "# HELP in_flight Requests in flight.\n"
+            "# TYPE in_flight gauge\n"
+            "in_flight 2\n"
+            "# HELP requests_total Requests.\n"
+            "# TYPE requests_total counter\n"
+            'requests_total{view="home"} 3\n'
+            'requests_total{view="say \\"hi\\"\\\\"} 1\n',
+        )
+
+    def test_histogram_buckets_are_cumulative(self):
+        latency = metrics.histogram("latency_seconds", "Latency.", buckets=(0.1, 1))
+        for value in (0.05, 0.1, 0.5, 3):
+            latency.observe(value, alias="default")
+
+        self.assertEqual(latency.get_count(alias="default"), 4)
+        self.assertEqual(
+            metrics.render().splitlines()[2:],
+            [
+                'latency_seconds_bucket{alias="default",le="0.1"} 2',
+                'latency_seconds_bucket{alias="default",le="1"} 3',
+                'latency_seconds_bucket{alias="default",le="+Inf"} 4',
+                'latency_seconds_sum{alias="default"} 3.65',
+                'latency_seconds_count{alias="default"} 4',
+            ],
+        )
+
+    def test_collectors_run_before_rendering(self):
+        size = metrics.gauge("pool_size", "Pool size.")
+        metrics.register_collector(lambda: size.set(5))
+
+        self.assertIn("pool_size 5\n", metrics.render())
+
+
+class PoolMetricsTest(SimpleTestCase):
+    def setUp(self):
+        self.wrapper = pool_base.DatabaseWrapper({}, alias="pool_test")
+
+    def test_checkout_latency_and_errors_are_recorded(self):
+        checkouts = pool_base.CHECKOUT_SECONDS.get_count(alias="pool_test")
+        errors = pool_base.CHECKOUT_ERRORS.get(alias="pool_test")
+        connect = mock.patch.object(
+            pool_base.base.DatabaseWrapper, "get_new_connection"
+        )
+
+        with connect as get_new_connection:
+            get_new_connection.return_value = "connection"
+            self.assertEqual(self.wrapper.get_new_connection({}), "connection")
+            get_new_connection.side_effect = OperationalError("pool timeout")
+            with self.assertRaises(OperationalError):
+                self.wrapper.get_new_connection({})
+
+        self.assertEqual(
+            pool_base.CHECKOUT_SECONDS.get_count(alias="pool_test"), checkouts + 2
+        )
+        self.assertEqual(pool_base.CHECKOUT_ERRORS.get(alias="pool_test"), errors + 1)
+
+    def test_pool_stats_are_exported(self):
+        pool = mock.Mock()
+        pool.get_stats.return_value = {
+            "pool_size": 8,
+            "pool_max": 10,
+            "pool_available": 2,
+            "requests_waiting": 1,
+            "requests_wait_ms": 250,
+        }
+
+        with mock.patch.dict(
+            pool_base.base.DatabaseWrapper._connection_pools, {"pool_test": pool}
+        ):
+            output = metrics.render()
+
+        for line in (
+            'db_pool_size{alias="pool_test"} 8',
+            'db_pool_max_size{alias="pool_test"} 10',
+            'db_pool_available{alias="pool_test"} 2',
+            'db_pool_waiting{alias="pool_test"} 1',
+            'db_pool_wait_milliseconds_total{alias="pool_test"} 250',
+            'db_pool_saturation{alias="pool_test"} 0.6',
+        ):
+            self.assertIn(line, output.splitlines())
+
+
+class MetricsViewTest(SimpleTestCase):
+    def setUp(self):
+        self.url = reverse("metrics")
+
+    @override_settings(METRICS_TOKEN="")
+    def test_not_served_without_a_token(self):
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        with self.settings(DEBUG=True):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    @override_settings(METRICS_TOKEN="scrape-secret")
+    def test_token_is_required(self):
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        response = self.client.get(self.url, HTTP_AUTHORIZATION="Bearer wrong")
+        self.assertEqual(response.status_code, 403)
+
+        response = self.client.get(self.url, HTTP_AUTHORIZATION="Bearer scrape-secret")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response["Content-Type"], "text/plain; version=0.0.4; charset=utf-8"
+        )
+        self.assertIn("# TYPE db_pool_size gauge", response.content.decode())
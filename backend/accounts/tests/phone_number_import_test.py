@@ -0,0 +1,67 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from accounts.models import PhoneNumber
+
+
+class PhoneNumberBulkImportTest(TestCase):
+    def setUp(self):
+        self.existing = PhoneNumber.objects.create(number="09120000000")
+
+    def test_bulk_import_skips_invalid_and_duplicates(self):
+        numbers = [
+            "09120000000",  # already exists
+            "09120000001",
+            "09120000001",  # repeated in the stream
+            " 09120000002 ",
+            "0912",  # too short
+            "08120000003",  # wrong prefix
+            "091200000041",  # too long
+        ]
+        progress = []
+
+        stats = PhoneNumber.bulk_import(
+            numbers, chunk_size=3, on_progress=progress.append
+        )
+
+        self.assertEqual(
+            stats, {"read": 7, "invalid": 3, "created": 2, "skipped": 2}
+        )
+        self.assertEqual(len(progress), 3)
+        self.assertEqual(PhoneNumber.objects.count(), 3)
+        self.assertTrue(PhoneNumber.objects.filter(number="09120000002").exists())
+
+    def test_bulk_import_is_idempotent(self):
+        numbers = [f"0913{i:07d}" for i in range(50)]
+
+        first = PhoneNumber.bulk_import(numbers, chunk_size=20)
+        second = PhoneNumber.bulk_import(numbers, chunk_size=20)
+
+        self.assertEqual(first["created"], 50)
+        self.assertEqual(second["created"], 0)
+        self.assertEqual(second["skipped"], 50)
+        self.assertEqual(PhoneNumber.objects.count(), 51)
+
+    def test_import_command_reads_csv(self):
+        with tempfile.NamedTemporaryFile(
+            "w", suffix=".csv", delete=False, encoding="utf-8"
+        ) as csv_file:
+            csv_file.write("name,number\n")
+            csv_file.write("a,09140000001\n")
+            csv_file.write("b,09140000002\n")
+            csv_file.write("c,invalid\n")
+        self.addCleanup(os.remove, csv_file.name)
+
+        out = StringIO()
+        call_command(
+            "import_phone_numbers", csv_file.name, column=1, chunk_size=2, stdout=out
+        )
+
+        self.assertIn("Imported 2 phone numbers", out.getvalue())
+        self.assertEqual(
+            PhoneNumber.objects.filter(number__startswith="0914").count(), 2
+        )
@@ -0,0 +1,63 @@
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+
+class PhoneNumberUniqueMigrationTest(TransactionTestCase):
+    before = [("accounts", "0001_initial")]
+    after = [("accounts", "0002_phonenumber_unique_number")]
+
+    def setUp(self):
+        self.executor = MigrationExecutor(connection)
+        self.executor.migrate(self.before)
+        self.addCleanup(self._migrate_to_latest)
+        apps = self.executor.loader.project_state(self.before).apps
+        self.PhoneNumber = apps.get_model("accounts", "PhoneNumber")
+        self.RequestCharge = apps.get_model("accounts", "RequestCharge")
+        User = apps.get_model("auth", "User")
+        account = apps.get_model("accounts", "ProviderAccount").objects.create(
+            name="Migrated"
+        )
+        self.requester = apps.get_model(
+            "accounts", "ProviderAccountTeamMember"
+        ).objects.create(
+            user=User.objects.create(username="migrated"),
+            account=account,
+            permission_level="staff",
+        )
+
+    def _migrate_to_latest(self):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def _charge(self, phone_number):
+        return self.RequestCharge.objects.create(
+            phone_number=phone_number,
+            provider_account_id=self.requester.account_id,
+            requester=self.requester,
+            user_id=self.requester.user_id,
+            amount=1000,
+        )
+
+    def test_duplicates_are_merged_into_the_oldest_row(self):
+        oldest, inactive_copy, active_copy = (
+            self.PhoneNumber.objects.create(number="09120000001", is_active=active)
+            for active in (False, False, True)
+        )
+        other = self.PhoneNumber.objects.create(number="09120000002")
+        charges = [self._charge(number) for number in (inactive_copy, active_copy)]
+        other_charge = self._charge(other)
+
+        self.executor.loader.build_graph()
+        self.executor.migrate(self.after)
+
+        self.assertEqual(
+            sorted(self.PhoneNumber.objects.values_list("id", "is_active")),
+            [(oldest.id, True), (other.id, True)],
+        )
+        for charge in charges:
+            charge.refresh_from_db()
+            self.assertEqual(charge.phone_number_id, oldest.id)
+        other_charge.refresh_from_db()
+        self.assertEqual(other_charge.phone_number_id, other.id)
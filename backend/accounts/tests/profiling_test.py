@@ -0,0 +1,79 @@
+import os
+import shutil
+import tempfile
+import time
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core import profiling
+from core.middleware import ProfilingMiddleware
+
+User = get_user_model()
+
+
+class ProfilingTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        enabled = override_settings(
+            PROFILING_ENABLED=True, PROFILING_DIR=self.directory
+        )
+        enabled.enable()
+        self.addCleanup(enabled.disable)
+
+        user = User.objects.create(username="profiled", is_staff=True)
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=user).key}"
+        )
+
+    def test_not_installed_when_disabled(self):
+        with self.settings(PROFILING_ENABLED=False):
+            with self.assertRaises(MiddlewareNotUsed):
+                ProfilingMiddleware(lambda request: None)
+
+    def test_signed_header_profiles_request(self):
+        response = self.client.get(
+            reverse("request_deposit"),
+            HTTP_X_PROFILE=profiling.issue_token("oncall"),
+        )
+
+        name = response["X-Profile-Id"]
+        self.assertTrue(Path(self.directory, f"{name}.prof").exists())
+        out = StringIO()
+        call_command("summarize_profiles", dir=self.directory, stdout=out)
+        self.assertIn("1 profiled requests", out.getvalue())
+        self.assertIn("accounts_requestdeposit", out.getvalue())
+
+    def test_invalid_header_is_ignored(self):
+        response = self.client.get(reverse("request_deposit"), HTTP_X_PROFILE="forged")
+
+        self.assertNotIn("X-Profile-Id", response)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_rotation_removes_oldest_profiles(self):
+        for index, stem in enumerate(("old", "new")):
+            for extension in (".prof", ".json"):
+                path = Path(self.directory, stem + extension)
+                path.write_bytes(b"x" * 100)
+                os.utime(path, (time.time() + index, time.time() + index))
+
+        profiling.rotate(self.directory, 250)
+
+        self.assertEqual(sorted(os.listdir(self.directory)), ["new.json", "new.prof"])
+
+    def test_normalize_sql(self):
+        self.assertEqual(
+            profiling.normalize_sql(
+                "SELECT * FROM t WHERE id IN (1, 2, 3) AND name = 'a''b'"
+            ),
+            "SELECT * FROM t WHERE id IN (...) AND name = ?",
+        )
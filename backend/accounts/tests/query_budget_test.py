@@ -0,0 +1,142 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from accounts.models import (
+    PhoneNumber,
+    ProviderAccount,
+    ProviderAccountTeamMember,
+    ProviderWallet,
+    RequestCharge,
+    RequestDeposit,
+    WalletHold,
+)
+from core.testing import QueryBudgetExceeded, query_budget
+
+User = get_user_model()
+
+
+class QueryBudgetTest(TestCase):
+    def test_exceeding_budget_fails_with_the_queries(self):
+        @query_budget(queries=1, locks=0)
+        def lookups():
+            PhoneNumber.objects.count()
+            PhoneNumber.objects.update(is_active=True)
+
+        with self.assertRaisesMessage(QueryBudgetExceeded, "2 queries, budget 1"):
+            lookups()
+
+
+class EndpointQueryBudgetTest(TestCase):
+    """
+    Query and lock budgets of the hot endpoints and the admin changelists,
+    on a few hundred rows per table. Run with --budget-report to see the
+    measured counts.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.superuser = User.objects.create(
+            username="budget_root", is_staff=True, is_superuser=True
+        )
+        PhoneNumber.objects.bulk_create(
+            PhoneNumber(number=f"0912{index:07d}") for index in range(300)
+        )
+        cls.members = []
+        for index in range(3):
+            account = ProviderAccount.objects.create(name=f"Budget {index}")
+            ProviderWallet.objects.create(account=account, balance=10**9)
+            for level in ("admin", "staff"):
+                user = User.objects.create(username=f"budget_{index}_{level}")
+                cls.members.append(
+                    ProviderAccountTeamMember.objects.create(
+                        user=user, account=account, permission_level=level
+                    )
+                )
+        for member in cls.members:
+            RequestCharge.create_charge_batch(
+                member.account_id,
+                member.user_id,
+                [(f"0912{index:07d}", 1000) for index in range(100)],
+            )
+            if member.permission_level == "admin":
+                RequestDeposit.objects.bulk_create(
+                    RequestDeposit(
+                        requester=member,
+                        user_id=member.user_id,
+                        account=member.account,
+                        assignee=cls.superuser,
+                        amount=1000 + index,
+                    )
+                    for index in range(100)
+                )
+            phone_number = PhoneNumber.objects.first()
+            for _ in range(20):
+                WalletHold.reserve(
+                    phone_number.id, member.account_id, member.user_id, 100
+                )
+
+    def _client(self, member):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=member.user).key}"
+        )
+        return client
+
+    def test_request_charge(self):
+        member = self.members[1]
+        client = self._client(member)
+
+        # Postgres adds SET LOCAL lock_timeout and locks the wallet with FOR UPDATE
+        with query_budget(queries=14, locks=2, name="POST request_charge/"):
+            response = client.post(
+                reverse("request_charge"),
+                {
+                    "phone_number": "09120000001",
+                    "provider_account": member.account_id,
+                    "amount": 100,
+                },
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, 201)
+
+    def test_request_deposit_list(self):
+        client = self._client(self.members[0])
+
+        with query_budget(queries=3, locks=0, name="GET request_deposit/"):
+            response = client.get(reverse("request_deposit"))
+
+        self.assertEqual(len(response.json()), 100)
+
+    def test_request_deposit_create(self):
+        member = self.members[0]
+        client = self._client(member)
+
+        with query_budget(queries=12, locks=0, name="POST request_deposit/"):
+            response = client.post(
+                reverse("request_deposit"),
+                {"amount": 1000, "account": member.account_id},
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, 201)
+
+    def test_admin_changelists(self):
+        self.client.force_login(self.superuser)
+        for model, budget in (
+            ("accounts_requestcharge", 8),
+            ("accounts_requestdeposit", 9),
+            ("accounts_phonenumber", 7),
+            ("accounts_provideraccount", 7),
+            ("accounts_chargedelivery", 8),
+            ("accounts_wallethold", 7),
+            ("accounts_chargejob", 7),
+            ("core_slowquery", 9),
+        ):
+            with self.subTest(model=model):
+                with query_budget(queries=budget, locks=0, name=f"admin {model}"):
+                    response = self.client.get(reverse(f"admin:{model}_changelist"))
+                self.assertEqual(response.status_code, 200)
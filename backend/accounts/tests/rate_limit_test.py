@@ -0,0 +1,132 @@
+import uuid
+from multiprocessing import shared_memory
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from accounts import throttling
+from accounts.models import (
+    PhoneNumber,
+    ProviderAccount,
+    ProviderAccountTeamMember,
+    ProviderWallet,
+)
+from core import ratelimit
+
+User = get_user_model()
+
+
+class TokenBucketBackendTest(SimpleTestCase):
+    def _assert_bucket(self, backend):
+        key = f"test:{uuid.uuid4()}"
+        # 1 token per second, bucket of 3
+        self.assertEqual(backend.consume(key, 1, 3), (True, 0.0))
+        self.assertTrue(backend.consume(key, 1, 3)[0])
+        self.assertTrue(backend.consume(key, 1, 3)[0])
+        allowed, wait = backend.consume(key, 1, 3)
+        self.assertFalse(allowed)
+        self.assertGreater(wait, 0.9)
+        self.assertTrue(backend.consume(f"{key}:other", 1, 3)[0])
+
+    def test_take_refills_over_time(self):
+        self.assertEqual(ratelimit.take(0, 0, 2, 1, 5, 1), (True, 1, 0.0))
+        self.assertEqual(ratelimit.take(4.5, 0, 0, 1, 5, -1), (True, 5, 0.0))
+        self.assertEqual(ratelimit.take(0, 0, 100, 1, 5, 1), (True, 4, 0.0))
+        self.assertEqual(ratelimit.take(0.5, 0, 0, 1, 5, 1), (False, 0.5, 0.5))
+
+    def test_local_memory_backend(self):
+        self._assert_bucket(ratelimit.LocalMemoryBackend())
+
+    def test_local_memory_backend_is_bounded(self):
+        backend = ratelimit.LocalMemoryBackend(max_keys=2)
+        for key in ("a", "b", "c"):
+            backend.consume(key, 1, 3)
+        self.assertEqual(list(backend._buckets), ["b", "c"])
+
+    def test_shared_memory_backend(self):
+        name = f"tabdeal_test_{uuid.uuid4().hex[:8]}"
+        backend = ratelimit.SharedMemoryBackend(name=name, slots=64)
+        self.addCleanup(lambda: shared_memory.SharedMemory(name).unlink())
+        self._assert_bucket(backend)
+
+        # a second attachment, like another worker process, sees the same buckets
+        other = ratelimit.SharedMemoryBackend(name=name, slots=64)
+        key = "shared"
+        for _ in range(3):
+            backend.consume(key, 1, 3)
+        self.assertFalse(other.consume(key, 1, 3)[0])
+
+
+@override_settings(
+    RATE_LIMITS={
+        "charge": {"user": 600, "account": 600},
+        "deposit": {"user": 600, "account": 600},
+    },
+    RATE_LIMIT_BURST_SECONDS=0.1,  # bucket of 1 request
+)
+class ChargeRateLimitTest(TestCase):
+    def setUp(self):
+        backend = mock.patch.object(
+            ratelimit, "_backend", ratelimit.LocalMemoryBackend()
+        )
+        backend.start()
+        self.addCleanup(backend.stop)
+        throttling._limits.clear()
+
+        self.provider_account = ProviderAccount.objects.create(name="Limited")
+        ProviderWallet.objects.create(account=self.provider_account, balance=10000)
+        PhoneNumber.objects.create(number="09120000001")
+        self.clients = []
+        for index in range(2):
+            user = User.objects.create(username=f"limited_{index}")
+            ProviderAccountTeamMember.objects.create(
+                user=user,
+                account=self.provider_account,
+                permission_level=ProviderAccountTeamMember.PermissionLevel.STAFF,
+            )
+            client = APIClient()
+            client.credentials(
+                HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=user).key}"
+            )
+            self.clients.append(client)
+
+    def _charge(self, client):
+        return client.post(
+            reverse("request_charge"),
+            {
+                "phone_number": "09120000001",
+                "provider_account": self.provider_account.id,
+                "amount": 100,
+            },
+            format="json",
+        )
+
+    def test_user_bucket_rejects_with_retry_after(self):
+        self.assertEqual(self._charge(self.clients[0]).status_code, 201)
+
+        response = self._charge(self.clients[0])
+
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response.headers)
+
+    def test_account_limit_is_configurable(self):
+        self.provider_account.charge_rate_limit = 1
+        self.provider_account.save()
+
+        self.assertEqual(self._charge(self.clients[0]).status_code, 201)
+        # another member of the same account shares the account bucket
+        self.assertEqual(self._charge(self.clients[1]).status_code, 429)
+
+    def test_account_rejection_gives_the_user_token_back(self):
+        self.provider_account.charge_rate_limit = 1
+        self.provider_account.save()
+        self.assertEqual(self._charge(self.clients[0]).status_code, 201)
+
+        self.assertEqual(self._charge(self.clients[1]).status_code, 429)
+
+        user_id = User.objects.get(username="limited_1").id
+        self.assertTrue(ratelimit.consume(f"charge:user:{user_id}", 600)[0])
@@ -0,0 +1,164 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, router
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from accounts import throttling
+from accounts.models import (
+    PhoneNumber,
+    ProviderAccount,
+    ProviderAccountTeamMember,
+    ProviderWallet,
+    RequestDeposit,
+)
+from core import db_router
+
+User = get_user_model()
+
+REPLICA = "replica_test"
+
+
+class ReplicaTestMixin:
+    """
+    Adds a second connection to the test database standing in for a replica,
+    with the lag reported by ``self.lag``.
+    """
+
+    def setUp(self):
+        super().setUp()
+        # A second connection to the test database, created here rather than
+        # in DATABASES so that the test runner leaves it alone
+        primary = connections[DEFAULT_DB_ALIAS]
+        connections[REPLICA] = type(primary)({**primary.settings_dict}, REPLICA)
+        self.addCleanup(self._remove_replica)
+        settings_override = override_settings(
+            DATABASE_REPLICAS=[REPLICA],
+            REPLICA_MAX_LAG_SECONDS=2,
+            REPLICA_LAG_CHECK_INTERVAL=60,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        checks = mock.patch.dict(db_router._replica_lag, clear=True)
+        checks.start()
+        self.addCleanup(checks.stop)
+        lag = mock.patch.object(db_router, "measure_replica_lag", return_value=0)
+        self.lag = lag.start()
+        self.addCleanup(lag.stop)
+
+    @staticmethod
+    def _remove_replica():
+        connections[REPLICA].close()
+        del connections[REPLICA]
+
+
+class ReplicaRouterTest(ReplicaTestMixin, SimpleTestCase):
+    def route(self, use_replica=True, write=False):
+        token = db_router.start_request()
+        try:
+            db_router.current_state().use_replica = use_replica
+            if write:
+                self.assertEqual(router.db_for_write(PhoneNumber), DEFAULT_DB_ALIAS)
+            return PhoneNumber.objects.all().db
+        finally:
+            db_router.end_request(token)
+
+    def test_reads_of_replica_requests_go_to_the_replica(self):
+        self.assertEqual(self.route(), REPLICA)
+        self.assertEqual(self.route(use_replica=False), DEFAULT_DB_ALIAS)
+        # Outside of a request, e.g. management commands
+        self.assertEqual(PhoneNumber.objects.all().db, DEFAULT_DB_ALIAS)
+
+    def test_writes_go_to_primary_and_pin_the_request(self):
+        self.assertEqual(self.route(write=True), DEFAULT_DB_ALIAS)
+
+    def test_lagging_replica_falls_back_to_primary(self):
+        self.lag.return_value = 5
+
+        self.assertEqual(self.route(), DEFAULT_DB_ALIAS)
+
+    def test_unreachable_replica_falls_back_to_primary(self):
+        self.lag.side_effect = OperationalError("could not connect")
+
+        with self.assertLogs("accounts", "WARNING"):
+            self.assertEqual(self.route(), DEFAULT_DB_ALIAS)
+
+    def test_lag_is_measured_once_per_interval(self):
+        self.route()
+        self.lag.return_value = 5
+        self.assertEqual(self.route(), REPLICA)
+
+        self.assertEqual(self.lag.call_count, 1)
+
+
+class ReplicaRoutingMiddlewareTest(ReplicaTestMixin, TransactionTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        throttling._limits.clear()
+        self.account = ProviderAccount.objects.create(name="Replica Provider")
+        ProviderWallet.objects.create(account=self.account)
+        self.staff_user = User.objects.create(username="replica_staff", is_staff=True)
+        self.member = ProviderAccountTeamMember.objects.create(
+            user=User.objects.create(username="replica_admin"),
+            account=self.account,
+            permission_level=ProviderAccountTeamMember.PermissionLevel.ADMIN,
+        )
+        RequestDeposit.objects.create(
+            requester=self.member,
+            account=self.account,
+            assignee=self.staff_user,
+            amount=1000,
+        )
+        self.client = self._client(self.member.user)
+        self.url = reverse("request_deposit")
+
+    def _client(self, user):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=user).key}"
+        )
+        return client
+
+    def get(self, client=None):
+        """The response and the number of queries run on the replica."""
+        with CaptureQueriesContext(connections[REPLICA]) as replica:
+            response = (client or self.client).get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response, len(replica)
+
+    def test_safe_view_reads_from_the_replica(self):
+        response, replica_queries = self.get()
+
+        self.assertGreater(replica_queries, 0)
+        self.assertEqual(len(response.json()), 1)
+
+    def test_client_reads_its_writes_from_the_primary(self):
+        other = ProviderAccountTeamMember.objects.create(
+            user=User.objects.create(username="replica_staff_member"),
+            account=self.account,
+            permission_level=ProviderAccountTeamMember.PermissionLevel.ADMIN,
+        )
+        response = self.client.post(
+            self.url, {"account": self.account.id, "amount": 2000}, format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+
+        response, replica_queries = self.get()
+        self.assertEqual(replica_queries, 0)
+        self.assertEqual(len(response.json()), 2)
+        # Other clients are not pinned
+        self.assertGreater(self.get(self._client(other.user))[1], 0)
+
+    def test_lagging_replica_is_skipped(self):
+        self.lag.return_value = 5
+
+        response, replica_queries = self.get()
+
+        self.assertEqual(replica_queries, 0)
+        self.assertEqual(len(response.json()), 1)
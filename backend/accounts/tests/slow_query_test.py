@@ -0,0 +1,109 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from accounts.models import ProviderAccount, ProviderAccountTeamMember
+from core import slow_queries
+from core.models import SlowQuery
+
+User = get_user_model()
+
+
+class SlowQueryLogTest(TestCase):
+    def test_redact_keeps_only_types(self):
+        self.assertEqual(
+            slow_queries.redact(["09120000001", 100, None]),
+            ["str:11", "int", "NoneType"],
+        )
+
+    def test_fingerprint_ignores_literals(self):
+        self.assertEqual(
+            slow_queries.fingerprint("SELECT 1 FROM t WHERE id = 5"),
+            slow_queries.fingerprint("SELECT  1 FROM t WHERE id = 7"),
+        )
+
+    @override_settings(SLOW_QUERY_MAX_ROWS=2)
+    def test_captures_queries_over_threshold_and_bounds_the_table(self):
+        with slow_queries.capture_slow_queries(threshold_ms=0) as log:
+            with connection.cursor() as cursor:
+                for value in range(3):
+                    cursor.execute("SELECT %s", [f"secret-{value}"])
+        self.assertEqual(len(log.records), 3)
+
+        log.flush(view="test", provider_account_id=7)
+
+        rows = list(SlowQuery.objects.order_by("id"))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0].params, ["str:8"])
+        self.assertEqual(rows[0].provider_account_id, 7)
+        self.assertEqual(rows[0].plan, "")  # EXPLAIN is Postgres only
+
+    def test_explain_skips_statements_that_lock_rows(self):
+        postgres = mock.MagicMock(vendor="postgresql", in_atomic_block=False)
+        cursor = postgres.cursor.return_value.__enter__.return_value
+        cursor.fetchall.return_value = [("Seq Scan on accounts_phonenumber",)]
+
+        with mock.patch.object(slow_queries.transaction, "atomic"):
+            self.assertEqual(
+                slow_queries.explain(
+                    postgres, "SELECT * FROM accounts_phonenumber", []
+                ),
+                "Seq Scan on accounts_phonenumber",
+            )
+            cursor.execute.reset_mock()
+            for sql in (
+                "SELECT * FROM accounts_providerwallet FOR UPDATE",
+                "SELECT * FROM accounts_providerwallet FOR NO KEY UPDATE SKIP LOCKED",
+                "UPDATE accounts_providerwallet SET balance = 0",
+            ):
+                self.assertEqual(slow_queries.explain(postgres, sql, []), "")
+        cursor.execute.assert_not_called()
+
+    def test_explain_skips_transactions_holding_row_locks(self):
+        postgres = mock.MagicMock(vendor="postgresql", in_atomic_block=True)
+        cursor = postgres.cursor.return_value.__enter__.return_value
+        cursor.fetchone.return_value = (True,)
+
+        plan = slow_queries.explain(postgres, "SELECT * FROM accounts_phonenumber", [])
+
+        self.assertEqual(plan, "")
+        cursor.execute.assert_called_once_with(
+            "SELECT pg_current_xact_id_if_assigned() IS NOT NULL"
+        )
+
+    def test_fast_queries_are_ignored(self):
+        with slow_queries.capture_slow_queries(threshold_ms=60_000) as log:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+        self.assertEqual(log.records, [])
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0.000001)
+    def test_middleware_records_view_and_account(self):
+        account = ProviderAccount.objects.create(name="Slow")
+        user = User.objects.create(username="slow_admin")
+        ProviderAccountTeamMember.objects.create(
+            user=user,
+            account=account,
+            permission_level=ProviderAccountTeamMember.PermissionLevel.ADMIN,
+        )
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=user).key}"
+        )
+
+        client.get(reverse("request_deposit"))
+
+        query = SlowQuery.objects.filter(sql__contains="accounts_requestdeposit").get()
+        self.assertEqual(query.view, "request_deposit")
+        self.assertEqual(query.provider_account_id, account.id)
+
+        out = StringIO()
+        call_command("slow_query_report", account=account.id, stdout=out)
+        self.assertIn(query.fingerprint[:12], out.getvalue())
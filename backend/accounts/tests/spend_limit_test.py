@@ -0,0 +1,194 @@
+from datetime import timedelta
+from io import StringIO
+
+import httpx
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts.dispatcher import ChargeDispatcher
+from accounts.models import (
+    PhoneNumber,
+    ProviderAccount,
+    ProviderAccountTeamMember,
+    ProviderWallet,
+    RequestCharge,
+    SpendCounter,
+    WalletHold,
+)
+
+User = get_user_model()
+
+
+class SpendLimitTest(TestCase):
+    def setUp(self):
+        self.provider_account = ProviderAccount.objects.create(name="Limited")
+        self.wallet = ProviderWallet.objects.create(
+            account=self.provider_account, balance=10**6
+        )
+        self.phone_number = PhoneNumber.objects.create(number="09120000000")
+        self.admin, self.staff = (
+            ProviderAccountTeamMember.objects.create(
+                user=User.objects.create(username=f"limited_{level}"),
+                account=self.provider_account,
+                permission_level=level,
+            )
+            for level in ("admin", "staff")
+        )
+
+    def charge(self, member, amount):
+        return RequestCharge.create_charge_safely(
+            phone_number_id=self.phone_number.id,
+            provider_account_id=self.provider_account.id,
+            user_id=member.user_id,
+            amount=amount,
+        )
+
+    def spent(self, scope, period=SpendCounter.Period.DAY):
+        return SpendCounter.objects.get(scope=scope, period=period).amount
+
+    def test_account_daily_limit_rejects_the_charge_going_over(self):
+        self.provider_account.daily_spend_limit = 5000
+        self.provider_account.save()
+        self.charge(self.admin, 3000)
+        self.charge(self.staff, 2000)
+
+        with self.assertRaisesMessage(
+            ValueError, "Daily spend limit of the provider account reached."
+        ):
+            self.charge(self.admin, 1)
+
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, 10**6 - 5000)
+        self.assertEqual(RequestCharge.objects.count(), 2)
+        self.assertEqual(self.spent(f"account:{self.provider_account.id}"), 5000)
+
+    def test_member_limit_applies_to_that_member_only(self):
+        self.staff.monthly_spend_limit = 4000
+        self.staff.save()
+        self.charge(self.staff, 4000)
+
+        with self.assertRaisesMessage(
+            ValueError, "Monthly spend limit of the requester reached."
+        ):
+            self.charge(self.staff, 1000)
+        self.charge(self.admin, 1000)
+
+        self.assertEqual(
+            self.spent(f"member:{self.staff.id}", SpendCounter.Period.MONTH), 4000
+        )
+        self.assertEqual(self.spent(f"account:{self.provider_account.id}"), 5000)
+
+    def test_limit_set_mid_window_counts_the_earlier_charges(self):
+        self.charge(self.admin, 3000)
+        self.admin.daily_spend_limit = 4000
+        self.admin.save()
+
+        with self.assertRaisesMessage(
+            ValueError, "Daily spend limit of the requester reached."
+        ):
+            self.charge(self.admin, 2000)
+        self.charge(self.admin, 1000)
+
+    def test_new_window_starts_from_zero(self):
+        self.provider_account.daily_spend_limit = 5000
+        self.provider_account.save()
+        SpendCounter.objects.create(
+            scope=f"account:{self.provider_account.id}",
+            period=SpendCounter.Period.DAY,
+            window_start=timezone.localdate() - timedelta(days=1),
+            amount=5000,
+        )
+
+        self.charge(self.admin, 5000)
+
+    def test_batch_rejects_the_items_over_the_limit(self):
+        self.staff.daily_spend_limit = 5000
+        self.staff.save()
+        self.charge(self.staff, 1000)
+
+        results = RequestCharge.create_charge_batch(
+            self.provider_account.id,
+            self.staff.user_id,
+            [(self.phone_number.number, 3000)] * 2 + [(self.phone_number.number, 1000)],
+        )
+
+        self.assertIsInstance(results[0], RequestCharge)
+        self.assertEqual(results[1], "Daily spend limit of the requester reached.")
+        self.assertIsInstance(results[2], RequestCharge)
+        self.assertEqual(self.spent(f"member:{self.staff.id}"), 5000)
+
+    def reserve(self, member, amount, ttl=None):
+        return WalletHold.reserve(
+            phone_number_id=self.phone_number.id,
+            provider_account_id=self.provider_account.id,
+            user_id=member.user_id,
+            amount=amount,
+            ttl=ttl,
+        )
+
+    def test_hold_counts_towards_the_limit(self):
+        self.staff.daily_spend_limit = 5000
+        self.staff.save()
+        hold = self.reserve(self.staff, 4000)
+
+        with self.assertRaisesMessage(
+            ValueError, "Daily spend limit of the requester reached."
+        ):
+            self.reserve(self.staff, 2000)
+        with self.assertRaisesMessage(
+            ValueError, "Daily spend limit of the requester reached."
+        ):
+            self.charge(self.staff, 2000)
+        hold.capture()
+
+        self.assertEqual(self.spent(f"member:{self.staff.id}"), 4000)
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, 10**6 - 4000)
+        self.assertEqual(self.wallet.held_balance, 0)
+
+    def test_released_and_expired_holds_are_taken_off(self):
+        self.reserve(self.staff, 1000).release()
+        self.reserve(self.staff, 2000, ttl=0)
+        self.assertEqual(self.spent(f"member:{self.staff.id}"), 2000)
+
+        WalletHold.sweep_expired()
+
+        self.assertEqual(self.spent(f"member:{self.staff.id}"), 0)
+        self.assertEqual(self.spent(f"account:{self.provider_account.id}"), 0)
+
+    def test_refunded_delivery_is_taken_off(self):
+        self.staff.daily_spend_limit = 5000
+        self.staff.save()
+        self.charge(self.staff, 4000)
+        transport = httpx.MockTransport(lambda request: httpx.Response(400))
+
+        with self.assertLogs("accounts"):
+            ChargeDispatcher(transport=transport).run_once()
+
+        self.assertEqual(self.spent(f"member:{self.staff.id}"), 0)
+        self.assertEqual(
+            self.spent(
+                f"account:{self.provider_account.id}", SpendCounter.Period.MONTH
+            ),
+            0,
+        )
+        self.charge(self.staff, 5000)
+
+    def test_prune_deletes_old_windows(self):
+        today = timezone.localdate()
+        for days in (0, 61, 100):
+            SpendCounter.objects.create(
+                scope="account:1",
+                period=SpendCounter.Period.DAY,
+                window_start=today - timedelta(days=days),
+            )
+
+        with self.settings(SPEND_COUNTER_RETENTION_DAYS=62):
+            call_command("prune_spend_counters", stdout=StringIO())
+
+        self.assertEqual(
+            sorted(SpendCounter.objects.values_list("window_start", flat=True)),
+            [today - timedelta(days=61), today],
+        )
@@ -0,0 +1,122 @@
+import json
+import shutil
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import LiveServerTestCase, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from accounts.models import (
+    PhoneNumber,
+    ProviderAccount,
+    ProviderAccountTeamMember,
+    ProviderWallet,
+    RequestCharge,
+)
+from core import traffic
+
+User = get_user_model()
+
+
+class TrafficCaptureTest(LiveServerTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        enabled = override_settings(
+            TRAFFIC_CAPTURE_ENABLED=True, TRAFFIC_CAPTURE_DIR=self.directory
+        )
+        enabled.enable()
+        self.addCleanup(enabled.disable)
+
+        account = ProviderAccount.objects.create(
+            name="Captured", charge_rate_limit=1000
+        )
+        self.account_id = account.id
+        ProviderWallet.objects.create(account=account, balance=10**6)
+        PhoneNumber.objects.create(number="09120000001")
+        self.clients = []
+        for level in ("admin", "staff"):
+            user = User.objects.create(username=f"captured_{level}")
+            ProviderAccountTeamMember.objects.create(
+                user=user, account=account, permission_level=level
+            )
+            client = APIClient()
+            client.credentials(
+                HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=user).key}"
+            )
+            self.clients.append(client)
+
+    def _charge(self, client, **extra):
+        return client.post(
+            reverse("request_charge"),
+            {
+                "phone_number": "09120000001",
+                "provider_account": self.account_id,
+                "amount": 100,
+                **extra,
+            },
+            format="json",
+        )
+
+    def _capture_files(self):
+        return sorted(str(path) for path in Path(self.directory).glob("*.jsonl"))
+
+    def test_capture_strips_credentials(self):
+        self._charge(self.clients[0], password="hunter2")
+        self.clients[1].get(reverse("request_deposit"))
+        self.clients[1].get("/api/schema/")
+
+        records = traffic.read_records(self._capture_files())
+        content = Path(self._capture_files()[0]).read_text()
+        self.assertEqual(len(records), 2)
+        for token in Token.objects.values_list("key", flat=True):
+            self.assertNotIn(token, content)
+        self.assertNotIn("hunter2", content)
+        charge = records[0]
+        self.assertEqual(charge["view"], "request_charge")
+        self.assertEqual(charge["status"], 201)
+        self.assertEqual(json.loads(charge["body"])["password"], traffic.REDACTED)
+        self.assertEqual(
+            charge["user_id"], User.objects.get(username="captured_admin").id
+        )
+        self.assertNotEqual(charge["client"], records[1]["client"])
+
+    def test_replay_sends_captured_requests_in_client_order(self):
+        for _ in range(3):
+            self._charge(self.clients[0])
+            self._charge(self.clients[1])
+        self.clients[0].get(reverse("request_deposit"))
+        results_file = Path(self.directory, "results.json")
+
+        out = StringIO()
+        with self.settings(TRAFFIC_CAPTURE_ENABLED=False):
+            call_command(
+                "replay_traffic",
+                *self._capture_files(),
+                url=self.live_server_url,
+                speed=0,
+                concurrency=1,
+                save=str(results_file),
+                stdout=out,
+            )
+            call_command(
+                "replay_traffic",
+                *self._capture_files(),
+                url=self.live_server_url,
+                speed=0,
+                concurrency=1,
+                baseline=str(results_file),
+                stdout=out,
+            )
+
+        self.assertEqual(RequestCharge.objects.count(), 18)
+        results = json.loads(results_file.read_text())
+        self.assertEqual([result["status"] for result in results], [201] * 6 + [200])
+        self.assertIn("Replayed 7 requests of 2 clients", out.getvalue())
+        self.assertIn("POST request_charge", out.getvalue())
+        self.assertIn("Δp95", out.getvalue())
@@ -0,0 +1,82 @@
+from unittest import mock
+
+from django.db import IntegrityError, OperationalError, transaction
+from django.test import TransactionTestCase, override_settings
+
+from accounts.models import ProviderAccount, ProviderWallet
+from core import ratelimit, transactions
+
+
+class TransactionRetryTest(TransactionTestCase):
+    def setUp(self):
+        backend = mock.patch.object(
+            ratelimit, "_backend", ratelimit.LocalMemoryBackend()
+        )
+        sleep = mock.patch.object(transactions.time, "sleep")
+        backend.start()
+        self.sleep = sleep.start()
+        self.addCleanup(backend.stop)
+        self.addCleanup(sleep.stop)
+        self.calls = 0
+
+    def _flaky(self, failures, error=None):
+        @transactions.atomic_with_retry(name=f"flaky-{self.id()}")
+        def run():
+            self.calls += 1
+            self.assertTrue(transaction.get_connection().in_atomic_block)
+            if self.calls <= failures:
+                raise error or OperationalError("database is locked")
+            return self.calls
+
+        return run
+
+    def test_transient_failures_are_retried(self):
+        self.assertEqual(self._flaky(2)(), 3)
+        self.assertEqual(self.sleep.call_count, 2)
+        self.assertEqual(
+            transactions.RETRIES.get(
+                function=f"flaky-{self.id()}", reason="database_locked"
+            ),
+            2,
+        )
+
+    @override_settings(TRANSACTION_RETRY_ATTEMPTS=2)
+    def test_gives_up_after_attempts(self):
+        with self.assertRaises(OperationalError):
+            self._flaky(5)()
+        self.assertEqual(self.calls, 2)
+
+    @override_settings(TRANSACTION_RETRY_BUDGET=6)  # a bucket of 1 retry
+    def test_retry_budget_is_shared_between_calls(self):
+        self.assertEqual(self._flaky(1)(), 2)
+        self.calls = 0
+        with self.assertRaises(OperationalError):
+            self._flaky(1)()
+        self.assertEqual(self.calls, 1)
+
+    def test_other_errors_are_not_retried(self):
+        with self.assertRaises(IntegrityError):
+            self._flaky(1, IntegrityError("duplicate key"))()
+        self.assertEqual(self.calls, 1)
+
+    def test_no_retry_inside_outer_transaction(self):
+        with self.assertRaises(OperationalError), transaction.atomic():
+            self._flaky(1)()
+        self.assertEqual(self.calls, 1)
+
+    def test_deposit_is_retried(self):
+        account = ProviderAccount.objects.create(name="Retried")
+        wallet = ProviderWallet.objects.create(account=account, balance=0)
+        failures = [OperationalError("database is locked")]
+
+        def flaky_wallet_changed(account_id):
+            if failures:
+                raise failures.pop()
+
+        with mock.patch(
+            "accounts.models.provider_wallet.wallet_changed", flaky_wallet_changed
+        ):
+            ProviderWallet.deposit(account_id=account.id, amount=500)
+
+        wallet.refresh_from_db()
+        self.assertEqual(wallet.balance, 500)
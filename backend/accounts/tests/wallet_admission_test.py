@@ -0,0 +1,130 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import OperationalError
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from accounts import admission, throttling
+from accounts.models import (
+    PhoneNumber,
+    ProviderAccount,
+    ProviderAccountTeamMember,
+    ProviderWallet,
+    RequestCharge,
+)
+from core import transactions
+
+User = get_user_model()
+
+
+class WalletAdmissionTest(TestCase):
+    def setUp(self):
+        self.provider_account = ProviderAccount.objects.create(name="Hot")
+        self.wallet = ProviderWallet.objects.create(
+            account=self.provider_account, balance=10000
+        )
+        self.phone_number = PhoneNumber.objects.create(number="09120000002")
+        self.user = User.objects.create(username="hot_staff")
+        ProviderAccountTeamMember.objects.create(
+            user=self.user,
+            account=self.provider_account,
+            permission_level=ProviderAccountTeamMember.PermissionLevel.STAFF,
+        )
+
+    def _charge(self):
+        return RequestCharge.create_charge_safely(
+            phone_number_id=self.phone_number.id,
+            provider_account_id=self.provider_account.id,
+            user_id=self.user.id,
+            amount=100,
+        )
+
+    def test_waiters_are_tracked_and_released(self):
+        with admission.wallet_admission(self.provider_account.id):
+            self.assertEqual(admission._waiters[self.provider_account.id], 1)
+        self.assertNotIn(self.provider_account.id, admission._waiters)
+
+    @override_settings(WALLET_MAX_WAITERS=1)
+    def test_rejects_when_queue_is_full(self):
+        with admission.wallet_admission(self.provider_account.id):
+            with self.assertRaises(admission.WalletBusyError):
+                self._charge()
+
+        self.assertEqual(RequestCharge.objects.count(), 0)
+        self._charge()
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, 9900)
+
+    def test_lock_timeout_becomes_wallet_busy(self):
+        with self.assertRaises(admission.WalletBusyError):
+            with admission.wallet_admission(self.provider_account.id):
+                raise OperationalError("database is locked")
+        self.assertNotIn(self.provider_account.id, admission._waiters)
+
+    @override_settings(WALLET_MAX_WAITERS=0, WALLET_BUSY_RETRY_AFTER=3)
+    def test_api_answers_429_with_retry_after(self):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=self.user).key}"
+        )
+
+        response = client.post(
+            reverse("request_charge"),
+            {
+                "phone_number": self.phone_number.number,
+                "provider_account": self.provider_account.id,
+                "amount": 100,
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers["Retry-After"], "3")
+
+
+class ChargeLockTimeoutTest(TransactionTestCase):
+    def setUp(self):
+        throttling._limits.clear()
+        self.provider_account = ProviderAccount.objects.create(name="Locked")
+        ProviderWallet.objects.create(account=self.provider_account, balance=10000)
+        self.phone_number = PhoneNumber.objects.create(number="09120000003")
+        self.user = User.objects.create(username="locked_staff")
+        ProviderAccountTeamMember.objects.create(
+            user=self.user,
+            account=self.provider_account,
+            permission_level=ProviderAccountTeamMember.PermissionLevel.STAFF,
+        )
+
+    def test_lock_timeout_is_tried_once_and_answers_429(self):
+        calls = []
+
+        def lock_timeout(milliseconds):
+            calls.append(milliseconds)
+            # What psycopg raises when the Postgres lock_timeout runs out
+            cause = Exception("canceling statement due to lock timeout")
+            cause.sqlstate = transactions.LOCK_NOT_AVAILABLE
+            raise OperationalError(str(cause)) from cause
+
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=self.user).key}"
+        )
+        with mock.patch(
+            "accounts.models.request_charge.set_local_lock_timeout", lock_timeout
+        ):
+            response = client.post(
+                reverse("request_charge"),
+                {
+                    "phone_number": self.phone_number.number,
+                    "provider_account": self.provider_account.id,
+                    "amount": 100,
+                },
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(RequestCharge.objects.count(), 0)
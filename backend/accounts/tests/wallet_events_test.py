@@ -0,0 +1,143 @@
+import asyncio
+import json
+import threading
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from accounts import throttling, wallet_cache
+from accounts.models import (
+    ProviderAccount,
+    ProviderAccountTeamMember,
+    ProviderWallet,
+    RequestDeposit,
+)
+from core import events
+
+User = get_user_model()
+
+
+class EventBrokerTest(SimpleTestCase):
+    async def test_delivers_events_of_other_threads_to_subscribers(self):
+        broker = events.Broker()
+        subscription = broker.subscribe(["account:1"])
+        other = broker.subscribe(["account:2"])
+
+        thread = threading.Thread(
+            target=broker.dispatch, args=("account:1", {"type": "wallet"})
+        )
+        thread.start()
+        thread.join()
+
+        self.assertEqual(await subscription.get(1), {"type": "wallet"})
+        self.assertIsNone(await other.get(0.01))
+        subscription.close()
+        broker.dispatch("account:1", {"type": "wallet"})
+        self.assertIsNone(await subscription.get(0.01))
+
+    async def test_lagging_subscriber_is_told_to_resynchronize(self):
+        broker = events.Broker()
+        subscription = broker.subscribe(["account:1"], max_size=2)
+
+        for index in range(5):
+            broker.dispatch("account:1", {"type": "deposit", "id": index})
+        await asyncio.sleep(0)
+
+        self.assertIs(await subscription.get(1), events.LAGGED)
+        self.assertIsNone(await subscription.get(0.01))
+
+
+@override_settings(EVENTS_BALANCE_INTERVAL=0, EVENTS_KEEPALIVE_SECONDS=0.05)
+class WalletEventStreamTest(TestCase):
+    def setUp(self):
+        wallet_cache.clear()
+        self.addCleanup(wallet_cache.clear)
+        throttling._limits.clear()
+        self.account = ProviderAccount.objects.create(name="Streamed Provider")
+        ProviderWallet.objects.create(account=self.account, balance=1000)
+        self.staff_user = User.objects.create(username="events_staff", is_staff=True)
+        self.member = ProviderAccountTeamMember.objects.create(
+            user=User.objects.create(username="events_admin"),
+            account=self.account,
+            permission_level=ProviderAccountTeamMember.PermissionLevel.ADMIN,
+        )
+        self.token = Token.objects.create(user=self.member.user).key
+
+    def _deposit_and_approve(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            deposit = RequestDeposit.objects.create(
+                requester=self.member,
+                account=self.account,
+                assignee=self.staff_user,
+                amount=500,
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            deposit.status = RequestDeposit.Status.APPROVED
+            deposit.save()
+        return deposit.id
+
+    async def _next_event(self, stream):
+        while True:
+            chunk = await asyncio.wait_for(anext(stream), 2)
+            chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+            if not chunk.startswith(":"):
+                name, data = chunk.strip().split("\n")
+                return name.removeprefix("event: "), json.loads(data[len("data: ") :])
+
+    async def test_streams_balance_and_deposit_changes(self):
+        response = await self.async_client.get(
+            reverse("wallet_events"), headers={"Authorization": f"Token {self.token}"}
+        )
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        stream = aiter(response.streaming_content)
+        try:
+            name, data = await self._next_event(stream)
+            self.assertEqual((name, data["balance"]), ("balance", 1000))
+
+            deposit_id = await sync_to_async(self._deposit_and_approve)()
+
+            received = [await self._next_event(stream) for _ in range(3)]
+        finally:
+            await stream.aclose()
+
+        self.assertIn(
+            (
+                "deposit",
+                {
+                    "id": deposit_id,
+                    "account": self.account.id,
+                    "amount": 500,
+                    "status": "open",
+                },
+            ),
+            received,
+        )
+        self.assertIn(
+            (
+                "deposit",
+                {
+                    "id": deposit_id,
+                    "account": self.account.id,
+                    "amount": 500,
+                    "status": "approved",
+                },
+            ),
+            received,
+        )
+        balances = [data["balance"] for name, data in received if name == "balance"]
+        self.assertEqual(balances, [1500])
+
+    async def test_requires_a_token(self):
+        response = await self.async_client.get(reverse("wallet_events"))
+
+        self.assertEqual(response.status_code, 401)
+
+    def test_not_served_by_wsgi(self):
+        response = self.client.get(
+            reverse("wallet_events"), HTTP_AUTHORIZATION=f"Token {self.token}"
+        )
+
+        self.assertEqual(response.status_code, 501)
@@ -0,0 +1,118 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from accounts.models import (
+    ChargeDelivery,
+    PhoneNumber,
+    ProviderAccount,
+    ProviderAccountTeamMember,
+    ProviderWallet,
+    RequestCharge,
+    WalletCheckpoint,
+    WalletHold,
+)
+
+User = get_user_model()
+
+
+class WalletHoldTest(TestCase):
+    def setUp(self):
+        self.provider_account = ProviderAccount.objects.create(name="Hold Provider")
+        self.provider_wallet = ProviderWallet.objects.create(
+            account=self.provider_account, balance=1000
+        )
+        self.user = User.objects.create(username="hold_staff")
+        ProviderAccountTeamMember.objects.create(
+            user=self.user,
+            account=self.provider_account,
+            permission_level=ProviderAccountTeamMember.PermissionLevel.STAFF,
+        )
+        self.phone_number = PhoneNumber.objects.create(number="09120000001")
+
+    def _reserve(self, amount, ttl=None):
+        return WalletHold.reserve(
+            phone_number_id=self.phone_number.id,
+            provider_account_id=self.provider_account.id,
+            user_id=self.user.id,
+            amount=amount,
+            ttl=ttl,
+        )
+
+    def _assert_wallet(self, balance, held_balance):
+        self.provider_wallet.refresh_from_db()
+        self.assertEqual(self.provider_wallet.balance, balance)
+        self.assertEqual(self.provider_wallet.held_balance, held_balance)
+
+    def test_reserve_moves_amount_to_held_balance(self):
+        self._reserve(600)
+
+        self._assert_wallet(400, 600)
+        with self.assertRaisesRegex(
+            ValueError, "Insufficient balance in provider account."
+        ):
+            self._reserve(500)
+        self._assert_wallet(400, 600)
+
+    def test_deposit_keeps_held_balance_of_concurrent_holds(self):
+        self._reserve(600)
+
+        with CaptureQueriesContext(connection) as queries:
+            ProviderWallet.deposit(account_id=self.provider_account.id, amount=100)
+
+        # The balance is moved by one UPDATE that leaves held_balance alone
+        writes = [q["sql"] for q in queries if q["sql"].startswith("UPDATE")]
+        self.assertEqual(len(writes), 1)
+        self.assertNotIn("held_balance", writes[0])
+        self._assert_wallet(500, 600)
+        with self.assertRaisesMessage(ValueError, "Provider account not found."):
+            ProviderWallet.deposit(account_id=0, amount=100)
+
+    def test_capture_creates_charge(self):
+        hold = self._reserve(600)
+
+        charge = hold.capture()
+
+        self.assertEqual(hold.status, WalletHold.Status.CAPTURED)
+        self.assertEqual(RequestCharge.objects.get().id, charge.id)
+        self.assertEqual(charge.delivery.status, ChargeDelivery.Status.PENDING)
+        self._assert_wallet(400, 0)
+        result = WalletCheckpoint.reconcile(self.provider_account.id, settle_seconds=0)
+        self.assertEqual(result["drift"], 1000)  # the opening balance
+        with self.assertRaisesRegex(ValueError, "Hold is not active."):
+            hold.capture()
+
+    def test_release_returns_amount(self):
+        hold = self._reserve(600)
+
+        hold.release()
+
+        self.assertEqual(hold.status, WalletHold.Status.RELEASED)
+        self._assert_wallet(1000, 0)
+        with self.assertRaisesRegex(ValueError, "Hold is not active."):
+            hold.capture()
+        self.assertEqual(RequestCharge.objects.count(), 0)
+
+    def test_sweep_expired_holds(self):
+        expired = [self._reserve(100), self._reserve(200)]
+        WalletHold.objects.filter(id__in=[hold.id for hold in expired]).update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        active = self._reserve(300)
+
+        self.assertEqual(WalletHold.sweep_expired(batch_size=1), 1)
+        self.assertEqual(WalletHold.sweep_expired(batch_size=10), 1)
+        self.assertEqual(WalletHold.sweep_expired(batch_size=10), 0)
+
+        self._assert_wallet(700, 300)
+        self.assertEqual(
+            WalletHold.objects.filter(status=WalletHold.Status.EXPIRED).count(), 2
+        )
+        with self.assertRaisesRegex(ValueError, "Hold is not active."):
+            expired[0].capture()
+        active.capture()
+        self._assert_wallet(700, 0)
@@ -0,0 +1,112 @@
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from accounts.models import (
+    PhoneNumber,
+    ProviderAccount,
+    ProviderAccountTeamMember,
+    ProviderWallet,
+    RequestCharge,
+    RequestDeposit,
+    WalletCheckpoint,
+)
+
+User = get_user_model()
+
+
+class WalletReconciliationTest(TestCase):
+    def setUp(self):
+        self.staff_user = User.objects.create(username="staff", is_staff=True)
+        self.user = User.objects.create(username="admin_member")
+        self.provider_account = ProviderAccount.objects.create(name="Ledger Provider")
+        self.provider_wallet = ProviderWallet.objects.create(
+            account=self.provider_account, balance=0
+        )
+        self.requester = ProviderAccountTeamMember.objects.create(
+            user=self.user,
+            account=self.provider_account,
+            permission_level=ProviderAccountTeamMember.PermissionLevel.ADMIN,
+        )
+        self.phone_number = PhoneNumber.objects.create(number="09120000001")
+
+    def _approve_deposit(self, amount):
+        deposit = RequestDeposit.objects.create(
+            requester=self.requester,
+            amount=amount,
+            account=self.provider_account,
+            assignee=self.staff_user,
+        )
+        deposit.status = RequestDeposit.Status.APPROVED
+        deposit.save()
+
+    def _charge(self, amount):
+        RequestCharge.create_charge_safely(
+            phone_number_id=self.phone_number.id,
+            provider_account_id=self.provider_account.id,
+            user_id=self.user.id,
+            amount=amount,
+        )
+
+    def test_balanced_wallet_has_no_drift(self):
+        self._approve_deposit(1000)
+        self._charge(300)
+        # Open and rejected deposits never reach the wallet
+        RequestDeposit.objects.create(
+            requester=self.requester,
+            amount=5000,
+            account=self.provider_account,
+            assignee=self.staff_user,
+        )
+
+        result = WalletCheckpoint.reconcile(self.provider_account.id, settle_seconds=0)
+
+        self.assertEqual(result["balance"], 700)
+        self.assertEqual(result["expected_balance"], 700)
+        self.assertEqual(result["drift"], 0)
+
+    def test_checkpoint_only_reads_new_rows(self):
+        self._approve_deposit(1000)
+        self._charge(300)
+        WalletCheckpoint.reconcile(self.provider_account.id, settle_seconds=0)
+        checkpoint = WalletCheckpoint.objects.get(account=self.provider_account)
+        self.assertEqual(checkpoint.deposit_total, 1000)
+        self.assertEqual(checkpoint.charge_total, 300)
+
+        self._charge(200)
+        result = WalletCheckpoint.reconcile(self.provider_account.id, settle_seconds=0)
+
+        checkpoint.refresh_from_db()
+        self.assertEqual(checkpoint.charge_total, 500)
+        self.assertEqual(checkpoint.last_charge_id, RequestCharge.objects.latest("id").id)
+        self.assertEqual(result["drift"], 0)
+
+    def test_unsettled_rows_are_counted_but_not_checkpointed(self):
+        self._approve_deposit(1000)
+        self._charge(300)
+
+        result = WalletCheckpoint.reconcile(
+            self.provider_account.id, settle_seconds=3600
+        )
+
+        checkpoint = WalletCheckpoint.objects.get(account=self.provider_account)
+        self.assertEqual(checkpoint.last_charge_id, 0)
+        self.assertEqual(checkpoint.charge_total, 0)
+        self.assertEqual(result["drift"], 0)
+
+    def test_command_reports_drift(self):
+        self._approve_deposit(1000)
+        ProviderWallet.objects.filter(pk=self.provider_wallet.pk).update(balance=1500)
+
+        out = StringIO()
+        call_command("reconcile_wallets", workers=1, settle_seconds=0, stdout=out)
+
+        events = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(events[0]["event"], "drift")
+        self.assertEqual(events[0]["account_id"], self.provider_account.id)
+        self.assertEqual(events[0]["drift"], 500)
+        self.assertEqual(events[-1]["event"], "summary")
+        self.assertEqual(events[-1]["drifted"], 1)
@@ -0,0 +1,45 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TransactionTestCase
+
+from accounts.models import ProviderWallet
+
+
+class WalletStressTest(TransactionTestCase):
+    def _stress(self, **options):
+        out = StringIO()
+        call_command("stress_wallets", stdout=out, stderr=StringIO(), **options)
+        return out.getvalue()
+
+    def test_serial_run_keeps_invariants(self):
+        output = self._stress(duration=1, workers=1, providers=3, hot_providers=1)
+
+        self.assertIn("Invariants hold.", output)
+        self.assertIn("charge", output)
+        self.assertEqual(ProviderWallet.objects.count(), 3)
+
+    def test_writes_json_results(self):
+        fd, path = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+
+        self._stress(
+            duration=0.5, workers=1, providers=2, mix="charge=1,approve=1", json=path
+        )
+
+        with open(path) as f:
+            results = json.load(f)
+        self.assertEqual(results["violations"], [])
+        self.assertEqual(set(results["operations"]), {"charge", "approve"})
+
+    @skipUnless(connection.vendor == "postgresql", "needs concurrent writers")
+    def test_concurrent_processes_keep_invariants(self):
+        output = self._stress(duration=5, workers=8, providers=10)
+
+        self.assertIn("Invariants hold.", output)
@@ -0,0 +1,111 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from accounts import throttling, wallet_cache
+from accounts.models import (
+    PhoneNumber,
+    ProviderAccount,
+    ProviderAccountTeamMember,
+    ProviderWallet,
+    RequestCharge,
+    RequestDeposit,
+)
+
+User = get_user_model()
+
+
+class WalletSummaryTest(TestCase):
+    def setUp(self):
+        wallet_cache.clear()
+        self.addCleanup(wallet_cache.clear)
+        # User ids are reused between tests, and so are the cached memberships
+        throttling._limits.clear()
+        self.account = ProviderAccount.objects.create(name="Summary Provider")
+        ProviderWallet.objects.create(account=self.account, balance=5000)
+        self.phone_number = PhoneNumber.objects.create(number="09120000001")
+        self.staff_user = User.objects.create(username="summary_staff", is_staff=True)
+        self.member = ProviderAccountTeamMember.objects.create(
+            user=User.objects.create(username="summary_admin"),
+            account=self.account,
+            permission_level=ProviderAccountTeamMember.PermissionLevel.ADMIN,
+        )
+        self.client = self._client(self.member.user)
+        self.url = reverse("wallet_summary", args=[self.account.id])
+
+    def _client(self, user):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=user).key}"
+        )
+        return client
+
+    def _charge(self, amount):
+        with self.captureOnCommitCallbacks(execute=True):
+            RequestCharge.create_charge_safely(
+                phone_number_id=self.phone_number.id,
+                provider_account_id=self.account.id,
+                user_id=self.member.user_id,
+                amount=amount,
+            )
+
+    def test_summary_lists_balance_and_activity(self):
+        self._charge(1000)
+        RequestDeposit.objects.create(
+            requester=self.member,
+            account=self.account,
+            assignee=self.staff_user,
+            amount=300,
+        )
+        wallet_cache.clear()
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["balance"], 4000)
+        self.assertEqual(data["pending_deposits"], {"count": 1, "amount": 300})
+        self.assertEqual(data["recent_charges"][0]["number"], "09120000001")
+        self.assertEqual(data["recent_deposits"][0]["status"], "open")
+        self.assertIn("ETag", response)
+
+    def test_unchanged_summary_is_not_modified_without_reading_it(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        # Only the token lookup of the authentication
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_committed_charge_invalidates_the_summary(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        self._charge(1000)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["balance"], 4000)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_wallet_deposit_invalidates_the_summary(self):
+        self.client.get(self.url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ProviderWallet.deposit(account_id=self.account.id, amount=500)
+
+        self.assertEqual(self.client.get(self.url).json()["balance"], 5500)
+
+    def test_other_accounts_are_hidden(self):
+        other = ProviderAccount.objects.create(name="Other Provider")
+        ProviderWallet.objects.create(account=other)
+
+        response = self.client.get(reverse("wallet_summary", args=[other.id]))
+        self.assertEqual(response.status_code, 404)
+
+        staff = self._client(self.staff_user)
+        response = staff.get(reverse("wallet_summary", args=[other.id]))
+        self.assertEqual(response.status_code, 200)
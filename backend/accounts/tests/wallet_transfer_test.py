@@ -0,0 +1,216 @@
+import threading
+
+from django.contrib.auth import get_user_model
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import (
+    ProviderAccount,
+    ProviderAccountTeamMember,
+    ProviderWallet,
+    WalletCheckpoint,
+    WalletTransfer,
+)
+from core import transactions
+
+User = get_user_model()
+
+
+def create_wallets(balances):
+    ids = []
+    for index, balance in enumerate(balances):
+        account = ProviderAccount.objects.create(name=f"Reseller {index}")
+        ProviderWallet.objects.create(account=account, balance=balance)
+        ids.append(account.id)
+    return ids
+
+
+def balances(account_ids):
+    by_account = dict(
+        ProviderWallet.objects.filter(account_id__in=account_ids).values_list(
+            "account_id", "balance"
+        )
+    )
+    return [by_account[account_id] for account_id in account_ids]
+
+
+class WalletTransferTest(TestCase):
+    def setUp(self):
+        self.a, self.b, self.c = create_wallets([1000, 500, 0])
+
+    def test_batch_is_applied_in_order_and_recorded(self):
+        with CaptureQueriesContext(connection) as queries:
+            transfers = ProviderWallet.transfer_preauthorized(
+                [(self.a, self.c, 800), (self.c, self.b, 600), (self.b, self.a, 100)],
+                user_id=7,
+            )
+
+        self.assertEqual(balances([self.a, self.b, self.c]), [300, 1000, 200])
+        self.assertEqual(
+            [(t.source_account_id, t.destination_account_id) for t in transfers],
+            [(self.a, self.c), (self.c, self.b), (self.b, self.a)],
+        )
+        self.assertEqual(WalletTransfer.objects.filter(user_id=7).count(), 3)
+        selects = [
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith('SELECT "accounts_providerwallet"')
+        ]
+        self.assertEqual(len(selects), 1)
+        self.assertIn('ORDER BY "accounts_providerwallet"."account_id" ASC', selects[0])
+
+    def test_batch_is_all_or_nothing(self):
+        with self.assertRaisesMessage(
+            ValueError, "Transfer 1: insufficient balance in provider account."
+        ):
+            ProviderWallet.transfer_preauthorized(
+                [(self.a, self.b, 1000), (self.c, self.b, 1)]
+            )
+
+        self.assertEqual(balances([self.a, self.b, self.c]), [1000, 500, 0])
+        self.assertFalse(WalletTransfer.objects.exists())
+
+    def test_invalid_transfers_are_rejected(self):
+        for transfers, message in (
+            ([(self.a, self.b, 0)], "Transfer 0: amount must be positive."),
+            ([(self.a, self.a, 1)], "Transfer 0: source and destination are equal."),
+            ([(self.a, 0, 1)], "Transfer 0: provider wallet not found."),
+        ):
+            with self.subTest(message):
+                with self.assertRaisesMessage(ValueError, message):
+                    ProviderWallet.transfer_preauthorized(transfers)
+
+    def test_reconciliation_counts_transfers(self):
+        ProviderWallet.transfer_preauthorized([(self.a, self.b, 300)])
+        before = {
+            account_id: WalletCheckpoint.reconcile(account_id)["drift"]
+            for account_id in (self.a, self.b)
+        }
+        ProviderWallet.transfer_preauthorized([(self.b, self.a, 100)])
+
+        for account_id in (self.a, self.b):
+            # Wallets were funded without deposits, only that drifts
+            self.assertEqual(
+                WalletCheckpoint.reconcile(account_id, settle_seconds=-1)["drift"],
+                before[account_id],
+            )
+        self.assertEqual(
+            WalletCheckpoint.objects.get(account_id=self.b).transfer_total, 200
+        )
+
+
+class WalletTransferAuthorizationTest(TestCase):
+    def setUp(self):
+        self.a, self.b, self.c, self.outside = create_wallets([1000, 0, 500, 0])
+        ProviderAccount.objects.filter(id__in=[self.b, self.c]).update(
+            reseller_id=self.a
+        )
+        self.admin, self.staff = (
+            ProviderAccountTeamMember.objects.create(
+                user=User.objects.create(username=f"reseller_{level}"),
+                account_id=self.a,
+                permission_level=level,
+            )
+            for level in ("admin", "staff")
+        )
+        self.resold_admin = ProviderAccountTeamMember.objects.create(
+            user=User.objects.create(username="resold_admin"),
+            account_id=self.b,
+            permission_level="admin",
+        )
+
+    def test_admin_moves_balance_of_own_account(self):
+        (transfer,) = ProviderWallet.transfer(
+            [(self.a, self.b, 400)], user_id=self.admin.user_id
+        )
+
+        self.assertEqual(transfer.user_id, self.admin.user_id)
+        self.assertEqual(balances([self.a, self.b]), [600, 400])
+
+    def test_reseller_moves_balance_between_resold_accounts(self):
+        ProviderWallet.transfer(
+            [(self.c, self.b, 300), (self.b, self.a, 100)],
+            user_id=self.admin.user_id,
+        )
+
+        self.assertEqual(balances([self.a, self.b, self.c]), [1100, 200, 200])
+
+    def test_unauthorized_transfers_are_rejected(self):
+        for transfers, user_id in (
+            ([(self.a, self.b, 100)], self.staff.user_id),
+            ([(self.a, self.outside, 100)], self.admin.user_id),
+            ([(self.outside, self.a, 100)], self.admin.user_id),
+            ([(self.b, self.c, 100)], self.resold_admin.user_id),
+            ([(self.b, self.a, 100)], self.resold_admin.user_id),
+        ):
+            with self.subTest(transfers=transfers, user_id=user_id):
+                with self.assertRaises(PermissionError):
+                    ProviderWallet.transfer(transfers, user_id=user_id)
+        with self.assertRaisesMessage(ValueError, "Requester not found."):
+            ProviderWallet.transfer([(self.a, self.b, 100)], user_id=0)
+
+        self.assertEqual(
+            balances([self.a, self.b, self.c, self.outside]), [1000, 0, 500, 0]
+        )
+        self.assertFalse(WalletTransfer.objects.exists())
+
+
+class WalletTransferConcurrencyTest(TransactionTestCase):
+    def test_opposing_transfer_storms_do_not_deadlock(self):
+        account_ids = create_wallets([10**6] * 3)
+        forward = [
+            (account_ids[0], account_ids[1], 700),
+            (account_ids[1], account_ids[2], 300),
+        ]
+        backward = [
+            (destination, source, amount) for source, destination, amount in forward
+        ][::-1]
+        deadlocks = sum(
+            metric.get(
+                function="ProviderWallet.transfer_preauthorized", reason="deadlock"
+            )
+            for metric in (transactions.RETRIES, transactions.EXHAUSTED)
+        )
+        done, errors = [], []
+
+        def storm(transfers):
+            try:
+                for _ in range(15):
+                    try:
+                        ProviderWallet.transfer_preauthorized(transfers)
+                        done.append(transfers)
+                    except Exception as e:
+                        # SQLite locks whole tables, Postgres waits on the rows
+                        if not transactions.is_lock_timeout(e):
+                            errors.append(f"{type(e).__name__}: {e}")
+            finally:
+                connections["default"].close()
+
+        threads = [
+            threading.Thread(target=storm, args=(forward if index % 2 else backward,))
+            for index in range(6)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertTrue(done)
+        self.assertEqual(
+            sum(
+                metric.get(
+                    function="ProviderWallet.transfer_preauthorized", reason="deadlock"
+                )
+                for metric in (transactions.RETRIES, transactions.EXHAUSTED)
+            ),
+            deadlocks,
+        )
+        self.assertEqual(WalletTransfer.objects.count(), 2 * len(done))
+        expected = dict.fromkeys(account_ids, 10**6)
+        for transfers in done:
+            for source, destination, amount in transfers:
+                expected[source] -= amount
+                expected[destination] += amount
+        self.assertEqual(balances(account_ids), list(expected.values()))
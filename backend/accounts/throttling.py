@@ -0,0 +1,82 @@
+import threading
+import time
+
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+from accounts.models import ProviderAccountTeamMember
+from core import metrics, ratelimit
+
+RATE_LIMITED = metrics.counter(
+    "rate_limited_requests_total", "Requests rejected by a rate limit bucket."
+)
+
+_limits_lock = threading.Lock()
+_limits = {}  # user id -> (expires at, account id, {scope: per minute limit})
+
+
+def get_account_limits(user_id):
+    """Account and per account limits of a user, cached in the process."""
+    now = time.monotonic()
+    cached = _limits.get(user_id)
+    if cached and cached[0] > now:
+        return cached[1], cached[2]
+    row = (
+        ProviderAccountTeamMember.objects.filter(user_id=user_id)
+        .values_list(
+            "account_id", "account__charge_rate_limit", "account__deposit_rate_limit"
+        )
+        .first()
+    )
+    account_id, limits = None, {}
+    if row:
+        account_id = row[0]
+        limits = {"charge": row[1], "deposit": row[2]}
+    with _limits_lock:
+        _limits[user_id] = (now + settings.RATE_LIMIT_CONFIG_TTL, account_id, limits)
+    return account_id, limits
+
+
+class ProviderTokenBucketThrottle(BaseThrottle):
+    """
+    Token buckets per user and per provider account, checked before the view
+    touches the wallet. Reads are not limited.
+    """
+
+    scope = None
+
+    def allow_request(self, request, view):
+        if request.method in SAFE_METHODS or not request.user.is_authenticated:
+            return True
+        defaults = settings.RATE_LIMITS[self.scope]
+        account_id, limits = get_account_limits(request.user.id)
+
+        buckets = [("user", request.user.id, defaults["user"])]
+        if account_id is not None:
+            buckets.append(
+                ("account", account_id, limits.get(self.scope) or defaults["account"])
+            )
+        taken = []
+        for level, key, per_minute in buckets:
+            key = f"{self.scope}:{level}:{key}"
+            allowed, self._wait = ratelimit.consume(key, per_minute)
+            if not allowed:
+                RATE_LIMITED.inc(scope=self.scope, level=level)
+                # A rejected request costs none of the buckets
+                for key, per_minute in taken:
+                    ratelimit.refund(key, per_minute)
+                return False
+            taken.append((key, per_minute))
+        return True
+
+    def wait(self):
+        return self._wait
+
+
+class ChargeRateThrottle(ProviderTokenBucketThrottle):
+    scope = "charge"
+
+
+class DepositRateThrottle(ProviderTokenBucketThrottle):
+    scope = "deposit"
@@ -1,10 +1,33 @@
 from django.urls import path
 
-from accounts.api import request_charge_api_view, request_deposit_detail, request_deposit_list_create
+from accounts.api import (
+    request_charge_api_view,
+    request_deposit_detail,
+    request_deposit_list_create,
+    charge_job_create,
+    charge_job_detail,
+    charge_job_result,
+    charge_batch_ingest,
+    wallet_summary,
+    wallet_events,
+)
 
 urlpatterns = [
     path("request_charge/", request_charge_api_view, name="request_charge"),
     path("request_deposit/", request_deposit_list_create, name="request_deposit"),
     path("request_deposit/<int:pk>/", request_deposit_detail, name="request_deposit_detail"),
-    
-]
\ No newline at end of file
+    path("charge_jobs/", charge_job_create, name="charge_job_create"),
+    path("charge_jobs/<int:pk>/", charge_job_detail, name="charge_job_detail"),
+    path("charge_jobs/<int:pk>/result/", charge_job_result, name="charge_job_result"),
+    path(
+        "charge_batches/<int:provider_account_id>/",
+        charge_batch_ingest,
+        name="charge_batch_ingest",
+    ),
+    path(
+        "wallets/<int:provider_account_id>/summary/",
+        wallet_summary,
+        name="wallet_summary",
+    ),
+    path("events/", wallet_events, name="wallet_events"),
+]
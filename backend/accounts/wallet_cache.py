@@ -0,0 +1,98 @@
+"""
+Per process cache of the wallet summaries served by wallet_summary.
+
+Entries live ``WALLET_SUMMARY_CACHE_SECONDS``. Code that moves money calls
+``wallet_changed`` inside its transaction, and the entry of the account is
+dropped once the transaction commits, so this process never serves a balance
+older than its own last commit. Other processes catch up within the TTL.
+The commit is also published to the event streams of the account, see
+core.events.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import defaultdict
+from functools import partial
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+from core import events, metrics
+
+HITS = metrics.counter("wallet_summary_cache_hits_total", "Summaries served cached.")
+MISSES = metrics.counter(
+    "wallet_summary_cache_misses_total", "Summaries read from the database."
+)
+
+_lock = threading.Lock()
+_summaries = {}  # account id -> (expires at, etag, summary)
+_generations = defaultdict(int)  # account id -> invalidations so far
+
+
+def etag_of(summary):
+    content = json.dumps(summary, sort_keys=True, cls=DjangoJSONEncoder)
+    return f'"{hashlib.sha1(content.encode()).hexdigest()[:20]}"'
+
+
+def get_summary(account_id, build):
+    """``(etag, summary)`` of the account, calling ``build`` on a miss."""
+    now = time.monotonic()
+    with _lock:
+        cached = _summaries.get(account_id)
+        generation = _generations[account_id]
+    if cached and cached[0] > now:
+        HITS.inc()
+        return cached[1], cached[2]
+    MISSES.inc()
+    summary = build(account_id)
+    if summary is None:
+        return None, None
+    etag = etag_of(summary)
+    with _lock:
+        # Not stored when a commit invalidated the account during the build
+        if _generations[account_id] == generation:
+            _summaries[account_id] = (
+                now + settings.WALLET_SUMMARY_CACHE_SECONDS,
+                etag,
+                summary,
+            )
+    return etag, summary
+
+
+def get_etag(account_id):
+    """The ETag of a fresh cached summary, None when it has to be read."""
+    cached = _summaries.get(account_id)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+    return None
+
+
+def invalidate(account_id):
+    with _lock:
+        _generations[account_id] += 1
+        _summaries.pop(account_id, None)
+
+
+def account_channel(account_id):
+    return f"account:{account_id}"
+
+
+def wallet_changed(account_id, using=None):
+    """
+    Drop the cached summary of the account once the transaction commits, and
+    tell the event streams of the account.
+    """
+    transaction.on_commit(partial(invalidate, account_id), using=using)
+    events.publish_on_commit(
+        account_channel(account_id),
+        {"type": "wallet", "account": account_id},
+        using=using,
+    )
+
+
+def clear():
+    with _lock:
+        _summaries.clear()
@@ -0,0 +1,32 @@
+from django.contrib import admin
+
+from core.models import SlowQuery
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = (
+        "created",
+        "fingerprint",
+        "duration_ms",
+        "view",
+        "provider_account_id",
+        "alias",
+    )
+    list_filter = ("alias", "view")
+    search_fields = ("=fingerprint", "sql")
+    date_hierarchy = "created"
+    ordering = ("-created",)
+    readonly_fields = (
+        "fingerprint",
+        "sql",
+        "params",
+        "duration_ms",
+        "alias",
+        "view",
+        "provider_account_id",
+        "plan",
+    )
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,57 @@
+"""
+PostgreSQL backend that exports connection checkout latency and pool
+saturation. Use it with ENGINE = "core.backends.postgresql".
+"""
+import time
+
+from django.db.backends.postgresql import base
+
+from core import metrics
+
+CHECKOUT_SECONDS = metrics.histogram(
+    "db_connection_checkout_seconds",
+    "Time spent waiting for a pooled connection or opening a new one.",
+)
+CHECKOUT_ERRORS = metrics.counter(
+    "db_connection_checkout_errors_total",
+    "Connection checkouts that failed or timed out waiting for the pool.",
+)
+POOL_SIZE = metrics.gauge("db_pool_size", "Connections currently open by the pool.")
+POOL_MAX_SIZE = metrics.gauge("db_pool_max_size", "Maximum size of the pool.")
+POOL_AVAILABLE = metrics.gauge("db_pool_available", "Idle connections in the pool.")
+POOL_WAITING = metrics.gauge("db_pool_waiting", "Requests waiting for a connection.")
+POOL_SATURATION = metrics.gauge(
+    "db_pool_saturation", "Share of the maximum pool size currently checked out."
+)
+POOL_WAIT_MS = metrics.gauge(
+    "db_pool_wait_milliseconds_total",
+    "Total time requests waited for a connection since the pool was opened.",
+)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_new_connection(self, conn_params):
+        started = time.perf_counter()
+        try:
+            return super().get_new_connection(conn_params)
+        except Exception:
+            CHECKOUT_ERRORS.inc(alias=self.alias)
+            raise
+        finally:
+            CHECKOUT_SECONDS.observe(time.perf_counter() - started, alias=self.alias)
+
+
+def collect_pool_metrics():
+    for pool_alias, pool in list(base.DatabaseWrapper._connection_pools.items()):
+        stats = pool.get_stats()
+        in_use = stats.get("pool_size", 0) - stats.get("pool_available", 0)
+        POOL_SIZE.set(stats.get("pool_size", 0), alias=pool_alias)
+        POOL_MAX_SIZE.set(stats.get("pool_max", 0), alias=pool_alias)
+        POOL_AVAILABLE.set(stats.get("pool_available", 0), alias=pool_alias)
+        POOL_WAITING.set(stats.get("requests_waiting", 0), alias=pool_alias)
+        POOL_WAIT_MS.set(stats.get("requests_wait_ms", 0), alias=pool_alias)
+        if stats.get("pool_max"):
+            POOL_SATURATION.set(round(in_use / stats["pool_max"], 4), alias=pool_alias)
+
+
+metrics.register_collector(collect_pool_metrics)
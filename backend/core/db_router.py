@@ -0,0 +1,117 @@
+import contextvars
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+logger = logging.getLogger("accounts")
+
+
+@dataclass
+class RoutingState:
+    use_replica: bool = False
+    written: bool = False
+
+
+_routing_state = contextvars.ContextVar("replica_routing_state", default=None)
+
+_lag_lock = threading.Lock()
+_replica_lag = {}  # alias -> (checked_at, lag seconds or None when unreachable)
+
+REPLICA_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+def replica_safe(view_func):
+    """Mark a read only view whose GET/HEAD requests may be served by a replica."""
+    view_func.replica_safe = True
+    return view_func
+
+
+def start_request():
+    return _routing_state.set(RoutingState())
+
+
+def end_request(token):
+    state = _routing_state.get()
+    _routing_state.reset(token)
+    return state
+
+
+def current_state():
+    return _routing_state.get()
+
+
+def measure_replica_lag(alias):
+    if connections[alias].vendor != "postgresql":
+        return 0
+    with connections[alias].cursor() as cursor:
+        cursor.execute(REPLICA_LAG_SQL)
+        return float(cursor.fetchone()[0])
+
+
+def get_replica_lag(alias):
+    now = time.monotonic()
+    checked_at, lag = _replica_lag.get(alias, (None, None))
+    if checked_at is not None and now - checked_at < settings.REPLICA_LAG_CHECK_INTERVAL:
+        return lag
+    with _lag_lock:
+        try:
+            lag = measure_replica_lag(alias)
+        except Exception:
+            logger.warning("Replica %s is unreachable, reading from primary", alias)
+            lag = None
+        _replica_lag[alias] = (now, lag)
+    return lag
+
+
+def healthy_replicas():
+    return [
+        alias
+        for alias in settings.DATABASE_REPLICAS
+        if (lag := get_replica_lag(alias)) is not None
+        and lag <= settings.REPLICA_MAX_LAG_SECONDS
+    ]
+
+
+class ReplicaRouter:
+    """
+    Send reads to a replica only when the current request asked for it, has not
+    written anything yet and the replica is not lagging too far behind.
+    Everything else, including every write, goes to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _routing_state.get()
+        if (
+            state is None
+            or not state.use_replica
+            or state.written
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        replicas = healthy_replicas()
+        if not replicas:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _routing_state.get()
+        if state is not None:
+            state.written = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
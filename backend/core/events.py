@@ -0,0 +1,197 @@
+"""
+Events committed by this and the other processes, fanned out to the
+subscribers of this process, e.g. the server-sent event streams.
+
+``publish_on_commit`` hands an event to the backend once the transaction
+commits. ``LocalBackend`` delivers it in this process only. With
+``PostgresBackend`` it is sent with NOTIFY, and a listener thread in each
+process delivers the notifications of all processes to its ``broker``.
+
+The broker puts events in a bounded asyncio queue per subscriber. A
+subscriber that falls behind loses the events that do not fit and receives
+one ``{"type": "lagged"}`` event instead, to resynchronize.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import defaultdict
+from functools import partial
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils.module_loading import import_string
+
+from core import metrics
+
+logger = logging.getLogger("accounts")
+
+PUBLISHED = metrics.counter("events_published_total", "Events handed to the backend.")
+DROPPED = metrics.counter(
+    "events_dropped_total", "Events dropped for subscribers falling behind."
+)
+
+# Tells the events of this process apart from those of the others
+ORIGIN = uuid.uuid4().hex
+
+LAGGED = {"type": "lagged"}
+
+
+class Subscription:
+    def __init__(self, broker, channels, max_size):
+        self.broker = broker
+        self.channels = channels
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(max_size)
+        self.lagged = False
+
+    def deliver(self, event):
+        """Runs in the loop of the subscriber."""
+        if self.queue.full():
+            self.lagged = True
+            DROPPED.inc()
+            return
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout=None):
+        """The next event, None after ``timeout`` seconds without one."""
+        if self.lagged:
+            self.lagged = False
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            return LAGGED
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class Broker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)  # channel -> subscriptions
+
+    def subscribe(self, channels, max_size=None):
+        """Subscribe the running event loop to ``channels``."""
+        subscription = Subscription(
+            self, tuple(channels), max_size or settings.EVENTS_QUEUE_SIZE
+        )
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[channel]
+
+    def dispatch(self, channel, event):
+        """Deliver ``event`` to the subscribers of ``channel``, from any thread."""
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:  # the loop is closed
+                self.unsubscribe(subscription)
+
+
+broker = Broker()
+
+
+class LocalBackend:
+    def start(self):
+        pass
+
+    def publish(self, channel, event):
+        broker.dispatch(channel, event)
+
+
+class PostgresBackend:
+    """
+    NOTIFY on one Postgres channel, LISTENed to by a thread per process on a
+    dedicated connection. Payloads are limited to 8000 bytes.
+    """
+
+    CHANNEL = "tabdeal_events"
+
+    def __init__(self, alias="default"):
+        self.alias = alias
+        self._lock = threading.Lock()
+        self._listener = None
+
+    def start(self):
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(
+                    target=self._listen, name="events-listener", daemon=True
+                )
+                self._listener.start()
+
+    def publish(self, channel, event):
+        payload = json.dumps({"channel": channel, "event": event})
+        with connections[self.alias].cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [self.CHANNEL, payload])
+
+    def _connect(self):
+        import psycopg
+
+        config = connections[self.alias].settings_dict
+        return psycopg.connect(
+            dbname=config["NAME"],
+            user=config["USER"],
+            password=config["PASSWORD"],
+            host=config["HOST"],
+            port=config["PORT"],
+            autocommit=True,
+        )
+
+    def _listen(self):
+        while True:
+            try:
+                with self._connect() as conn:
+                    conn.execute(f"LISTEN {self.CHANNEL}")
+                    for notify in conn.notifies():
+                        message = json.loads(notify.payload)
+                        broker.dispatch(message["channel"], message["event"])
+            except Exception:
+                logger.exception("Event listener lost its connection")
+                time.sleep(1)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = import_string(settings.EVENTS_BACKEND)()
+    return _backend
+
+
+def _publish(channel, event):
+    try:
+        get_backend().publish(channel, event)
+        PUBLISHED.inc()
+    except Exception:
+        # The money moved already, subscribers resynchronize on reconnect
+        logger.exception(f"Could not publish an event to {channel}")
+
+
+def publish_on_commit(channel, event, using=None):
+    event = {**event, "origin": ORIGIN}
+    transaction.on_commit(partial(_publish, channel, event), using=using)
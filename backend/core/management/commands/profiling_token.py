@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.profiling import issue_token
+
+
+class Command(BaseCommand):
+    help = "Print an X-Profile header value that profiles the requests carrying it."
+
+    def add_arguments(self, parser):
+        parser.add_argument("label", help="who asked, recorded in the profiles")
+
+    def handle(self, *args, **options):
+        self.stdout.write(issue_token(options["label"]))
+        self.stderr.write(
+            f"Valid for {settings.PROFILING_TOKEN_MAX_AGE}s where PROFILING_ENABLED=1"
+        )
@@ -0,0 +1,161 @@
+import asyncio
+import json
+import time
+from collections import defaultdict
+
+import httpx
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.authtoken.models import Token
+
+from core import traffic
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay captured traffic, see core.traffic, against a local instance "
+        "running on a copy of the data. Every client sends its requests in "
+        "the captured order, at the captured pace divided by --speed, and "
+        "concurrently with the other clients. Save the results of one build "
+        "with --save and pass them as --baseline when replaying the other "
+        "build to compare latencies and errors."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("files", nargs="+", help="capture files")
+        parser.add_argument("--url", default="http://127.0.0.1:8000")
+        parser.add_argument(
+            "--speed", type=float, default=1.0, help="0 sends as fast as possible"
+        )
+        parser.add_argument("--concurrency", type=int, default=64)
+        parser.add_argument(
+            "--token",
+            help="authenticate every request with this token instead of a token "
+            "of the captured user, looked up in the database of this settings",
+        )
+        parser.add_argument("--save", help="write the results to this file")
+        parser.add_argument("--baseline", help="results of a previous replay")
+
+    def handle(self, *args, **options):
+        self.options = options
+        records = [
+            record
+            for record in traffic.read_records(options["files"])
+            if not record.get("body_truncated")
+        ]
+        if not records:
+            raise CommandError("No requests to replay.")
+        baseline = self._load(options["baseline"]) if options["baseline"] else None
+        self.tokens = self._tokens(records)
+
+        started = time.perf_counter()
+        results = asyncio.run(self._replay(records))
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"Replayed {len(results)} requests of "
+            f"{len({record['client'] for record in records})} clients in "
+            f"{elapsed:.1f}s, captured over {records[-1]['ts'] - records[0]['ts']:.1f}s"
+        )
+        if options["save"]:
+            with open(options["save"], "w") as f:
+                json.dump(results, f)
+        self._report(traffic.summarize(results), baseline)
+
+    def _load(self, path):
+        with open(path) as f:
+            return traffic.summarize(json.load(f))
+
+    def _tokens(self, records):
+        if self.options["token"]:
+            return defaultdict(lambda: self.options["token"])
+        user_ids = {record["user_id"] for record in records} - {None}
+        return {
+            user_id: Token.objects.get_or_create(user_id=user_id)[0].key
+            for user_id in user_ids
+        }
+
+    async def _replay(self, records):
+        clients = defaultdict(list)
+        for index, record in enumerate(records):
+            clients[record["client"]].append((index, record))
+        results = [None] * len(records)
+        semaphore = asyncio.Semaphore(self.options["concurrency"])
+        async with httpx.AsyncClient(
+            base_url=self.options["url"],
+            timeout=60,
+            limits=httpx.Limits(max_connections=self.options["concurrency"]),
+        ) as client:
+            start = time.perf_counter()
+            await asyncio.gather(
+                *(
+                    self._replay_client(
+                        client, semaphore, requests, records[0]["ts"], start, results
+                    )
+                    for requests in clients.values()
+                )
+            )
+        return results
+
+    async def _replay_client(
+        self, client, semaphore, requests, first_ts, start, results
+    ):
+        speed = self.options["speed"]
+        for index, record in requests:
+            if speed:
+                delay = start + (record["ts"] - first_ts) / speed - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            headers = {"Content-Type": record["content_type"]}
+            if record["accept"]:
+                headers["Accept"] = record["accept"]
+            if record["user_id"] is not None or self.options["token"]:
+                headers["Authorization"] = f"Token {self.tokens[record['user_id']]}"
+            async with semaphore:
+                sent = time.perf_counter()
+                try:
+                    response = await client.request(
+                        record["method"],
+                        record["path"],
+                        content=traffic.decode_body(record),
+                        headers=headers,
+                    )
+                    status = response.status_code
+                except httpx.HTTPError:
+                    status = None
+                latency = time.perf_counter() - sent
+            results[index] = {
+                "method": record["method"],
+                "path": record["path"],
+                "view": record["view"],
+                "status": status,
+                "captured_status": record["status"],
+                "latency": latency,
+            }
+
+    def _report(self, summary, baseline):
+        def ms(value):
+            return "-" if value is None else f"{value:.1f}"
+
+        width = max(len(key) for key in summary)
+        columns = "requests errors mismatch    p50    p95    p99"
+        if baseline is not None:
+            columns += "   Δp50   Δp95   Δp99 Δerrors"
+        self.stdout.write(f"{'':{width}} {columns}")
+        for key, row in sorted(summary.items()):
+            line = (
+                f"{key:{width}} {row['requests']:>8} {row['errors']:>6} "
+                f"{row['mismatches']:>8} {ms(row['p50']):>6} {ms(row['p95']):>6} "
+                f"{ms(row['p99']):>6}"
+            )
+            before = (baseline or {}).get(key)
+            if before is not None:
+                deltas = [
+                    (
+                        ms(row[p] - before[p])
+                        if row[p] is not None and before[p] is not None
+                        else "-"
+                    )
+                    for p in ("p50", "p95", "p99")
+                ]
+                line += " " + " ".join(f"{delta:>6}" for delta in deltas)
+                line += f" {row['errors'] - before['errors']:>+7}"
+            self.stdout.write(line)
@@ -0,0 +1,68 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Avg, Count, Max, Sum
+from django.utils import timezone
+
+from core.models import SlowQuery
+
+
+class Command(BaseCommand):
+    help = "Group the slow query log by fingerprint, slowest total time first."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=float, default=24)
+        parser.add_argument("--account", type=int, help="only this provider account")
+        parser.add_argument("--limit", type=int, default=10)
+        parser.add_argument(
+            "--plans", action="store_true", help="print the latest plan of each group"
+        )
+
+    def handle(self, *args, **options):
+        queryset = SlowQuery.objects.filter(
+            created__gte=timezone.now() - timedelta(hours=options["hours"])
+        )
+        if options["account"] is not None:
+            queryset = queryset.filter(provider_account_id=options["account"])
+
+        groups = (
+            queryset.values("fingerprint")
+            .annotate(
+                count=Count("id"),
+                avg_ms=Avg("duration_ms"),
+                max_ms=Max("duration_ms"),
+                total_ms=Sum("duration_ms"),
+                latest=Max("id"),
+            )
+            .order_by("-total_ms")
+        )
+        for group in groups[: options["limit"]]:
+            entries = queryset.filter(fingerprint=group["fingerprint"])
+            latest = entries.get(id=group["latest"])
+            views = entries.values("view").annotate(n=Count("id")).order_by("-n")[:3]
+            accounts = (
+                entries.exclude(provider_account_id=None)
+                .values("provider_account_id")
+                .annotate(n=Count("id"))
+                .order_by("-n")[:3]
+            )
+            view_list = ", ".join(f"{v['view']} ({v['n']})" for v in views)
+            account_list = ", ".join(
+                f"{a['provider_account_id']} ({a['n']})" for a in accounts
+            )
+            self.stdout.write(
+                f"{group['fingerprint'][:12]}  {group['count']} times, "
+                f"avg {group['avg_ms']:.0f} ms, max {group['max_ms']:.0f} ms\n"
+                f"  views: {view_list}\n"
+                f"  accounts: {account_list or '-'}\n"
+                f"  {latest.sql}"
+            )
+            if options["plans"]:
+                plan = (
+                    entries.exclude(plan="")
+                    .order_by("-id")
+                    .values_list("plan", flat=True)
+                    .first()
+                )
+                self.stdout.write(f"  plan:\n{plan or '  none captured'}")
+            self.stdout.write("")
@@ -0,0 +1,64 @@
+import io
+import json
+import pstats
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.profiling import normalize_sql
+
+
+class Command(BaseCommand):
+    help = "Summarize the top functions and SQL queries of the collected profiles."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dir", default=settings.PROFILING_DIR)
+        parser.add_argument("--path", help="only requests whose path starts with this")
+        parser.add_argument("--limit", type=int, default=20)
+        parser.add_argument(
+            "--sort",
+            default="cumulative",
+            choices=["cumulative", "tottime", "ncalls"],
+        )
+
+    def handle(self, *args, **options):
+        directory = Path(options["dir"])
+        stats = None
+        requests = 0
+        queries = defaultdict(lambda: [0, 0.0])  # normalized sql -> count, time
+        for meta_file in sorted(directory.glob("*.json")):
+            profile_file = meta_file.with_suffix(".prof")
+            with open(meta_file) as f:
+                meta = json.load(f)
+            if options["path"] and not meta["path"].startswith(options["path"]):
+                continue
+            if not profile_file.exists():
+                continue
+            requests += 1
+            if stats is None:
+                stats = pstats.Stats(str(profile_file), stream=io.StringIO())
+            else:
+                stats.add(str(profile_file))
+            for query in meta["queries"]:
+                entry = queries[normalize_sql(query["sql"])]
+                entry[0] += 1
+                entry[1] += query["duration"]
+
+        if not requests:
+            raise CommandError(f"No profiles in {directory}")
+
+        output = io.StringIO()
+        stats.stream = output
+        stats.sort_stats(options["sort"]).print_stats(options["limit"])
+        self.stdout.write(f"{requests} profiled requests\n")
+        self.stdout.write(output.getvalue())
+
+        self.stdout.write(f"Top queries by total time ({len(queries)} distinct)")
+        top = sorted(queries.items(), key=lambda item: item[1][1], reverse=True)
+        for sql, (count, total) in top[: options["limit"]]:
+            self.stdout.write(
+                f"{total * 1000:10.1f} ms {count:8} calls "
+                f"{total / count * 1000:8.2f} ms avg  {sql}"
+            )
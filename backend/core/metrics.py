@@ -0,0 +1,139 @@
+"""
+Minimal in-process metrics registry rendered in the Prometheus text format.
+Values are per process; every worker exposes its own series.
+"""
+import threading
+from bisect import bisect_left
+
+_lock = threading.Lock()
+_metrics = {}
+_collectors = []
+
+
+def _label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    body = ",".join(
+        '%s="%s"' % (name, value.replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in pairs
+    )
+    return "{%s}" % body
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels):
+        return self._values.get(_label_key(labels), 0)
+
+    def samples(self):
+        for key, value in list(self._values.items()):
+            yield self.name, key, (), value
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def set(self, value, **labels):
+        key = _label_key(labels)
+        with _lock:
+            self._values[key] = value
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def remove(self, **labels):
+        with _lock:
+            self._values.pop(_label_key(labels), None)
+
+
+class Histogram:
+    type = "histogram"
+    DEFAULT_BUCKETS = (
+        0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+    )
+
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self._values = {}  # key -> [bucket counts..., sum, count]
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        index = bisect_left(self.buckets, value)
+        with _lock:
+            series = self._values.setdefault(key, [0] * (len(self.buckets) + 2))
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def get_count(self, **labels):
+        series = self._values.get(_label_key(labels))
+        return series[-1] if series else 0
+
+    def samples(self):
+        for key, series in list(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                yield f"{self.name}_bucket", key, (("le", str(bound)),), cumulative
+            yield f"{self.name}_bucket", key, (("le", "+Inf"),), series[-1]
+            yield f"{self.name}_sum", key, (), series[-2]
+            yield f"{self.name}_count", key, (), series[-1]
+
+
+def _get_or_create(cls, name, documentation, **kwargs):
+    with _lock:
+        metric = _metrics.get(name)
+        if metric is None:
+            metric = _metrics[name] = cls(name, documentation, **kwargs)
+    if type(metric) is not cls:
+        raise ValueError(f"Metric {name} is already registered as a {metric.type}.")
+    return metric
+
+
+def counter(name, documentation):
+    return _get_or_create(Counter, name, documentation)
+
+
+def gauge(name, documentation):
+    return _get_or_create(Gauge, name, documentation)
+
+
+def histogram(name, documentation, **kwargs):
+    return _get_or_create(Histogram, name, documentation, **kwargs)
+
+
+def register_collector(collector):
+    """Register a callable that refreshes gauges right before rendering."""
+    if collector not in _collectors:
+        _collectors.append(collector)
+
+
+def render():
+    for collector in list(_collectors):
+        collector()
+    lines = []
+    for metric in sorted(_metrics.values(), key=lambda metric: metric.name):
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        for name, key, extra, value in metric.samples():
+            lines.append(f"{name}{_format_labels(key, extra)} {value}")
+    return "\n".join(lines) + "\n"
@@ -1,11 +1,28 @@
+import hashlib
 import logging
+import random
+import threading
 import time
 
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+
+from core import db_router, profiling, slow_queries, traffic
+
 logger = logging.getLogger('accounts')
 
 class RequestLoggingMiddleware:
+    # Bodies of other types, e.g. uploads and binary ingest streams, are
+    # neither read nor logged so that views can stream them
+    LOGGED_BODY_TYPES = ("application/json", "application/x-www-form-urlencoded")
+
     def __init__(self, get_response):
         self.get_response = get_response
+        # Replayable copy of the requests, see core.traffic
+        self.capture = (
+            traffic.TrafficCapture() if settings.TRAFFIC_CAPTURE_ENABLED else None
+        )
 
     def __call__(self, request):
         start_time = time.time()
@@ -16,7 +33,10 @@ class RequestLoggingMiddleware:
         user_agent = request.META.get('HTTP_USER_AGENT', 'Unknown')
 
         request_body = None
-        if request.method in ['POST', 'PUT', 'PATCH']:
+        if (
+            request.method in ['POST', 'PUT', 'PATCH']
+            and request.content_type in self.LOGGED_BODY_TYPES
+        ):
             try:
                 request_body = request.body.decode('utf-8')
             except Exception:
@@ -27,13 +47,145 @@ class RequestLoggingMiddleware:
             f"{f', Body={request_body}' if request_body else ''}"
         )
 
+        capture = self.capture is not None and self.capture.wants(request)
+        # Read before the view can consume the stream
+        body = self.capture.read_body(request) if capture else None
+
         response = self.get_response(request)
 
         duration = time.time() - start_time
         status_code = response.status_code
 
+        if capture:
+            try:
+                self.capture.record(request, body, response, start_time, duration)
+            except Exception:
+                logger.exception("Could not capture the request")
+
         logger.info(
             f"Outgoing Response: Method={method}, Path={path}, Status={status_code}, Duration={duration:.4f}s"
         )
 
-        return response
\ No newline at end of file
+        return response
+
+class ReplicaRoutingMiddleware:
+    """
+    Let replica safe views read from a replica, except for clients that wrote
+    something in the last ``REPLICA_PIN_SECONDS`` so they always read their own
+    writes from the primary.
+    """
+
+    SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = db_router.start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            state = db_router.end_request(token)
+        if state.written:
+            cache.set(self._pin_key(request), True, settings.REPLICA_PIN_SECONDS)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = db_router.current_state()
+        if state is None or request.method not in self.SAFE_METHODS:
+            return None
+        if not settings.DATABASE_REPLICAS or not self._is_replica_safe(
+            request, view_func
+        ):
+            return None
+        state.use_replica = not cache.get(self._pin_key(request), False)
+        return None
+
+    def _is_replica_safe(self, request, view_func):
+        if getattr(view_func, "replica_safe", False):
+            return True
+        match = request.resolver_match
+        return (
+            match is not None
+            and match.namespace == "admin"
+            and (match.url_name or "").endswith("_changelist")
+        )
+
+    def _pin_key(self, request):
+        client = (
+            request.META.get("HTTP_AUTHORIZATION")
+            or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+            or request.META.get("REMOTE_ADDR", "")
+        )
+        return "replica-pin:" + hashlib.sha256(client.encode()).hexdigest()
+
+
+class ProfilingMiddleware:
+    """
+    Profile requests carrying a valid ``X-Profile`` token, see
+    ``profiling_token``, and a ``PROFILING_SAMPLE_RATE`` share of the others.
+    Only one request per process is profiled at a time. Not installed at all
+    unless ``PROFILING_ENABLED``.
+    """
+
+    HEADER = "HTTP_X_PROFILE"
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE
+        self._lock = threading.Lock()
+
+    def __call__(self, request):
+        token = request.META.get(self.HEADER)
+        if token is None and not (
+            self.sample_rate and random.random() < self.sample_rate
+        ):
+            return self.get_response(request)
+        label = profiling.verify_token(token) if token is not None else "sampled"
+        if label is None or not self._lock.acquire(blocking=False):
+            return self.get_response(request)
+
+        try:
+            with profiling.RequestProfile() as profile:
+                response = self.get_response(request)
+            name = profile.save(
+                settings.PROFILING_DIR,
+                {
+                    "label": label,
+                    "method": request.method,
+                    "path": request.path,
+                    "status": response.status_code,
+                },
+            )
+        finally:
+            self._lock.release()
+        logger.info(f"Profiled {request.method} {request.path} as {name}")
+        response["X-Profile-Id"] = name
+        return response
+
+
+class SlowQueryMiddleware:
+    """
+    Record queries slower than ``SLOW_QUERY_THRESHOLD_MS`` with the view and
+    provider account of the request, see core.slow_queries. Not installed when
+    the threshold is 0.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SLOW_QUERY_THRESHOLD_MS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with slow_queries.capture_slow_queries() as log:
+            response = self.get_response(request)
+        if log.records:
+            match = request.resolver_match
+            team = getattr(getattr(request, "user", None), "team", None)
+            log.flush(
+                view=match.view_name if match else request.path,
+                provider_account_id=team.account_id if team else None,
+            )
+        return response
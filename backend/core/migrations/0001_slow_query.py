@@ -0,0 +1,74 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="SlowQuery",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="create timestamp"
+                    ),
+                ),
+                (
+                    "updated",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="update timestamp"
+                    ),
+                ),
+                (
+                    "fingerprint",
+                    models.CharField(
+                        db_index=True, max_length=40, verbose_name="fingerprint"
+                    ),
+                ),
+                ("sql", models.TextField(verbose_name="sql")),
+                (
+                    "params",
+                    models.JSONField(
+                        default=list,
+                        help_text="parameter types, values redacted",
+                        verbose_name="params",
+                    ),
+                ),
+                ("duration_ms", models.FloatField(verbose_name="duration (ms)")),
+                (
+                    "alias",
+                    models.CharField(max_length=64, verbose_name="database alias"),
+                ),
+                (
+                    "view",
+                    models.CharField(blank=True, max_length=255, verbose_name="view"),
+                ),
+                (
+                    "provider_account_id",
+                    models.PositiveBigIntegerField(
+                        blank=True, null=True, verbose_name="provider account id"
+                    ),
+                ),
+                ("plan", models.TextField(blank=True, verbose_name="plan")),
+            ],
+            options={
+                "verbose_name": "slow query",
+                "verbose_name_plural": "slow queries",
+            },
+        ),
+    ]
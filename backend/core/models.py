@@ -8,3 +8,25 @@ class TimestampMixin(models.Model):
 
     class Meta:
         abstract = True
+
+
+class SlowQuery(TimestampMixin, models.Model):
+    fingerprint = models.CharField(_("fingerprint"), max_length=40, db_index=True)
+    sql = models.TextField(_("sql"))
+    params = models.JSONField(
+        _("params"), default=list, help_text=_("parameter types, values redacted")
+    )
+    duration_ms = models.FloatField(_("duration (ms)"))
+    alias = models.CharField(_("database alias"), max_length=64)
+    view = models.CharField(_("view"), max_length=255, blank=True)
+    provider_account_id = models.PositiveBigIntegerField(
+        _("provider account id"), blank=True, null=True
+    )
+    plan = models.TextField(_("plan"), blank=True)
+
+    def __str__(self):
+        return f"{self.fingerprint[:8]} {self.duration_ms:.0f}ms"
+
+    class Meta:
+        verbose_name = _("slow query")
+        verbose_name_plural = _("slow queries")
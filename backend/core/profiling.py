@@ -0,0 +1,142 @@
+"""
+Per request cProfile and tracemalloc profiles, written by ProfilingMiddleware.
+
+Each profiled request leaves ``<name>.prof``, a pstats dump, and
+``<name>.json`` with the request, its SQL queries and top allocations in
+``PROFILING_DIR``. The oldest profiles are removed once the directory grows
+over ``PROFILING_MAX_BYTES``.
+"""
+
+import cProfile
+import json
+import os
+import re
+import time
+import tracemalloc
+import uuid
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+from django.db import connections
+
+SALT = "core.profiling"
+
+_NUMBER = re.compile(r"\b\d+(\.\d+)?\b")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_LIST = re.compile(r"\((\s*\?\s*,)+\s*\?\s*\)")
+
+
+def issue_token(label):
+    """Header value that turns profiling on for ``PROFILING_TOKEN_MAX_AGE``."""
+    return signing.TimestampSigner(salt=SALT).sign(label)
+
+
+def verify_token(token):
+    """The label of a valid token, None otherwise."""
+    try:
+        return signing.TimestampSigner(salt=SALT).unsign(
+            token, max_age=settings.PROFILING_TOKEN_MAX_AGE
+        )
+    except signing.BadSignature:
+        return None
+
+
+def normalize_sql(sql):
+    """Replace literals so that queries differing only in values group together."""
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    return _LIST.sub("(...)", " ".join(sql.split()))
+
+
+class QueryLog:
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(
+                {
+                    "alias": context["connection"].alias,
+                    "sql": sql,
+                    "many": many,
+                    "duration": time.perf_counter() - started,
+                }
+            )
+
+
+class RequestProfile:
+    """Context manager profiling the code it wraps in the current thread."""
+
+    def __init__(self, top_allocations=20):
+        self.top_allocations = top_allocations
+        self.profiler = cProfile.Profile()
+        self.query_log = QueryLog()
+        self.allocations = []
+        self.duration = None
+        self._stack = ExitStack()
+
+    def __enter__(self):
+        for alias in connections:
+            self._stack.enter_context(
+                connections[alias].execute_wrapper(self.query_log)
+            )
+        self._started_tracing = not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+        self._started = time.perf_counter()
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.disable()
+        self.duration = time.perf_counter() - self._started
+        snapshot = tracemalloc.take_snapshot()
+        if self._started_tracing:
+            tracemalloc.stop()
+        self._stack.close()
+        self.allocations = [
+            {"where": str(stat.traceback), "size": stat.size, "count": stat.count}
+            for stat in snapshot.statistics("lineno")[: self.top_allocations]
+        ]
+        return False
+
+    def save(self, directory, request_info):
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        name = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.profiler.dump_stats(directory / f"{name}.prof")
+        with open(directory / f"{name}.json", "w") as f:
+            json.dump(
+                {
+                    **request_info,
+                    "duration": self.duration,
+                    "queries": self.query_log.queries,
+                    "allocations": self.allocations,
+                },
+                f,
+            )
+        rotate(directory, settings.PROFILING_MAX_BYTES)
+        return name
+
+
+def rotate(directory, max_bytes):
+    """Remove the oldest profiles until the directory fits in ``max_bytes``."""
+    profiles = {}
+    for entry in os.scandir(directory):
+        stem, extension = os.path.splitext(entry.name)
+        if extension in (".prof", ".json"):
+            stat = entry.stat()
+            mtime, size = profiles.get(stem, (stat.st_mtime, 0))
+            profiles[stem] = (min(mtime, stat.st_mtime), size + stat.st_size)
+    total = sum(size for mtime, size in profiles.values())
+    for stem, (mtime, size) in sorted(profiles.items(), key=lambda item: item[1]):
+        if total <= max_bytes:
+            break
+        for extension in (".prof", ".json"):
+            Path(directory, stem + extension).unlink(missing_ok=True)
+        total -= size
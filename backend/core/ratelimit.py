@@ -0,0 +1,148 @@
+"""
+Token bucket rate limiting with interchangeable bucket storage.
+
+``LocalMemoryBackend`` keeps buckets in the process, ``SharedMemoryBackend``
+shares them between the worker processes of one host and ``CacheBackend``
+stores them in a Django cache, e.g. Redis, to share them across hosts.
+"""
+
+import fcntl
+import hashlib
+import math
+import os
+import struct
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from multiprocessing import resource_tracker, shared_memory
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+
+def take(tokens, last, now, rate, capacity, cost):
+    """
+    Refill a bucket holding ``tokens`` at ``last`` and try to take ``cost``,
+    a negative cost gives tokens back. Return ``(allowed, tokens left,
+    seconds until cost is available)``.
+    """
+    tokens = min(capacity, tokens + (now - last) * rate)
+    if tokens >= cost:
+        return True, min(capacity, tokens - cost), 0.0
+    return False, tokens, (cost - tokens) / rate
+
+
+class LocalMemoryBackend:
+    def __init__(self, max_keys=100_000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, rate, capacity, cost=1):
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.pop(key, (capacity, now))
+            allowed, tokens, wait = take(tokens, last, now, rate, capacity, cost)
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, wait
+
+
+class SharedMemoryBackend:
+    """
+    Fixed size open addressing table in POSIX shared memory, guarded by an
+    advisory file lock. A slot whose bucket would be full again is reused.
+    """
+
+    SLOT = struct.Struct("=Qdd")  # key hash, tokens, last refill (epoch seconds)
+    PROBES = 8
+
+    def __init__(self, name=None, slots=None):
+        name = name or settings.RATE_LIMIT_SHARED_MEMORY_NAME
+        self.slots = slots or settings.RATE_LIMIT_SHARED_MEMORY_SLOTS
+        size = self.SLOT.size * self.slots
+        try:
+            self._memory = shared_memory.SharedMemory(name, create=True, size=size)
+        except FileExistsError:
+            self._memory = shared_memory.SharedMemory(name)
+        # The table outlives the worker that happened to create it
+        resource_tracker.unregister(self._memory._name, "shared_memory")
+        self._lock_file = open(os.path.join(tempfile.gettempdir(), f"{name}.lock"), "a")
+        self._thread_lock = threading.Lock()
+
+    def _hash(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+        return int.from_bytes(digest, "little") or 1
+
+    def _find_slot(self, key_hash, now, rate, capacity):
+        buffer = self._memory.buf
+        first_free = None
+        for probe in range(self.PROBES):
+            offset = ((key_hash + probe) % self.slots) * self.SLOT.size
+            slot_hash, tokens, last = self.SLOT.unpack_from(buffer, offset)
+            if slot_hash == key_hash:
+                return offset, tokens, last
+            if first_free is None and (slot_hash == 0 or now - last >= capacity / rate):
+                first_free = offset
+        if first_free is None:  # table is crowded, evict the home slot
+            first_free = (key_hash % self.slots) * self.SLOT.size
+        return first_free, capacity, now
+
+    def consume(self, key, rate, capacity, cost=1):
+        key_hash = self._hash(key)
+        now = time.time()
+        with self._thread_lock:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            try:
+                offset, tokens, last = self._find_slot(key_hash, now, rate, capacity)
+                allowed, tokens, wait = take(tokens, last, now, rate, capacity, cost)
+                self.SLOT.pack_into(self._memory.buf, offset, key_hash, tokens, now)
+            finally:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+        return allowed, wait
+
+
+class CacheBackend:
+    """
+    Buckets in a Django cache. Reads and writes are not atomic, so concurrent
+    requests may slightly overshoot the limit.
+    """
+
+    def __init__(self, alias=None):
+        self.cache = caches[alias or settings.RATE_LIMIT_CACHE_ALIAS]
+
+    def consume(self, key, rate, capacity, cost=1):
+        now = time.time()
+        cache_key = f"ratelimit:{key}"
+        tokens, last = self.cache.get(cache_key, (capacity, now))
+        allowed, tokens, wait = take(tokens, last, now, rate, capacity, cost)
+        self.cache.set(cache_key, (tokens, now), math.ceil(capacity / rate) + 1)
+        return allowed, wait
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = import_string(settings.RATE_LIMIT_BACKEND)()
+    return _backend
+
+
+def consume(key, per_minute, cost=1):
+    """Take ``cost`` tokens from the bucket of ``key``, refilled ``per_minute``."""
+    rate = per_minute / 60
+    capacity = max(1.0, rate * settings.RATE_LIMIT_BURST_SECONDS)
+    return get_backend().consume(key, rate, capacity, cost)
+
+
+def refund(key, per_minute, cost=1):
+    """Give back ``cost`` tokens taken by ``consume``."""
+    consume(key, per_minute, -cost)
@@ -0,0 +1,67 @@
+from django.db.models import QuerySet
+from rest_framework import serializers
+
+
+class BlankAsNullCharField(serializers.CharField):
+    """CharField rendering a blank value as None."""
+
+    def to_representation(self, value):
+        if value == "":
+            return None
+        return super().to_representation(value)
+
+
+class ValuesSerializer:
+    """
+    Read-only serializer of ``values()`` rows, for lists too large for the
+    ModelSerializer field machinery. ``fields`` maps each output name to its
+    ``values()`` lookup; model instances are read by following the lookup.
+    Datetimes are rendered by DRF's DateTimeField, so the output matches
+    the ModelSerializer it stands in for. ``blank_as_null_fields`` render ""
+    as None, like BlankAsNullCharField.
+    """
+
+    fields = {}
+    datetime_fields = ()
+    blank_as_null_fields = ()
+
+    _datetime_field = serializers.DateTimeField()
+
+    def __init__(self, instance, many=False):
+        self.instance = instance
+        self.many = many
+
+    @classmethod
+    def values(cls, queryset):
+        return queryset.values(*cls.fields.values())
+
+    @staticmethod
+    def _resolve(obj, lookup):
+        if isinstance(obj, dict):
+            return obj[lookup]
+        for part in lookup.split("__"):
+            obj = getattr(obj, part)
+            if obj is None:
+                break
+        return obj
+
+    def to_representation(self, obj):
+        data = {
+            name: self._resolve(obj, lookup) for name, lookup in self.fields.items()
+        }
+        for name in self.datetime_fields:
+            if data[name] is not None:
+                data[name] = self._datetime_field.to_representation(data[name])
+        for name in self.blank_as_null_fields:
+            if data[name] == "":
+                data[name] = None
+        return data
+
+    @property
+    def data(self):
+        if not self.many:
+            return self.to_representation(self.instance)
+        rows = self.instance
+        if isinstance(rows, QuerySet):
+            rows = self.values(rows)
+        return [self.to_representation(row) for row in rows]
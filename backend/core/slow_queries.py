@@ -0,0 +1,162 @@
+"""
+Slow query log built on the database execute wrapper.
+
+Queries slower than ``SLOW_QUERY_THRESHOLD_MS`` are recorded as SlowQuery
+rows with their fingerprint, the view and provider account of the request
+and the types of their parameters, never the values. On Postgres a
+``SLOW_QUERY_EXPLAIN_SAMPLE_RATE`` share of slow SELECTs is run again under
+``EXPLAIN (ANALYZE, BUFFERS)``, unless running it again would lock rows or
+keep the row locks of its transaction longer. The table keeps the
+``SLOW_QUERY_MAX_ROWS`` newest rows.
+"""
+
+import hashlib
+import logging
+import random
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+
+from core import metrics
+from core.profiling import normalize_sql
+from core.utils import LOCKING_SQL
+
+logger = logging.getLogger("accounts")
+
+SLOW_QUERIES = metrics.counter(
+    "slow_queries_total", "Queries slower than SLOW_QUERY_THRESHOLD_MS."
+)
+
+_local = threading.local()
+
+
+def fingerprint(sql):
+    return hashlib.sha1(normalize_sql(sql).encode()).hexdigest()
+
+
+def redact(params):
+    """Keep the shape of the parameters only."""
+    if params is None:
+        return []
+    if isinstance(params, dict):
+        return {key: redact([value])[0] for key, value in params.items()}
+    return [
+        (
+            f"{type(value).__name__}:{len(value)}"
+            if isinstance(value, (str, bytes))
+            else type(value).__name__
+        )
+        for value in params
+    ]
+
+
+def holds_row_locks(connection):
+    """
+    Whether the transaction of ``connection`` locked or wrote rows, which
+    gives it a transaction id on Postgres.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_current_xact_id_if_assigned() IS NOT NULL")
+        return cursor.fetchone()[0]
+
+
+def explain(connection, sql, params):
+    """EXPLAIN ANALYZE a SELECT again, in a savepoint so a failure is harmless."""
+    if (
+        connection.vendor != "postgresql"
+        or sql.lstrip()[:6].upper() != "SELECT"
+        or LOCKING_SQL.search(sql)
+        or (connection.in_atomic_block and holds_row_locks(connection))
+    ):
+        return ""
+    try:
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {sql}", params)
+            return "\n".join(row[0] for row in cursor.fetchall())
+    except DatabaseError as e:
+        return f"EXPLAIN failed: {e}"
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms, explain_rate):
+        self.threshold = threshold_ms / 1000
+        self.explain_rate = explain_rate
+        self.records = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if getattr(_local, "busy", False):
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            if duration >= self.threshold:
+                self._record(context["connection"], sql, params, many, duration)
+
+    def _record(self, connection, sql, params, many, duration):
+        SLOW_QUERIES.inc(alias=connection.alias)
+        plan = ""
+        if not many and random.random() < self.explain_rate:
+            _local.busy = True
+            try:
+                plan = explain(connection, sql, params)
+            finally:
+                _local.busy = False
+        self.records.append(
+            {
+                "fingerprint": fingerprint(sql),
+                "sql": sql,
+                "params": [] if many else redact(params),
+                "duration_ms": duration * 1000,
+                "alias": connection.alias,
+                "plan": plan,
+            }
+        )
+
+    def flush(self, view="", provider_account_id=None):
+        """Store the recorded queries, outside of any transaction of the caller."""
+        if not self.records:
+            return
+        from core.models import SlowQuery
+
+        _local.busy = True
+        try:
+            SlowQuery.objects.bulk_create(
+                SlowQuery(
+                    view=view[:255],
+                    provider_account_id=provider_account_id,
+                    **record,
+                )
+                for record in self.records
+            )
+            newest = SlowQuery.objects.order_by("-id").values_list("id", flat=True)[
+                settings.SLOW_QUERY_MAX_ROWS : settings.SLOW_QUERY_MAX_ROWS + 1
+            ]
+            if newest:
+                SlowQuery.objects.filter(id__lte=newest[0]).delete()
+        except DatabaseError:
+            logger.exception("Could not store slow queries")
+        finally:
+            _local.busy = False
+            self.records = []
+
+
+@contextmanager
+def capture_slow_queries(threshold_ms=None, explain_rate=None):
+    """Record slow queries of all databases run by the wrapped code."""
+    log = SlowQueryLog(
+        settings.SLOW_QUERY_THRESHOLD_MS if threshold_ms is None else threshold_ms,
+        (
+            settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE
+            if explain_rate is None
+            else explain_rate
+        ),
+    )
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(log))
+        yield log
@@ -0,0 +1,117 @@
+"""
+Query and lock budgets for tests.
+
+``query_budget`` fails a test, or the block it wraps, that runs more
+queries or takes more row locks than declared. Locks are counted as the
+statements that lock rows: UPDATE, DELETE and SELECT ... FOR UPDATE/SHARE.
+SQLite drops FOR UPDATE from the SQL, so there only writes are counted.
+
+Run the tests with ``--budget-report`` to print every measured block with
+its budget, to tighten the budgets that have slack.
+"""
+
+import functools
+from contextlib import ExitStack
+
+from django.db import connections
+from django.test.runner import DiscoverRunner
+
+from core.utils import LOCKING_SQL
+
+measurements = []  # (name, queries, query budget, locks, lock budget)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class query_budget:
+    """
+    Decorator or context manager asserting at most ``queries`` queries and
+    ``locks`` locking statements on all databases.
+    """
+
+    def __init__(self, queries, locks=None, name=None):
+        self.queries = queries
+        self.locks = locks
+        self.name = name
+        self.executed = []
+
+    def __call__(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            name = self.name or f"{func.__module__}.{func.__qualname__}"
+            with query_budget(self.queries, self.locks, name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    def _record(self, execute, sql, params, many, context):
+        self.executed.append(sql)
+        return execute(sql, params, many, context)
+
+    @property
+    def lock_count(self):
+        return sum(1 for sql in self.executed if LOCKING_SQL.search(sql))
+
+    def __enter__(self):
+        self.executed = []
+        self._stack = ExitStack()
+        for alias in connections:
+            self._stack.enter_context(connections[alias].execute_wrapper(self._record))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._stack.close()
+        if exc_type is not None:
+            return False
+        measurements.append(
+            (
+                self.name or "unnamed block",
+                len(self.executed),
+                self.queries,
+                self.lock_count,
+                self.locks,
+            )
+        )
+        problems = []
+        if len(self.executed) > self.queries:
+            problems.append(f"{len(self.executed)} queries, budget {self.queries}")
+        if self.locks is not None and self.lock_count > self.locks:
+            problems.append(f"{self.lock_count} locks, budget {self.locks}")
+        if problems:
+            queries = "\n".join(
+                f"{index}. {sql}" for index, sql in enumerate(self.executed, 1)
+            )
+            raise QueryBudgetExceeded(
+                f"{self.name or 'Block'}: {', '.join(problems)}\n{queries}"
+            )
+        return False
+
+
+class BudgetReportRunner(DiscoverRunner):
+    def __init__(self, budget_report=False, **kwargs):
+        super().__init__(**kwargs)
+        self.budget_report = budget_report
+
+    @classmethod
+    def add_arguments(cls, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--budget-report",
+            action="store_true",
+            help="print the queries and locks measured against each budget",
+        )
+
+    def suite_result(self, suite, result, **kwargs):
+        if self.budget_report and measurements:
+            width = max(len(name) for name, *rest in measurements)
+            lines = [f"{'budget':{width}}  queries  locks"]
+            for name, queries, query_budget, locks, lock_budget in sorted(measurements):
+                lock_budget = "-" if lock_budget is None else lock_budget
+                lines.append(
+                    f"{name:{width}}  {queries:>3}/{query_budget:<3}  "
+                    f"{locks:>2}/{lock_budget}"
+                )
+            print("\n".join(lines))
+        return super().suite_result(suite, result, **kwargs)
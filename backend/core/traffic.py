@@ -0,0 +1,165 @@
+"""
+Capture of production traffic for ``replay_traffic``.
+
+With ``TRAFFIC_CAPTURE_ENABLED`` RequestLoggingMiddleware appends every
+request under ``TRAFFIC_CAPTURE_PATHS`` as a JSON line to an hourly file per
+process in ``TRAFFIC_CAPTURE_DIR``: its start time, method, full path, view,
+content type, body, response status and duration.
+
+Credentials never reach the files. Authorization and Cookie headers are not
+recorded, the client is a keyed hash of its credential, which keeps the
+requests of a client together, and the authenticated user is kept as an id
+so that the replay can authenticate as the same user on a copy of the data.
+JSON body fields named in ``TRAFFIC_CAPTURE_REDACT_FIELDS`` are replaced.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+REDACTED = "[redacted]"
+
+
+def client_id(request):
+    credential = (
+        request.META.get("HTTP_AUTHORIZATION")
+        or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        or request.META.get("REMOTE_ADDR", "")
+    )
+    return hmac.new(
+        settings.SECRET_KEY.encode(), credential.encode(), hashlib.sha256
+    ).hexdigest()[:16]
+
+
+def redact_fields(value, fields):
+    if isinstance(value, dict):
+        return {
+            key: REDACTED if key in fields else redact_fields(item, fields)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [redact_fields(item, fields) for item in value]
+    return value
+
+
+def encode_body(body, content_type, max_bytes):
+    """The body fields of a record, redacted when it is JSON."""
+    if body is None or len(body) > max_bytes:
+        return {"body_truncated": True}
+    if not body:
+        return {}
+    if content_type.startswith("application/json"):
+        try:
+            data = json.loads(body)
+        except ValueError:
+            pass
+        else:
+            fields = set(settings.TRAFFIC_CAPTURE_REDACT_FIELDS)
+            return {"body": json.dumps(redact_fields(data, fields))}
+    return {"body_b64": base64.b64encode(body).decode()}
+
+
+def decode_body(record):
+    if "body" in record:
+        return record["body"].encode()
+    if "body_b64" in record:
+        return base64.b64decode(record["body_b64"])
+    return b""
+
+
+class TrafficCapture:
+    def __init__(self, directory=None, paths=None, max_body_bytes=None):
+        self.directory = Path(directory or settings.TRAFFIC_CAPTURE_DIR)
+        self.paths = tuple(paths or settings.TRAFFIC_CAPTURE_PATHS)
+        self.max_body_bytes = max_body_bytes or settings.TRAFFIC_CAPTURE_MAX_BODY_BYTES
+        self._lock = threading.Lock()
+        self._file = None
+        self._file_name = None
+
+    def wants(self, request):
+        return request.path.startswith(self.paths)
+
+    def read_body(self, request):
+        """The request body, None when it is too large to capture."""
+        if int(request.META.get("CONTENT_LENGTH") or 0) > self.max_body_bytes:
+            return None
+        return request.body
+
+    def record(self, request, body, response, started, duration):
+        content_type = request.META.get("CONTENT_TYPE", "")
+        user = getattr(request, "user", None)
+        match = request.resolver_match
+        record = {
+            "ts": started,
+            "client": client_id(request),
+            "user_id": user.pk if user is not None and user.is_authenticated else None,
+            "method": request.method,
+            "path": request.get_full_path(),
+            "view": match.view_name if match else None,
+            "content_type": content_type,
+            "accept": request.META.get("HTTP_ACCEPT", ""),
+            **encode_body(body, content_type, self.max_body_bytes),
+            "status": response.status_code,
+            "duration": duration,
+        }
+        self.write(json.dumps(record))
+
+    def write(self, line):
+        name = f"traffic-{time.strftime('%Y%m%dT%H')}-{os.getpid()}.jsonl"
+        with self._lock:
+            if name != self._file_name:
+                if self._file is not None:
+                    self._file.close()
+                self.directory.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.directory / name, "a", buffering=1)
+                self._file_name = name
+            self._file.write(line + "\n")
+
+
+def read_records(paths):
+    """Records of the capture files, ordered by start time."""
+    records = []
+    for path in paths:
+        with open(path) as f:
+            records.extend(json.loads(line) for line in f if line.strip())
+    records.sort(key=lambda record: record["ts"])
+    return records
+
+
+def percentile(values, share):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(share * len(values)))]
+
+
+def summarize(results):
+    """
+    Per ``method view``: requests, server errors, statuses that differ from
+    the captured ones and latency percentiles, in milliseconds.
+    """
+    groups = {}
+    for result in results:
+        key = f"{result['method']} {result['view'] or result['path']}"
+        groups.setdefault(key, []).append(result)
+    summary = {}
+    for key, group in groups.items():
+        latencies = [r["latency"] * 1000 for r in group if r["status"] is not None]
+        summary[key] = {
+            "requests": len(group),
+            "errors": sum(
+                1 for r in group if r["status"] is None or r["status"] >= 500
+            ),
+            "mismatches": sum(1 for r in group if r["status"] != r["captured_status"]),
+            "p50": percentile(latencies, 0.5),
+            "p95": percentile(latencies, 0.95),
+            "p99": percentile(latencies, 0.99),
+        }
+    return summary
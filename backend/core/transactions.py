@@ -0,0 +1,154 @@
+"""
+Helpers for transactions that contend on hot rows.
+
+``atomic_with_retry`` runs a function in ``transaction.atomic`` and runs it
+again when the database aborted the transaction for a transient reason:
+a deadlock, a serialization failure or a lock wait that timed out.
+"""
+
+import functools
+import random
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections, transaction
+
+from core import metrics, ratelimit
+
+LOCK_NOT_AVAILABLE = "55P03"
+DEADLOCK_DETECTED = "40P01"
+SERIALIZATION_FAILURE = "40001"
+
+TRANSIENT_SQLSTATES = {
+    LOCK_NOT_AVAILABLE: "lock_timeout",
+    DEADLOCK_DETECTED: "deadlock",
+    SERIALIZATION_FAILURE: "serialization_failure",
+}
+
+SQLITE_LOCKED = ("database is locked", "database table is locked")
+
+SERIALIZABLE = "serializable"
+
+RETRIES = metrics.counter(
+    "transaction_retries_total",
+    "Transactions run again after a transient database failure.",
+)
+EXHAUSTED = metrics.counter(
+    "transaction_retries_exhausted_total",
+    "Transient database failures returned to the caller without a retry.",
+)
+
+
+def sqlstate(error):
+    """SQLSTATE of a database error raised by psycopg 3 or psycopg2."""
+    cause = error.__cause__
+    return getattr(cause, "sqlstate", None) or getattr(cause, "pgcode", None)
+
+
+def transient_reason(error):
+    """Why ``error`` is worth a retry, or None when it is not."""
+    if not isinstance(error, DatabaseError):
+        return None
+    reason = TRANSIENT_SQLSTATES.get(sqlstate(error))
+    # SQLite: "database is locked", or "database table is locked: <table>"
+    # between connections sharing the cache of an in-memory database. It has
+    # no bounded lock wait, running again is how it waits for the lock
+    if reason is None and str(error).startswith(SQLITE_LOCKED):
+        reason = "database_locked"
+    return reason
+
+
+def is_lock_timeout(error):
+    return transient_reason(error) in ("lock_timeout", "database_locked")
+
+
+def is_transient(error):
+    return transient_reason(error) is not None
+
+
+def set_local_lock_timeout(milliseconds, using=DEFAULT_DB_ALIAS):
+    """Bound lock waits of the current transaction, where the database allows it."""
+    connection = connections[using]
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(f"SET LOCAL lock_timeout = {int(milliseconds)}")
+
+
+def set_isolation_level(isolation, using=DEFAULT_DB_ALIAS):
+    """Must run before any other statement of the transaction."""
+    connection = connections[using]
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(f"SET TRANSACTION ISOLATION LEVEL {isolation.upper()}")
+
+
+def backoff(attempt, base_delay, max_delay):
+    """Full jitter exponential backoff before retry number ``attempt``."""
+    return random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+
+
+def atomic_with_retry(
+    func=None, *, using=None, attempts=None, isolation=None, name=None, retry_on=None
+):
+    """
+    Decorator running ``func`` in its own transaction, retried on transient
+    failures with jittered exponential backoff. ``retry_on`` limits the
+    retries to some of the reasons of ``transient_reason``, the others are
+    raised at once.
+
+    Retries of all processes sharing the rate limit backend are bounded by
+    the TRANSACTION_RETRY_BUDGET per minute of each function, so a storm of
+    conflicts does not multiply the load. Inside an outer atomic block the
+    function only gets a savepoint: the outer transaction is aborted by the
+    failure and only its owner can run it again.
+    """
+
+    def decorator(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            alias = using or DEFAULT_DB_ALIAS
+            if connections[alias].in_atomic_block:
+                with transaction.atomic(using=alias):
+                    return func(*args, **kwargs)
+
+            max_attempts = attempts or settings.TRANSACTION_RETRY_ATTEMPTS
+            level = isolation or settings.TRANSACTION_ISOLATION
+            attempt = 1
+            while True:
+                try:
+                    with transaction.atomic(using=alias):
+                        if level:
+                            set_isolation_level(level, using=alias)
+                        return func(*args, **kwargs)
+                except DatabaseError as e:
+                    reason = transient_reason(e)
+                    if reason is None or (
+                        retry_on is not None and reason not in retry_on
+                    ):
+                        raise
+                    if (
+                        attempt >= max_attempts
+                        or not ratelimit.consume(
+                            f"transaction-retry:{label}",
+                            settings.TRANSACTION_RETRY_BUDGET,
+                        )[0]
+                    ):
+                        EXHAUSTED.inc(function=label, reason=reason)
+                        raise
+                    RETRIES.inc(function=label, reason=reason)
+                time.sleep(
+                    backoff(
+                        attempt,
+                        settings.TRANSACTION_RETRY_BASE_DELAY,
+                        settings.TRANSACTION_RETRY_MAX_DELAY,
+                    )
+                )
+                attempt += 1
+
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
@@ -1,3 +1,76 @@
+import csv
+import io
+import re
+
 from django.core.validators import RegexValidator
+from django.db import connection
+
+PhoneNumberRegexValidation =RegexValidator(r"^09\d{9}")
+
+# Statements that lock rows: UPDATE, DELETE and SELECT ... FOR UPDATE/SHARE
+LOCKING_SQL = re.compile(
+    r"^\s*(UPDATE|DELETE)\b|\bFOR\s+(NO\s+KEY\s+)?(UPDATE|SHARE|KEY\s+SHARE)\b",
+    re.IGNORECASE,
+)
+
+
+def chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_csv_column(stream, column=0):
+    """Yield one column of a csv stream, skipping a non numeric header row."""
+    reader = csv.reader(stream)
+    for index, row in enumerate(reader):
+        if not row or len(row) <= column:
+            continue
+        value = row[column].strip()
+        if index == 0 and not value.isdigit():
+            continue
+        yield value
+
 
-PhoneNumberRegexValidation =RegexValidator(r"^09\d{9}")
\ No newline at end of file
+def insert_rows(model, fields, rows):
+    """
+    Insert ``rows``, tuples of values for the model ``fields``, as they are:
+    no save(), signals or auto_now. Uses COPY on Postgres.
+    """
+    opts = model._meta
+    model_fields = [opts.get_field(name) for name in fields]
+    quote = connection.ops.quote_name
+    columns = ", ".join(quote(field.column) for field in model_fields)
+    table = quote(opts.db_table)
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            copy_sql = f"COPY {table} ({columns}) FROM STDIN"
+            if hasattr(cursor.cursor, "copy_expert"):  # psycopg2
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerows(
+                    ["" if value is None else value for value in row] for row in rows
+                )
+                buffer.seek(0)
+                cursor.cursor.copy_expert(f"{copy_sql} WITH (FORMAT csv)", buffer)
+            else:  # psycopg 3
+                with cursor.cursor.copy(copy_sql) as copy:
+                    for row in rows:
+                        copy.write_row(row)
+        else:
+            placeholders = ", ".join(["%s"] * len(model_fields))
+            cursor.executemany(
+                f"INSERT INTO {table} ({columns}) VALUES ({placeholders})",
+                [
+                    [
+                        field.get_db_prep_save(value, connection)
+                        for field, value in zip(model_fields, row)
+                    ]
+                    for row in rows
+                ],
+            )
@@ -54,6 +54,9 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "simple_history.middleware.HistoryRequestMiddleware",
     'core.middleware.RequestLoggingMiddleware', 
+    "core.middleware.ProfilingMiddleware",
+    "core.middleware.SlowQueryMiddleware",
+    "core.middleware.ReplicaRoutingMiddleware",
 ]
 
 ROOT_URLCONF = "tabdeal.urls"
@@ -81,6 +84,15 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "core.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "core.parsers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
     "EXCEPTION_HANDLER": "rest_framework.views.exception_handler",
     "DEFAULT_THROTTLE_RATES": {
         "anon": "100/hour",
@@ -106,9 +118,56 @@ DATABASES = {
         "PASSWORD": os.environ.get("SQL_PASSWORD", "password"),
         "HOST": os.environ.get("SQL_HOST", "localhost"),
         "PORT": os.environ.get("SQL_PORT", "5432"),
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
+if "postgresql" in DATABASES["default"]["ENGINE"]:
+    DATABASES["default"]["OPTIONS"] = {
+        "options": (
+            f"-c statement_timeout={os.environ.get('SQL_STATEMENT_TIMEOUT_MS', 30000)} "
+            f"-c lock_timeout={os.environ.get('SQL_LOCK_TIMEOUT_MS', 10000)}"
+        ),
+    }
+    # Per worker process pool, needs psycopg 3 with the pool extra
+    SQL_POOL_MAX_SIZE = int(os.environ.get("SQL_POOL_MAX_SIZE", 0))
+    if SQL_POOL_MAX_SIZE:
+        DATABASES["default"]["CONN_MAX_AGE"] = 0
+        DATABASES["default"]["OPTIONS"]["pool"] = {
+            "min_size": int(os.environ.get("SQL_POOL_MIN_SIZE", 2)),
+            "max_size": SQL_POOL_MAX_SIZE,
+            "timeout": float(os.environ.get("SQL_POOL_TIMEOUT", 5)),
+            "max_idle": float(os.environ.get("SQL_POOL_MAX_IDLE", 600)),
+        }
+    else:
+        DATABASES["default"]["CONN_MAX_AGE"] = int(
+            os.environ.get("SQL_CONN_MAX_AGE", 60)
+        )
+
+# Comma separated hosts of streaming replicas of the default database
+SQL_REPLICA_HOSTS = [
+    host.strip()
+    for host in os.environ.get("SQL_REPLICA_HOSTS", "").split(",")
+    if host.strip()
+]
+DATABASE_REPLICAS = []
+for index, host in enumerate(SQL_REPLICA_HOSTS):
+    alias = f"replica_{index}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["core.db_router.ReplicaRouter"]
+
+# Clients that wrote read from the primary for this long afterwards
+REPLICA_PIN_SECONDS = int(os.environ.get("REPLICA_PIN_SECONDS", 5))
+# Replicas lagging behind more than this are skipped
+REPLICA_MAX_LAG_SECONDS = float(os.environ.get("REPLICA_MAX_LAG_SECONDS", 2))
+REPLICA_LAG_CHECK_INTERVAL = float(os.environ.get("REPLICA_LAG_CHECK_INTERVAL", 1))
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -137,5 +196,176 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 
+MEDIA_URL = "media/"
+MEDIA_ROOT = os.environ.get("MEDIA_ROOT", BASE_DIR / "media")
+
+CHARGE_JOB_CHUNK_SIZE = int(os.environ.get("CHARGE_JOB_CHUNK_SIZE", 1000))
+# A charge job whose worker stopped renewing its claim for this long is taken over
+CHARGE_JOB_LEASE_SECONDS = int(os.environ.get("CHARGE_JOB_LEASE_SECONDS", 300))
+
+# Runs of charge schedules due at the same time start spread over this many
+# seconds, so that a popular due time does not lock all wallets at once
+CHARGE_SCHEDULE_SPREAD_SECONDS = int(
+    os.environ.get("CHARGE_SCHEDULE_SPREAD_SECONDS", 300)
+)
+# Pause between the batches of a run, to let other charges take the wallet lock
+CHARGE_SCHEDULE_BATCH_PAUSE = float(os.environ.get("CHARGE_SCHEDULE_BATCH_PAUSE", 0.1))
+# Missed runs of a schedule executed when the scheduler catches up, older
+# ones are recorded as skipped
+CHARGE_SCHEDULE_MAX_CATCH_UP = int(os.environ.get("CHARGE_SCHEDULE_MAX_CATCH_UP", 3))
+# A run whose worker stopped renewing its claim for this long is taken over
+CHARGE_SCHEDULE_LEASE_SECONDS = int(
+    os.environ.get("CHARGE_SCHEDULE_LEASE_SECONDS", 300)
+)
+# A run taken over this many times without an outcome is marked failed
+CHARGE_SCHEDULE_MAX_TAKEOVERS = int(os.environ.get("CHARGE_SCHEDULE_MAX_TAKEOVERS", 3))
+# Items charged per wallet lock by the batch ingest endpoint, and items per request
+CHARGE_INGEST_BATCH_SIZE = int(os.environ.get("CHARGE_INGEST_BATCH_SIZE", 500))
+CHARGE_INGEST_MAX_ITEMS = int(os.environ.get("CHARGE_INGEST_MAX_ITEMS", 100000))
+
+# Top-up delivery to the mobile operators, see accounts.dispatcher
+TOPUP_OPERATOR_BASE_URL = os.environ.get(
+    "TOPUP_OPERATOR_BASE_URL", "http://127.0.0.1:8100"
+)
+TOPUP_OPERATORS = {
+    "mci": {
+        "prefixes": [
+            "0910", "0911", "0912", "0913", "0914", "0915", "0916", "0917",
+            "0918", "0919", "0990", "0991", "0992", "0993", "0994",
+        ],
+        "url": f"{TOPUP_OPERATOR_BASE_URL}/mci/topup",
+        "concurrency": int(os.environ.get("TOPUP_MCI_CONCURRENCY", 20)),
+    },
+    "irancell": {
+        "prefixes": [
+            "0900", "0901", "0902", "0903", "0904", "0905", "0930", "0933",
+            "0935", "0936", "0937", "0938", "0939", "0941",
+        ],
+        "url": f"{TOPUP_OPERATOR_BASE_URL}/irancell/topup",
+        "concurrency": int(os.environ.get("TOPUP_IRANCELL_CONCURRENCY", 20)),
+    },
+    "rightel": {
+        "prefixes": ["0920", "0921", "0922", "0923"],
+        "url": f"{TOPUP_OPERATOR_BASE_URL}/rightel/topup",
+        "concurrency": int(os.environ.get("TOPUP_RIGHTEL_CONCURRENCY", 10)),
+    },
+}
+TOPUP_DEFAULT_OPERATOR = "mci"
+TOPUP_DISPATCH_BATCH_SIZE = int(os.environ.get("TOPUP_DISPATCH_BATCH_SIZE", 200))
+TOPUP_REQUEST_TIMEOUT = float(os.environ.get("TOPUP_REQUEST_TIMEOUT", 10))
+TOPUP_DELIVERY_LEASE_SECONDS = int(os.environ.get("TOPUP_DELIVERY_LEASE_SECONDS", 60))
+TOPUP_MAX_ATTEMPTS = int(os.environ.get("TOPUP_MAX_ATTEMPTS", 5))
+TOPUP_RETRY_BASE_DELAY = float(os.environ.get("TOPUP_RETRY_BASE_DELAY", 2))
+TOPUP_RETRY_MAX_DELAY = float(os.environ.get("TOPUP_RETRY_MAX_DELAY", 300))
+
+# Token buckets of the charge and deposit endpoints, in requests per minute.
+# The account limit can be overridden on each ProviderAccount.
+RATE_LIMITS = {
+    "charge": {
+        "user": int(os.environ.get("RATE_LIMIT_CHARGE_USER", 300)),
+        "account": int(os.environ.get("RATE_LIMIT_CHARGE_ACCOUNT", 1200)),
+    },
+    "deposit": {
+        "user": int(os.environ.get("RATE_LIMIT_DEPOSIT_USER", 10)),
+        "account": int(os.environ.get("RATE_LIMIT_DEPOSIT_ACCOUNT", 30)),
+    },
+}
+# Charges rejected with 429 once this many requests of a process wait on one wallet
+WALLET_MAX_WAITERS = int(os.environ.get("WALLET_MAX_WAITERS", 20))
+# How long a charge may wait for the wallet row lock (Postgres only)
+WALLET_LOCK_TIMEOUT_MS = int(os.environ.get("WALLET_LOCK_TIMEOUT_MS", 2000))
+# Retry-After sent with rejected charges, in seconds
+WALLET_BUSY_RETRY_AFTER = int(os.environ.get("WALLET_BUSY_RETRY_AFTER", 1))
+# The same account, phone number and amount charged again within this many
+# seconds is rejected as a duplicate, see accounts.dedup. 0 disables the check.
+CHARGE_DEDUP_WINDOW_SECONDS = float(os.environ.get("CHARGE_DEDUP_WINDOW_SECONDS", 0))
+# Recent charges remembered by each process, beyond it the oldest are dropped
+CHARGE_DEDUP_MAX_KEYS = 100000
+
+# Retries of transactions aborted by a deadlock, serialization failure or lock timeout
+TRANSACTION_RETRY_ATTEMPTS = int(os.environ.get("TRANSACTION_RETRY_ATTEMPTS", 5))
+TRANSACTION_RETRY_BASE_DELAY = float(
+    os.environ.get("TRANSACTION_RETRY_BASE_DELAY", 0.02)
+)
+TRANSACTION_RETRY_MAX_DELAY = float(os.environ.get("TRANSACTION_RETRY_MAX_DELAY", 0.5))
+# Retries allowed per minute and function, shared through the rate limit backend
+TRANSACTION_RETRY_BUDGET = int(os.environ.get("TRANSACTION_RETRY_BUDGET", 600))
+# Empty for the database default, or "serializable"
+TRANSACTION_ISOLATION = os.environ.get("TRANSACTION_ISOLATION", "")
+
+# Bucket size, in seconds worth of the refill rate
+RATE_LIMIT_BURST_SECONDS = float(os.environ.get("RATE_LIMIT_BURST_SECONDS", 10))
+# core.ratelimit.LocalMemoryBackend, SharedMemoryBackend or CacheBackend
+RATE_LIMIT_BACKEND = os.environ.get(
+    "RATE_LIMIT_BACKEND", "core.ratelimit.LocalMemoryBackend"
+)
+RATE_LIMIT_SHARED_MEMORY_NAME = "tabdeal_ratelimit"
+RATE_LIMIT_SHARED_MEMORY_SLOTS = 65536
+RATE_LIMIT_CACHE_ALIAS = "default"
+# How long per account limits are cached by each process
+RATE_LIMIT_CONFIG_TTL = int(os.environ.get("RATE_LIMIT_CONFIG_TTL", 30))
+
+# Holds not captured or released in time are returned by sweep_expired_holds
+WALLET_HOLD_TTL_SECONDS = int(os.environ.get("WALLET_HOLD_TTL_SECONDS", 300))
+
+# Spend counter windows starting longer ago are deleted by prune_spend_counters
+SPEND_COUNTER_RETENTION_DAYS = int(os.environ.get("SPEND_COUNTER_RETENTION_DAYS", 62))
+
+# How long each process serves a wallet summary before reading it again. Money
+# moved by the process itself drops its cached summary at once.
+WALLET_SUMMARY_CACHE_SECONDS = float(os.environ.get("WALLET_SUMMARY_CACHE_SECONDS", 5))
+# Charges and deposits listed in a wallet summary
+WALLET_SUMMARY_RECENT_ROWS = 10
+
+# Wallet and deposit event streams, see core.events. PostgresBackend shares the
+# events of all processes through LISTEN/NOTIFY, LocalBackend keeps them in the
+# process that committed them.
+EVENTS_BACKEND = os.environ.get("EVENTS_BACKEND", "core.events.LocalBackend")
+# Events buffered per stream before it is told it lagged
+EVENTS_QUEUE_SIZE = int(os.environ.get("EVENTS_QUEUE_SIZE", 100))
+# Idle streams send a comment this often to keep proxies from closing them
+EVENTS_KEEPALIVE_SECONDS = float(os.environ.get("EVENTS_KEEPALIVE_SECONDS", 15))
+# Balance updates of a stream are sent at most this often
+EVENTS_BALANCE_INTERVAL = float(os.environ.get("EVENTS_BALANCE_INTERVAL", 0.5))
+
+# Ledger rows younger than this are re-read on the next reconciliation run
+RECONCILIATION_SETTLE_SECONDS = int(os.environ.get("RECONCILIATION_SETTLE_SECONDS", 60))
+
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# Adds --budget-report, see core.testing
+TEST_RUNNER = "core.testing.BudgetReportRunner"
+
+# Bearer token required to scrape /metrics/, which is not served without one
+# unless DEBUG
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+# Request profiling, see core.profiling. Off unless enabled.
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "0") == "1"
+# Share of requests profiled without a token
+PROFILING_SAMPLE_RATE = float(os.environ.get("PROFILING_SAMPLE_RATE", 0))
+# Lifetime of X-Profile tokens, in seconds
+PROFILING_TOKEN_MAX_AGE = int(os.environ.get("PROFILING_TOKEN_MAX_AGE", 3600))
+PROFILING_DIR = os.environ.get("PROFILING_DIR", BASE_DIR / "profiles")
+PROFILING_MAX_BYTES = int(os.environ.get("PROFILING_MAX_BYTES", 200 * 1024 * 1024))
+
+# Queries slower than this are stored as SlowQuery rows, 0 disables the log
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get("SLOW_QUERY_THRESHOLD_MS", 500))
+# Share of slow SELECTs run again under EXPLAIN (ANALYZE, BUFFERS), Postgres only
+SLOW_QUERY_EXPLAIN_SAMPLE_RATE = float(
+    os.environ.get("SLOW_QUERY_EXPLAIN_SAMPLE_RATE", 0.1)
+)
+SLOW_QUERY_MAX_ROWS = int(os.environ.get("SLOW_QUERY_MAX_ROWS", 10000))
+
+# Replayable capture of the API traffic, see core.traffic and replay_traffic
+TRAFFIC_CAPTURE_ENABLED = os.environ.get("TRAFFIC_CAPTURE_ENABLED", "0") == "1"
+TRAFFIC_CAPTURE_DIR = os.environ.get("TRAFFIC_CAPTURE_DIR", BASE_DIR / "traffic")
+# Captured path prefixes, the login views under /api/auth/ are left out
+TRAFFIC_CAPTURE_PATHS = ["/api/request_", "/api/charge_"]
+# JSON body fields replaced before the request is written
+TRAFFIC_CAPTURE_REDACT_FIELDS = ["password", "token", "secret"]
+# Larger bodies are recorded without their content and skipped on replay
+TRAFFIC_CAPTURE_MAX_BODY_BYTES = int(
+    os.environ.get("TRAFFIC_CAPTURE_MAX_BODY_BYTES", 1024 * 1024)
+)